@@ -1,6 +1,21 @@
 #app.py
 from flask import Flask, render_template
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
+from utils.db import init_app as init_db
+from utils.metrics import init_app as init_metrics
+from utils.locations import init_app as init_locations
+from utils.user_context import init_app as init_user_context
+from utils.issue_view import init_app as init_issue_view
+from utils.otp import init_app as init_otp
+from utils.image_pipeline import init_app as init_image_pipeline
+from utils.notifications import init_app as init_notifications
+from utils.sla import init_app as init_sla
+from utils.rollups import init_app as init_rollups
+from utils.resolution_stats import init_app as init_resolution_stats
+from utils.issue_tree import init_app as init_issue_tree
+from utils.upload_store import upload_url
+from commands import register_commands
 
 # Blueprints
 from routes.otp_routes import otp_bp
@@ -16,6 +31,59 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
 
+    # Number of reverse proxies in front of the app; their X-Forwarded-For
+    # then gives the client address used by the per-IP OTP limit
+    app.config.setdefault("TRUSTED_PROXY_HOPS", 0)
+    if app.config["TRUSTED_PROXY_HOPS"]:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config["TRUSTED_PROXY_HOPS"])
+
+    # Chart.js for the analytics charts: one pinned build, loaded with its
+    # SRI hash (`flask chartjs-integrity` prints it) so the CDN cannot swap it
+    app.config.setdefault("CHARTJS_URL", "https://cdn.jsdelivr.net/npm/chart.js@4.4.1/dist/chart.umd.js")
+    app.config.setdefault("CHARTJS_INTEGRITY", None)
+
+    # Pooled MySQL connections, one borrowed per request
+    init_db(app)
+
+    # Query timing, slow-query log, request histograms and /metrics
+    init_metrics(app)
+
+    # In-process State → City → Ward / Department cache
+    init_locations(app)
+
+    # Per-user state/city/ward/department scope, loaded once per login
+    init_user_context(app)
+
+    # Assembled issue detail pages, versioned by Issues.updated_at
+    init_issue_view(app)
+
+    # OTP store + request rate limits (memory / redis / database)
+    init_otp(app)
+
+    # Background thumbnail / web-variant generation for uploads
+    init_image_pipeline(app)
+
+    # Outbox dispatcher for SMS / email notifications
+    init_notifications(app)
+
+    # Deadline sweeps: escalations + overdue counts
+    init_sla(app)
+
+    # Issue_Events -> daily rollups for the analytics charts
+    init_rollups(app)
+
+    # Resolution-time percentiles, cached per scope
+    init_resolution_stats(app)
+
+    # State → City → Ward status counts, followed via Issue_Versions
+    init_issue_tree(app)
+
+    # Templates build upload links through the media route
+    app.jinja_env.globals["upload_url"] = upload_url
+
+    # CLI maintenance commands (flask <command>)
+    register_commands(app)
+
     # Register Blueprints
     app.register_blueprint(main_bp)
     app.register_blueprint(otp_bp, url_prefix="/otp")
@@ -0,0 +1,189 @@
+# benchmarks/resolution_benchmark.py
+"""
+Resolution-time percentiles: per-row timeline walk vs the bulk path.
+
+Builds scratch copies of Issues / Status_Updates (Bench_Res_Issues,
+Bench_Res_Updates) with about --updates status updates in the database
+from config.py, then times
+  - walking every timeline row by row in Python, and
+  - utils/resolution_stats: one row per issue from MySQL, summarised
+    over arrays (NumPy when installed, pure Python otherwise).
+
+    python -m benchmarks.resolution_benchmark --updates 3000000
+
+The scratch tables are dropped afterwards unless --keep is given.
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from config import Config
+from utils import resolution_stats
+from utils.resolution_stats import load_columns, summarise
+
+DEPARTMENTS = 40
+WARDS = 400
+
+BULK_SQL = """
+    SELECT i.department_id AS group_key,
+           UNIX_TIMESTAMP(COALESCE(
+               MIN(CASE WHEN su.status = 'Reported' THEN su.updated_at END),
+               i.created_at)) AS reported_at,
+           UNIX_TIMESTAMP(MIN(CASE WHEN su.status = 'Assigned' THEN su.updated_at END)) AS assigned_at,
+           UNIX_TIMESTAMP(MIN(CASE WHEN su.status = 'Resolved' THEN su.updated_at END)) AS resolved_at,
+           UNIX_TIMESTAMP(i.deadline) AS deadline_at
+    FROM Bench_Res_Issues i
+    LEFT JOIN Bench_Res_Updates su ON su.issue_id = i.issue_id
+    GROUP BY i.issue_id
+"""
+
+ROWS_SQL = """
+    SELECT i.issue_id, i.department_id, i.created_at, i.deadline, su.status, su.updated_at
+    FROM Bench_Res_Issues i
+    LEFT JOIN Bench_Res_Updates su ON su.issue_id = i.issue_id
+    ORDER BY i.issue_id, su.updated_at
+"""
+
+
+def populate(conn, updates, batch=10000):
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS Bench_Res_Updates")
+    cursor.execute("DROP TABLE IF EXISTS Bench_Res_Issues")
+    cursor.execute("""
+        CREATE TABLE Bench_Res_Issues (
+            issue_id      INT PRIMARY KEY,
+            department_id INT NOT NULL,
+            ward_id       INT NOT NULL,
+            created_at    DATETIME NOT NULL,
+            deadline      DATETIME NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE TABLE Bench_Res_Updates (
+            issue_id   INT NOT NULL,
+            status     VARCHAR(20) NOT NULL,
+            remarks    VARCHAR(255) NULL,
+            updated_at DATETIME NOT NULL,
+            KEY idx_bench_res_issue_status (issue_id, status, updated_at)
+        )
+    """)
+
+    start = datetime.now() - timedelta(days=365)
+    issues, timeline = [], []
+    issue_id = 0
+    written = 0
+
+    def flush():
+        cursor.executemany(
+            "INSERT INTO Bench_Res_Issues VALUES (%s,%s,%s,%s,%s)", issues
+        )
+        cursor.executemany(
+            "INSERT INTO Bench_Res_Updates VALUES (%s,%s,%s,%s)", timeline
+        )
+        conn.commit()
+        issues.clear()
+        timeline.clear()
+
+    while written < updates:
+        issue_id += 1
+        reported = start + timedelta(minutes=random.randint(0, 365 * 24 * 60))
+        deadline = reported + timedelta(days=7) if random.random() < 0.7 else None
+        issues.append((
+            issue_id, random.randint(1, DEPARTMENTS), random.randint(1, WARDS), reported, deadline
+        ))
+
+        at = reported
+        for status in ("Reported", "Assigned", "In Progress", "Resolved"):
+            timeline.append((issue_id, status, "bench", at))
+            written += 1
+            if random.random() < 0.15:
+                break
+            at += timedelta(hours=random.expovariate(1 / 36))
+
+        if len(timeline) >= batch:
+            flush()
+
+    flush()
+    cursor.close()
+    return issue_id
+
+
+def row_by_row(conn):
+    """Reference: every Status_Updates row crosses into Python."""
+    cursor = conn.cursor()
+    cursor.execute(ROWS_SQL)
+
+    stages = {}
+    current = None
+    for issue_id, department_id, created_at, deadline, status, updated_at in cursor:
+        if issue_id != current:
+            current = issue_id
+            issue = stages[issue_id] = {"group": department_id, "created": created_at, "deadline": deadline}
+        # Rows arrive in time order, so the first one per status is the earliest
+        if status in ("Reported", "Assigned", "Resolved"):
+            issue.setdefault(status, updated_at)
+    cursor.close()
+
+    columns = {c: [] for c in resolution_stats.COLUMNS}
+    for issue in stages.values():
+        issue.setdefault("Reported", issue["created"])
+        columns["group_key"].append(float(issue["group"]))
+        for column, key in (
+            ("reported_at", "Reported"), ("assigned_at", "Assigned"),
+            ("resolved_at", "Resolved"), ("deadline_at", "deadline")
+        ):
+            value = issue.get(key)
+            columns[column].append(value.timestamp() if value else float("nan"))
+    return resolution_stats._summarise_python(columns)
+
+
+def bulk(conn):
+    cursor = conn.cursor()
+    columns = load_columns(cursor, BULK_SQL, (), 50000)
+    cursor.close()
+    return summarise(columns)
+
+
+def timed(label, fn, conn, repeat):
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        groups = fn(conn)
+        samples.append(time.perf_counter() - begin)
+    print(f"{label:<28}{min(samples):>10.2f} s   ({len(groups)} groups)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=3_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=Config.DB_HOST,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME
+    )
+
+    print(f"Populating Bench_Res_Updates with ~{args.updates:,} rows ...")
+    issues = populate(conn, args.updates)
+    print(f"{issues:,} issues; NumPy {'enabled' if resolution_stats.np else 'not installed'}")
+
+    timed("row by row", row_by_row, conn, args.repeat)
+    timed("bulk + arrays", bulk, conn, args.repeat)
+
+    if not args.keep:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE Bench_Res_Updates")
+        cursor.execute("DROP TABLE Bench_Res_Issues")
+        cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
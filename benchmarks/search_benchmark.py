@@ -0,0 +1,132 @@
+# benchmarks/search_benchmark.py
+"""
+Dashboard search: leading-wildcard LIKE vs the full-text path.
+
+Builds a scratch copy of the Issues search columns (Bench_Issues) with
+--rows rows in the database from config.py, then times both queries.
+
+    python -m benchmarks.search_benchmark --rows 1000000
+
+The scratch table is dropped afterwards unless --keep is given.
+"""
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from config import Config
+from utils.issue_search import boolean_query
+
+WORDS = [
+    "pothole", "garbage", "streetlight", "drainage", "water", "leakage",
+    "broken", "road", "sewer", "overflow", "park", "bench", "signal",
+    "footpath", "encroachment", "tree", "fallen", "wire", "noise", "dump",
+    "market", "school", "hospital", "bridge", "crack", "flooding", "stray",
+    "dogs", "mosquito", "toilet", "public", "bus", "stop", "shelter"
+]
+
+LIKE_SQL = """
+    SELECT issue_id, title FROM Bench_Issues
+    WHERE (title LIKE %s OR issue_id LIKE %s)
+    ORDER BY created_at DESC LIMIT 50
+"""
+
+FULLTEXT_SQL = """
+    SELECT issue_id, title,
+           MATCH(title, description) AGAINST (%s IN BOOLEAN MODE) AS relevance
+    FROM Bench_Issues
+    WHERE MATCH(title, description) AGAINST (%s IN BOOLEAN MODE)
+    ORDER BY relevance DESC, issue_id DESC LIMIT 50
+"""
+
+ID_SQL = "SELECT issue_id, title FROM Bench_Issues WHERE issue_id = %s"
+
+
+def sentence(n):
+    return " ".join(random.choice(WORDS) for _ in range(n))
+
+
+def populate(conn, rows, batch=5000):
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE IF EXISTS Bench_Issues")
+    cursor.execute("""
+        CREATE TABLE Bench_Issues (
+            issue_id    INT AUTO_INCREMENT PRIMARY KEY,
+            title       VARCHAR(255) NOT NULL,
+            description TEXT NOT NULL,
+            created_at  DATETIME NOT NULL
+        )
+    """)
+
+    start = datetime.now() - timedelta(days=365)
+    for offset in range(0, rows, batch):
+        cursor.executemany(
+            "INSERT INTO Bench_Issues (title, description, created_at) VALUES (%s,%s,%s)",
+            [
+                (sentence(4), sentence(25), start + timedelta(seconds=offset + i))
+                for i in range(min(batch, rows - offset))
+            ]
+        )
+        conn.commit()
+
+    cursor.execute("""
+        ALTER TABLE Bench_Issues
+        ADD FULLTEXT INDEX ft_bench_title_description (title, description)
+    """)
+    cursor.close()
+
+
+def timed(conn, sql, params, repeat):
+    cursor = conn.cursor()
+    samples = []
+    for _ in range(repeat):
+        begin = time.perf_counter()
+        cursor.execute(sql, params)
+        cursor.fetchall()
+        samples.append((time.perf_counter() - begin) * 1000)
+    cursor.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--keep", action="store_true")
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(
+        host=Config.DB_HOST,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=Config.DB_NAME
+    )
+
+    print(f"Populating Bench_Issues with {args.rows:,} rows ...")
+    populate(conn, args.rows)
+
+    print(f"{'term':<20}{'LIKE ms':>12}{'FULLTEXT ms':>14}")
+    for term in ["pothole", "broken road", "stree", "drain overflow", str(args.rows // 2)]:
+        like = f"%{term}%"
+        like_ms = timed(conn, LIKE_SQL, (like, like), args.repeat)
+
+        if term.isdigit():
+            fast_ms = timed(conn, ID_SQL, (int(term),), args.repeat)
+        else:
+            query = boolean_query(term)
+            fast_ms = timed(conn, FULLTEXT_SQL, (query, query), args.repeat)
+
+        print(f"{term:<20}{like_ms:>12.1f}{fast_ms:>14.1f}")
+
+    if not args.keep:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE Bench_Issues")
+        cursor.close()
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
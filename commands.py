@@ -0,0 +1,132 @@
+# commands.py
+import base64
+import hashlib
+import urllib.request
+
+import click
+
+from utils.db import get_db_connection
+from utils import status_counts, sla, rollups
+from utils.image_pipeline import Image
+from utils.issue_query import query_shapes, full_scans
+
+
+def register_commands(app):
+
+    # ---------------------------------
+    # flask rebuild-status-counts
+    # ---------------------------------
+    @app.cli.command("rebuild-status-counts")
+    def rebuild_status_counts():
+        """Rebuild Issue_Status_Counts from the Issues table."""
+        rows = status_counts.rebuild(get_db_connection())
+        click.echo(f"Issue_Status_Counts rebuilt ({rows} counter rows).")
+
+    # ---------------------------------
+    # flask process-images
+    # ---------------------------------
+    @app.cli.command("process-images")
+    def process_images():
+        """Drain Image_Jobs in the foreground (e.g. from cron)."""
+        if Image is None:
+            raise click.ClickException("Pillow is not installed.")
+
+        pipeline = app.extensions["image_pipeline"]
+        total = 0
+        while True:
+            handled = pipeline.process_pending()
+            if not handled:
+                break
+            total += handled
+        click.echo(f"Processed {total} image job(s).")
+
+    # ---------------------------------
+    # flask dispatch-notifications
+    # ---------------------------------
+    @app.cli.command("dispatch-notifications")
+    @click.option("--now", is_flag=True, help="Skip the coalescing hold.")
+    def dispatch_notifications(now):
+        """Deliver due Notification_Outbox messages in the foreground."""
+        dispatcher = app.extensions["notifications"]
+        total = 0
+        while True:
+            handled = dispatcher.dispatch_pending(hold=0 if now else None)
+            if not handled:
+                break
+            total += handled
+        click.echo(f"Dispatched {total} notification(s).")
+
+    # ---------------------------------
+    # flask explain-issue-queries
+    # ---------------------------------
+    @app.cli.command("explain-issue-queries")
+    @click.option("--search", default="road", help="Term for the full-text shapes.")
+    def explain_issue_queries(search):
+        """EXPLAIN every dashboard query shape and fail on full scans of Issues.
+
+        Meant for a database with production-like volume; on tiny tables
+        MySQL may prefer a scan regardless of the indexes.
+        """
+        cursor = get_db_connection().cursor(dictionary=True)
+        cursor.execute("""
+            SELECT state_id, city_id, ward_id, assigned_department,
+                   reported_by, current_status, created_at, issue_id
+            FROM Issues
+            ORDER BY issue_id DESC
+            LIMIT 1
+        """)
+        sample = cursor.fetchone()
+        if not sample:
+            raise click.ClickException("Issues is empty; nothing to EXPLAIN.")
+
+        checked, failures = 0, []
+        for description, sql, params in query_shapes(sample, search):
+            checked += 1
+            if full_scans(cursor, sql, params):
+                failures.append(description)
+
+        cursor.close()
+
+        for failure in failures:
+            click.echo(f"FULL SCAN  {failure}")
+        click.echo(f"{checked} queries checked, {len(failures)} full scan(s).")
+        if failures:
+            raise click.ClickException("Some query shapes scan all of Issues.")
+
+    # ---------------------------------
+    # flask check-deadlines
+    # ---------------------------------
+    @app.cli.command("check-deadlines")
+    @click.option("--full", is_flag=True, help="Ignore SLA_LOOKBACK_DAYS (catch-up after downtime).")
+    def check_deadlines(full):
+        """Escalate due-soon / overdue issues once (e.g. from cron)."""
+        escalated = sla.check_deadlines(app, full=full)
+        if escalated is None:
+            raise click.ClickException("Another deadline sweep is running.")
+        click.echo(f"Escalated {escalated} issue(s).")
+
+    # ---------------------------------
+    # flask rollup-issues / rebuild-rollups
+    # ---------------------------------
+    @app.cli.command("rollup-issues")
+    def rollup_issues():
+        """Fold queued Issue_Events into the daily rollups (e.g. from cron)."""
+        consumed = rollups.roll_up()
+        click.echo(f"Rolled up {consumed} issue event(s).")
+
+    @app.cli.command("rebuild-rollups")
+    def rebuild_rollups():
+        """Rebuild the daily rollups from Status_Updates and Issues."""
+        rows = rollups.rebuild(get_db_connection())
+        click.echo(f"Issue_Daily_Rollups rebuilt ({rows} rows).")
+
+    # ---------------------------------
+    # flask chartjs-integrity
+    # ---------------------------------
+    @app.cli.command("chartjs-integrity")
+    def chartjs_integrity():
+        """Print the SRI hash of CHARTJS_URL, for CHARTJS_INTEGRITY in config.py."""
+        url = app.config["CHARTJS_URL"]
+        with urllib.request.urlopen(url, timeout=30) as response:
+            digest = hashlib.sha384(response.read()).digest()
+        click.echo(f"CHARTJS_INTEGRITY = \"sha384-{base64.b64encode(digest).decode()}\"")
@@ -0,0 +1,32 @@
+-- migrations/001_issue_status_counts.sql
+-- Per-location, per-department issue counts by status.
+-- Maintained in the same transaction as every Issues status change
+-- (see utils/status_counts.py). Unset location/department ids are stored as 0.
+
+CREATE TABLE IF NOT EXISTS Issue_Status_Counts (
+    state_id      INT NOT NULL DEFAULT 0,
+    city_id       INT NOT NULL DEFAULT 0,
+    ward_id       INT NOT NULL DEFAULT 0,
+    department_id INT NOT NULL DEFAULT 0,
+    status        VARCHAR(20) NOT NULL,
+    total         INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (state_id, city_id, ward_id, department_id, status),
+    KEY idx_status_counts_city (city_id, status),
+    KEY idx_status_counts_ward (ward_id, status),
+    KEY idx_status_counts_department (department_id, status)
+);
+
+-- Backfill (same statement as `flask rebuild-status-counts`)
+DELETE FROM Issue_Status_Counts;
+
+INSERT INTO Issue_Status_Counts
+    (state_id, city_id, ward_id, department_id, status, total)
+SELECT
+    COALESCE(state_id, 0),
+    COALESCE(city_id, 0),
+    COALESCE(ward_id, 0),
+    COALESCE(assigned_department, 0),
+    current_status,
+    COUNT(*)
+FROM Issues
+GROUP BY 1, 2, 3, 4, 5;
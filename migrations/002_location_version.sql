@@ -0,0 +1,41 @@
+-- migrations/002_location_version.sql
+-- Single-row version stamp for the location hierarchy
+-- (States, Cities, Wards, Departments). Every worker caches the
+-- hierarchy in memory and reloads it when this number changes
+-- (see utils/locations.py). The triggers bump it on any edit,
+-- including manual SQL changes.
+
+CREATE TABLE IF NOT EXISTS Location_Version (
+    id      TINYINT PRIMARY KEY DEFAULT 1,
+    version BIGINT NOT NULL DEFAULT 1
+);
+
+INSERT IGNORE INTO Location_Version (id, version) VALUES (1, 1);
+
+CREATE TRIGGER trg_states_ins AFTER INSERT ON States
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_states_upd AFTER UPDATE ON States
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_states_del AFTER DELETE ON States
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+
+CREATE TRIGGER trg_cities_ins AFTER INSERT ON Cities
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_cities_upd AFTER UPDATE ON Cities
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_cities_del AFTER DELETE ON Cities
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+
+CREATE TRIGGER trg_wards_ins AFTER INSERT ON Wards
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_wards_upd AFTER UPDATE ON Wards
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_wards_del AFTER DELETE ON Wards
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+
+CREATE TRIGGER trg_departments_ins AFTER INSERT ON Departments
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_departments_upd AFTER UPDATE ON Departments
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
+CREATE TRIGGER trg_departments_del AFTER DELETE ON Departments
+    FOR EACH ROW UPDATE Location_Version SET version = version + 1 WHERE id = 1;
@@ -0,0 +1,6 @@
+-- migrations/003_issues_fulltext.sql
+-- Full-text index used by the dashboard search box (utils/issue_search.py)
+-- in place of the leading-wildcard LIKE over title / issue_id.
+
+ALTER TABLE Issues
+    ADD FULLTEXT INDEX ft_issues_title_description (title, description);
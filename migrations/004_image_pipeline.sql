@@ -0,0 +1,21 @@
+-- migrations/004_image_pipeline.sql
+-- Background image processing (utils/image_pipeline.py).
+-- Issue_Images gains the generated variants; Image_Jobs is the work queue,
+-- written in the same transaction as the issue and its images.
+
+ALTER TABLE Issue_Images
+    ADD COLUMN thumb_file   VARCHAR(255) NULL,
+    ADD COLUMN web_file     VARCHAR(255) NULL,
+    ADD COLUMN processed_at DATETIME NULL;
+
+CREATE TABLE IF NOT EXISTS Image_Jobs (
+    job_id     BIGINT AUTO_INCREMENT PRIMARY KEY,
+    image_id   INT NOT NULL,
+    status     ENUM('pending', 'running', 'done', 'failed') NOT NULL DEFAULT 'pending',
+    attempts   TINYINT NOT NULL DEFAULT 0,
+    last_error VARCHAR(255) NULL,
+    created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_image_jobs_status (status, updated_at),
+    FOREIGN KEY (image_id) REFERENCES Issue_Images(image_id)
+);
@@ -0,0 +1,7 @@
+-- migrations/005_issue_images_file_index.sql
+-- Uploads are now stored by content hash (utils/upload_store.py), so several
+-- Issue_Images rows can point at the same file. The index lets a new row
+-- reuse the variants already generated for that file.
+
+ALTER TABLE Issue_Images
+    ADD INDEX idx_issue_images_file (image_file);
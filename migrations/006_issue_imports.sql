@@ -0,0 +1,20 @@
+-- migrations/006_issue_imports.sql
+-- Bulk offline intake (issues.import_issues). Each upload is recorded in
+-- Issue_Imports and every issue it created points back to it, so assisted
+-- paper reports stay traceable to the facilitator/admin and file.
+
+CREATE TABLE IF NOT EXISTS Issue_Imports (
+    import_id     INT AUTO_INCREMENT PRIMARY KEY,
+    imported_by   INT NOT NULL,
+    file_name     VARCHAR(255) NOT NULL,
+    rows_total    INT NOT NULL DEFAULT 0,
+    rows_imported INT NOT NULL DEFAULT 0,
+    rows_failed   INT NOT NULL DEFAULT 0,
+    created_at    DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (imported_by) REFERENCES Users(user_id)
+);
+
+ALTER TABLE Issues
+    ADD COLUMN import_id INT NULL,
+    ADD INDEX idx_issues_import (import_id),
+    ADD FOREIGN KEY (import_id) REFERENCES Issue_Imports(import_id);
@@ -0,0 +1,28 @@
+-- migrations/007_issue_scope_indexes.sql
+-- Composite indexes for the role-scoped dashboard queries built by
+-- utils/issue_query.py. Each leads with the scope column and ends with
+-- created_at, so a page is read in index order (InnoDB appends issue_id,
+-- the keyset tie-breaker) instead of filesorting the whole scope.
+-- `flask explain-issue-queries` reports any query shape still doing a full scan.
+
+ALTER TABLE Issues
+    -- facilitator / field_staff / citizen (ward branch)
+    ADD INDEX idx_issues_ward_created (ward_id, created_at),
+    ADD INDEX idx_issues_ward_status_created (ward_id, current_status, created_at),
+
+    -- municipal_admin, with and without the status dropdown
+    ADD INDEX idx_issues_city_created (city_id, created_at),
+    ADD INDEX idx_issues_city_status_created (city_id, current_status, created_at),
+
+    -- state filter (super_admin / state_admin dropdowns)
+    ADD INDEX idx_issues_state_created (state_id, created_at),
+
+    -- department_admin
+    ADD INDEX idx_issues_department_status (assigned_department, current_status, created_at),
+
+    -- citizen (own-issues branch of the OR)
+    ADD INDEX idx_issues_reporter_created (reported_by, created_at),
+
+    -- unscoped listing, optionally by status
+    ADD INDEX idx_issues_status_created (current_status, created_at),
+    ADD INDEX idx_issues_created (created_at);
@@ -0,0 +1,21 @@
+-- migrations/008_notification_outbox.sql
+-- Transactional outbox for SMS / email notifications (utils/notifications.py).
+-- Rows are written in the same transaction as the status change; a
+-- background dispatcher delivers them, so gateways never block a request.
+
+CREATE TABLE IF NOT EXISTS Notification_Outbox (
+    message_id      BIGINT AUTO_INCREMENT PRIMARY KEY,
+    channel         ENUM('sms', 'email') NOT NULL,
+    recipient       VARCHAR(255) NOT NULL,
+    issue_id        INT NULL,
+    subject         VARCHAR(255) NOT NULL,
+    body            TEXT NOT NULL,
+    status          ENUM('pending', 'sending', 'sent', 'coalesced', 'failed') NOT NULL DEFAULT 'pending',
+    attempts        TINYINT NOT NULL DEFAULT 0,
+    last_error      VARCHAR(255) NULL,
+    next_attempt_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    created_at      DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at      DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    KEY idx_outbox_due (status, next_attempt_at),
+    FOREIGN KEY (issue_id) REFERENCES Issues(issue_id)
+);
@@ -0,0 +1,31 @@
+-- migrations/009_issue_versions.sql
+-- Change stamps for conditional GETs on the issue list (utils/conditional.py).
+-- One row for all issues plus one per city and per ward; triggers bump
+-- every row an insert or update touches (old and new location), so a
+-- dashboard can be revalidated with a single primary-key lookup.
+
+CREATE TABLE IF NOT EXISTS Issue_Versions (
+    scope_key  VARCHAR(32) PRIMARY KEY,          -- 'all', 'city:<id>', 'ward:<id>'
+    version    BIGINT NOT NULL DEFAULT 1,
+    updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+INSERT IGNORE INTO Issue_Versions (scope_key) VALUES ('all');
+
+CREATE TRIGGER trg_issues_version_ins AFTER INSERT ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Versions (scope_key) VALUES
+        ('all'),
+        (CONCAT('city:', COALESCE(NEW.city_id, 0))),
+        (CONCAT('ward:', COALESCE(NEW.ward_id, 0)))
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+CREATE TRIGGER trg_issues_version_upd AFTER UPDATE ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Versions (scope_key) VALUES
+        ('all'),
+        (CONCAT('city:', COALESCE(OLD.city_id, 0))),
+        (CONCAT('ward:', COALESCE(OLD.ward_id, 0))),
+        (CONCAT('city:', COALESCE(NEW.city_id, 0))),
+        (CONCAT('ward:', COALESCE(NEW.ward_id, 0)))
+    ON DUPLICATE KEY UPDATE version = version + 1;
@@ -0,0 +1,28 @@
+-- migrations/010_sla_deadlines.sql
+-- Deadline / SLA tracking (utils/sla.py).
+-- The scheduler walks open issues by deadline in bounded batches, records
+-- one escalation per (issue, level) and keeps per city / department
+-- overdue totals so admins read breaches without scanning Issues.
+
+ALTER TABLE Issues
+    ADD INDEX idx_issues_deadline_status (deadline, current_status);
+
+-- Active escalations; rows are removed when the issue closes or its
+-- deadline / department changes, so a new deadline can escalate again.
+CREATE TABLE IF NOT EXISTS Issue_Escalations (
+    issue_id      INT NOT NULL,
+    level         ENUM('due_soon', 'overdue') NOT NULL,
+    deadline      DATETIME NOT NULL,
+    city_id       INT NOT NULL DEFAULT 0,
+    department_id INT NOT NULL DEFAULT 0,
+    escalated_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (issue_id, level),
+    FOREIGN KEY (issue_id) REFERENCES Issues(issue_id)
+);
+
+CREATE TABLE IF NOT EXISTS Issue_Overdue_Counts (
+    city_id       INT NOT NULL,      -- 0 = none
+    department_id INT NOT NULL,      -- 0 = unassigned
+    total         INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (city_id, department_id)
+);
@@ -0,0 +1,94 @@
+-- migrations/011_issue_rollups.sql
+-- Daily issue aggregates for the admin analytics charts (utils/rollups.py).
+-- Triggers on Issues append one row to Issue_Events per status or
+-- location / department / category change; a background job folds the
+-- queue into Issue_Daily_Rollups and Issue_Rollup_Totals and deletes what
+-- it consumed, so charts never group over Issues or Status_Updates.
+-- Unset ids are stored as 0, like Issue_Status_Counts.
+
+CREATE TABLE IF NOT EXISTS Issue_Events (
+    event_id      BIGINT AUTO_INCREMENT PRIMARY KEY,
+    event_date    DATE NOT NULL,
+    state_id      INT NOT NULL DEFAULT 0,
+    city_id       INT NOT NULL DEFAULT 0,
+    ward_id       INT NOT NULL DEFAULT 0,
+    department_id INT NOT NULL DEFAULT 0,
+    category      VARCHAR(50) NOT NULL DEFAULT '',
+    status        VARCHAR(20) NOT NULL,
+    entered       TINYINT NOT NULL DEFAULT 0,    -- 1 = the issue moved into `status`
+    net           TINYINT NOT NULL               -- +1 / -1 issues sitting in `status`
+);
+
+-- One row per day and key; `entered` gives the reported / assigned /
+-- resolved / rejected counts, `net` the day's change in each status.
+CREATE TABLE IF NOT EXISTS Issue_Daily_Rollups (
+    day           DATE NOT NULL,
+    state_id      INT NOT NULL DEFAULT 0,
+    city_id       INT NOT NULL DEFAULT 0,
+    ward_id       INT NOT NULL DEFAULT 0,
+    department_id INT NOT NULL DEFAULT 0,
+    category      VARCHAR(50) NOT NULL DEFAULT '',
+    status        VARCHAR(20) NOT NULL,
+    entered       INT NOT NULL DEFAULT 0,
+    net           INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, state_id, city_id, ward_id, department_id, category, status),
+    KEY idx_rollups_state_day (state_id, day),
+    KEY idx_rollups_city_day (city_id, day),
+    KEY idx_rollups_ward_day (ward_id, day),
+    KEY idx_rollups_department_day (department_id, day)
+);
+
+-- Issues currently in each status, as of the last rollup. Backlog on an
+-- earlier day is this total minus the `net` of the days after it.
+CREATE TABLE IF NOT EXISTS Issue_Rollup_Totals (
+    state_id      INT NOT NULL DEFAULT 0,
+    city_id       INT NOT NULL DEFAULT 0,
+    ward_id       INT NOT NULL DEFAULT 0,
+    department_id INT NOT NULL DEFAULT 0,
+    category      VARCHAR(50) NOT NULL DEFAULT '',
+    status        VARCHAR(20) NOT NULL,
+    total         INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (state_id, city_id, ward_id, department_id, category, status)
+);
+
+CREATE TRIGGER trg_issues_events_ins AFTER INSERT ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Events
+        (event_date, state_id, city_id, ward_id, department_id, category, status, entered, net)
+    VALUES (
+        CURDATE(), COALESCE(NEW.state_id, 0), COALESCE(NEW.city_id, 0),
+        COALESCE(NEW.ward_id, 0), COALESCE(NEW.assigned_department, 0),
+        COALESCE(NEW.category, ''), NEW.current_status, 1, 1
+    );
+
+-- The issue leaves its old key and joins the new one; only a status
+-- change counts as "entered". Untouched rows (e.g. updated_at bumps) emit nothing.
+CREATE TRIGGER trg_issues_events_upd AFTER UPDATE ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Events
+        (event_date, state_id, city_id, ward_id, department_id, category, status, entered, net)
+    SELECT CURDATE(), COALESCE(OLD.state_id, 0), COALESCE(OLD.city_id, 0),
+           COALESCE(OLD.ward_id, 0), COALESCE(OLD.assigned_department, 0),
+           COALESCE(OLD.category, ''), OLD.current_status, 0, -1
+    FROM DUAL
+    WHERE NOT (NEW.current_status <=> OLD.current_status
+               AND NEW.state_id <=> OLD.state_id
+               AND NEW.city_id <=> OLD.city_id
+               AND NEW.ward_id <=> OLD.ward_id
+               AND NEW.assigned_department <=> OLD.assigned_department
+               AND NEW.category <=> OLD.category)
+    UNION ALL
+    SELECT CURDATE(), COALESCE(NEW.state_id, 0), COALESCE(NEW.city_id, 0),
+           COALESCE(NEW.ward_id, 0), COALESCE(NEW.assigned_department, 0),
+           COALESCE(NEW.category, ''), NEW.current_status,
+           NOT (NEW.current_status <=> OLD.current_status), 1
+    FROM DUAL
+    WHERE NOT (NEW.current_status <=> OLD.current_status
+               AND NEW.state_id <=> OLD.state_id
+               AND NEW.city_id <=> OLD.city_id
+               AND NEW.ward_id <=> OLD.ward_id
+               AND NEW.assigned_department <=> OLD.assigned_department
+               AND NEW.category <=> OLD.category);
+
+-- Backfill: `flask rebuild-rollups` (utils/rollups.py) replays
+-- Status_Updates into the daily table and recounts the totals from Issues.
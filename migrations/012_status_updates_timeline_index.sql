@@ -0,0 +1,7 @@
+-- migrations/012_status_updates_timeline_index.sql
+-- Covering index for the per-issue stage timestamps read by
+-- utils/resolution_stats.py: MIN(updated_at) per (issue, status) comes
+-- straight from the index instead of the Status_Updates rows.
+
+ALTER TABLE Status_Updates
+    ADD INDEX idx_status_updates_issue_status (issue_id, status, updated_at);
@@ -0,0 +1,14 @@
+-- migrations/013_users_directory_indexes.sql
+-- Indexes for the paginated admin user directory (utils/user_directory.py).
+-- Pages are read in (created_at, user_id) order inside a state or city;
+-- InnoDB appends user_id to every secondary index, so each of these
+-- serves the keyset ORDER BY without a sort. Search is a prefix LIKE on
+-- mobile, email or name, served by the prefix indexes.
+
+ALTER TABLE Users
+    ADD INDEX idx_users_created (created_at),
+    ADD INDEX idx_users_state_created (state_id, created_at),
+    ADD INDEX idx_users_city_created (city_id, created_at),
+    ADD INDEX idx_users_mobile_prefix (mobile(10)),
+    ADD INDEX idx_users_email_prefix (email(32)),
+    ADD INDEX idx_users_name_prefix (name(32));
@@ -0,0 +1,28 @@
+-- migrations/014_issue_versions_without_global_row.sql
+-- Stop stamping the single 'all' row of Issue_Versions (migrations/009).
+-- Every issue write locked that one row until commit, so all transactions
+-- writing Issues (imports, SLA sweeps, assignments, new reports) queued
+-- behind each other. The whole-country stamp is now derived from the city
+-- rows (utils/conditional.py ALL_VERSION_SQL), which only contend within
+-- a city.
+
+DROP TRIGGER IF EXISTS trg_issues_version_ins;
+DROP TRIGGER IF EXISTS trg_issues_version_upd;
+
+CREATE TRIGGER trg_issues_version_ins AFTER INSERT ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Versions (scope_key) VALUES
+        (CONCAT('city:', COALESCE(NEW.city_id, 0))),
+        (CONCAT('ward:', COALESCE(NEW.ward_id, 0)))
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+CREATE TRIGGER trg_issues_version_upd AFTER UPDATE ON Issues
+    FOR EACH ROW
+    INSERT INTO Issue_Versions (scope_key) VALUES
+        (CONCAT('city:', COALESCE(OLD.city_id, 0))),
+        (CONCAT('ward:', COALESCE(OLD.ward_id, 0))),
+        (CONCAT('city:', COALESCE(NEW.city_id, 0))),
+        (CONCAT('ward:', COALESCE(NEW.ward_id, 0)))
+    ON DUPLICATE KEY UPDATE version = version + 1;
+
+DELETE FROM Issue_Versions WHERE scope_key = 'all';
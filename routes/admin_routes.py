@@ -1,7 +1,18 @@
 # routes/admin_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, current_app
 from utils.db import get_db_connection
 from utils.auth import login_required, role_required
+from utils.locations import hierarchy, location_json, to_id
+from utils.user_context import current_user_context
+from utils import sla, rollups, issue_tree, user_import
+from utils.resolution_stats import resolution_stats, GROUPINGS
+from utils.issue_scope import role_scope, apply_ui_filters
+from utils.user_directory import directory_scope, list_users, estimate_total
+from utils.pagination import DEFAULT_PAGE_SIZE, page_size_from, decode_cursor, split_page
+from utils.issue_export import export_query, ndjson_with_history, ISSUE_COLUMNS, HISTORY_COLUMNS
+from utils.streaming import ndjson_lines, csv_lines, stream_response, NDJSON_MIMETYPE, CSV_MIMETYPE
+from datetime import datetime
+import hashlib
 
 ROLE_PRIORITY = {
     "super_admin": 7,
@@ -24,87 +35,36 @@ admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 @role_required("super_admin", "state_admin", "municipal_admin")
 def filter_users():
 
-    current_user_id = session["user_id"]
     current_role = session["role"]
-    current_priority = ROLE_PRIORITY[current_role]
+    page_size = page_size_from(request.args.get("limit"))
 
-    ui_state_id = request.args.get("state_id")
-    ui_city_id = request.args.get("city_id")
-    ui_ward_id = request.args.get("ward_id")
-    search = request.args.get("search")
+    cursor_token = request.args.get("cursor")
+    after = None
+    if cursor_token:
+        try:
+            after = decode_cursor(cursor_token)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
+
+    # ---- PROFILE SCOPE (CACHED PER USER) ----
+    profile = current_user_context() or {}
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    # ---- GET PROFILE FROM DB ----
-    cursor.execute("""
-        SELECT state_id, city_id
-        FROM Users
-        WHERE user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
-
-    profile_state_id = profile.get("state_id")
-    profile_city_id = profile.get("city_id")
-
-    query = """
-        SELECT u.user_id, u.name, u.mobile, u.email, u.role,
-               u.verified, u.assisted_signup,
-               s.name AS state_name,
-               c.name AS city_name,
-               w.name AS ward_name
-        FROM Users u
-        LEFT JOIN States s ON u.state_id = s.state_id
-        LEFT JOIN Cities c ON u.city_id = c.city_id
-        LEFT JOIN Wards w ON u.ward_id = w.ward_id
-        WHERE 1=1
-    """
-    params = []
-
-    # ---- STRICT ROLE HIERARCHY ----
-    allowed_roles = [
-        role for role, priority in ROLE_PRIORITY.items()
-        if priority < current_priority
-    ]
-    query += " AND u.role IN (%s)" % ",".join(["%s"] * len(allowed_roles))
-    params.extend(allowed_roles)
-
-    # ---- HARD GEOGRAPHIC SCOPING ----
-    if current_role == "state_admin":
-        query += " AND u.state_id = %s"
-        params.append(profile_state_id)
-
-    elif current_role == "municipal_admin":
-        query += " AND u.city_id = %s"
-        params.append(profile_city_id)
-
-    # ---- UI FILTERS (WITHIN ALLOWED SCOPE) ----
-    if current_role == "super_admin" and ui_state_id:
-        query += " AND u.state_id = %s"
-        params.append(ui_state_id)
-
-    if ui_city_id:
-        query += " AND u.city_id = %s"
-        params.append(ui_city_id)
-
-    if ui_ward_id:
-        query += " AND u.ward_id = %s"
-        params.append(ui_ward_id)
-
-    if search:
-        like = f"%{search}%"
-        query += " AND (u.name LIKE %s OR u.mobile LIKE %s)"
-        params.extend([like, like])
-
-    query += " ORDER BY u.created_at ASC"
+    where, params = directory_scope(ROLE_PRIORITY, current_role, profile, request.args)
+    users, next_cursor = split_page(
+        list_users(cursor, where, params, after=after, limit=page_size + 1),
+        page_size, id_key="user_id"
+    )
 
-    cursor.execute(query, params)
-    users = cursor.fetchall()
+    # The total only accompanies the first page
+    total = None if after else estimate_total(cursor, where, params)
 
     cursor.close()
     conn.close()
 
-    return jsonify({"users": users})
+    return jsonify({"users": users, "next_cursor": next_cursor, "total": total})
 
 
 # ========================
@@ -115,19 +75,10 @@ def filter_users():
 def get_cities():
 
     role = session.get("role")
-    current_user_id = session.get("user_id")
     ui_state_id = request.args.get("state_id")
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch authoritative state from DB
-    cursor.execute("""
-        SELECT state_id
-        FROM Users
-        WHERE user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
+    # Authoritative state from the user's cached profile scope
+    profile = current_user_context() or {}
 
     profile_state_id = profile.get("state_id")
 
@@ -136,24 +87,11 @@ def get_cities():
     else:
         state_id = profile_state_id   # <-- FIX
 
-    if not state_id:
-        cursor.close()
-        conn.close()
-        return jsonify({"cities": []})
-
-    cursor.execute("""
-        SELECT city_id, name
-        FROM Cities
-        WHERE state_id = %s
-        ORDER BY name
-    """, (state_id,))
-
-    cities = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return jsonify({"cities": cities})
+    state_id = to_id(state_id)
+    return location_json(
+        f"cities-{state_id}",
+        lambda h: {"cities": h.cities_in_state(state_id)}
+    )
 
 
 # ========================
@@ -164,19 +102,10 @@ def get_cities():
 def get_wards():
 
     role = session.get("role")
-    current_user_id = session.get("user_id")
     ui_city_id = request.args.get("city_id")
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Get authoritative city from DB
-    cursor.execute("""
-        SELECT city_id
-        FROM Users
-        WHERE user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
+    # Authoritative city from the user's cached profile scope
+    profile = current_user_context() or {}
 
     profile_city_id = profile.get("city_id")
 
@@ -189,23 +118,11 @@ def get_wards():
     elif role == "municipal_admin":
         city_id = profile_city_id   # <-- FIXED
 
-    if not city_id:
-        cursor.close()
-        conn.close()
-        return jsonify({"wards": []})
-
-    cursor.execute("""
-        SELECT ward_id, name
-        FROM Wards
-        WHERE city_id = %s
-        ORDER BY name
-    """, (city_id,))
-
-    wards = cursor.fetchall()
-    cursor.close()
-    conn.close()
-
-    return jsonify({"wards": wards})
+    city_id = to_id(city_id)
+    return location_json(
+        f"wards-{city_id}",
+        lambda h: {"wards": h.wards_in_city(city_id)}
+    )
 
 
 # ========================
@@ -215,20 +132,11 @@ def get_wards():
 @login_required
 def get_departments():
 
-    current_user_id = session.get("user_id")
     role = session.get("role")
     ui_city_id = request.args.get("city_id")
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch authoritative city/state from DB
-    cursor.execute("""
-        SELECT state_id, city_id
-        FROM Users
-        WHERE user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
+    # Authoritative city/state from the user's cached profile scope
+    profile = current_user_context() or {}
 
     profile_state_id = profile.get("state_id")
     profile_city_id = profile.get("city_id")
@@ -236,42 +144,101 @@ def get_departments():
     city_id = None
 
     if role == "super_admin":
-        city_id = ui_city_id
+        city_id = to_id(ui_city_id)
 
     elif role == "state_admin":
-        city_id = ui_city_id
+        city_id = to_id(ui_city_id)
 
         # Validate city belongs to their state
-        if city_id:
-            cursor.execute("""
-                SELECT 1 FROM Cities
-                WHERE city_id=%s AND state_id=%s
-            """, (city_id, profile_state_id))
-            if not cursor.fetchone():
-                cursor.close()
-                conn.close()
-                return jsonify({"departments": []})
+        if city_id and not hierarchy().city_in_state(city_id, profile_state_id):
+            city_id = None
 
     elif role == "municipal_admin":
         city_id = profile_city_id
 
-    if not city_id:
-        cursor.close()
-        conn.close()
-        return jsonify({"departments": []})
+    return location_json(
+        f"departments-{city_id}",
+        lambda h: {"departments": h.departments_in_city(city_id)}
+    )
 
-    cursor.execute("""
-        SELECT department_id, name
-        FROM Departments
-        WHERE city_id=%s
-        ORDER BY name
-    """, (city_id,))
-    departments = cursor.fetchall()
+# ========================
+# LOCATION TYPE-AHEAD (AJAX)
+# ========================
+@admin_bp.route("/locations/search")
+@login_required
+def search_locations():
 
-    cursor.close()
-    conn.close()
+    role = session.get("role")
+    q = request.args.get("q", "")
+    kind = request.args.get("kind")
+    kinds = (kind,) if kind in ("city", "ward") else ("city", "ward")
+    limit = max(1, min(to_id(request.args.get("limit")) or 20, 50))
+
+    # Authoritative scope from the user's cached profile
+    profile = current_user_context() or {}
+
+    if role == "super_admin":
+        scope, scope_tag = None, "all"
+    elif role == "state_admin":
+        scope = ("state", profile.get("state_id"))
+        scope_tag = f"state{scope[1]}"
+    else:
+        scope = ("city", profile.get("city_id"))
+        scope_tag = f"city{scope[1]}"
+
+    query_key = hashlib.sha1(q.strip().casefold().encode()).hexdigest()[:12]
+    return location_json(
+        f"search-{scope_tag}-{'-'.join(kinds)}-{limit}-{query_key}",
+        lambda h: {"results": h.search(q, kinds, scope, limit)}
+    )
+
+
+# ========================
+# EXPORT ISSUES (STREAMED CSV / NDJSON)
+# ========================
+@admin_bp.route("/issues/export")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def export_issues():
+
+    current_user_id = session["user_id"]
+    current_role = session["role"]
+
+    export_format = request.args.get("format", "csv")
+    with_history = request.args.get("history") == "1"
+
+    if export_format not in ("csv", "ndjson"):
+        return jsonify({"error": "format must be csv or ndjson"}), 400
+
+    # ---- SAME SCOPING AS THE ISSUES DASHBOARD ----
+    profile = current_user_context() or {}
+
+    scope = apply_ui_filters(
+        role_scope(current_role, current_user_id, profile), request.args
+    )
+
+    # Unbuffered cursor: rows are read from MySQL as the response is written
+    stream_cursor = get_db_connection().cursor(dictionary=True)
+    stream_cursor.execute(export_query(scope.where, with_history), scope.params)
+
+    if export_format == "ndjson":
+        if with_history:
+            chunks = ndjson_with_history(stream_cursor)
+        else:
+            chunks = ndjson_lines(stream_cursor)
+        mimetype, extension = NDJSON_MIMETYPE, "ndjson"
+    else:
+        columns = ISSUE_COLUMNS + (HISTORY_COLUMNS if with_history else [])
+        chunks = csv_lines(stream_cursor, columns)
+        mimetype, extension = CSV_MIMETYPE, "csv"
+
+    filename = f"issues-{datetime.now():%Y%m%d-%H%M}.{extension}"
+    return stream_response(
+        chunks,
+        mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
 
-    return jsonify({"departments": departments})
 
 # ========================
 # ADMIN DASHBOARD
@@ -283,73 +250,276 @@ def admin_dashboard():
     if not session.get("user_id"):
         flash("Please login first using OTP.", "warning")
         return redirect(url_for("otp.request_otp"))
-    return render_template("admin/admin_dashboard.html", role=session["role"])
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    breaches = overdue_breakdown(cursor, session["role"], current_user_context() or {})
+    cursor.close()
+    conn.close()
+
+    return render_template(
+        "admin/admin_dashboard.html",
+        role=session["role"],
+        breaches=breaches
+    )
+
 
 # ========================
-# VIEW USERS
+# SLA BREACHES (PRECOMPUTED OVERDUE COUNTS)
 # ========================
-@admin_bp.route("/users")
+def overdue_breakdown(cursor, role, profile):
+    """
+    Overdue issues per city (super / state admin) or per department
+    (municipal admin), read from Issue_Overdue_Counts.
+    """
+    locations = hierarchy()
+
+    if role == "municipal_admin":
+        departments = {
+            d["department_id"]: d["name"]
+            for d in locations.departments_in_city(profile.get("city_id"))
+        }
+        counts = sla.overdue_by_department(cursor, profile.get("city_id"))
+        rows = [
+            {"id": dept_id, "name": departments.get(dept_id, "Unassigned"), "overdue": total}
+            for dept_id, total in counts.items()
+        ]
+
+    else:
+        city_ids = None
+        if role == "state_admin":
+            city_ids = [c["city_id"] for c in locations.cities_in_state(profile.get("state_id"))]
+        counts = sla.overdue_by_city(cursor, city_ids)
+        rows = [
+            {
+                "id": city_id,
+                "name": locations.cities.get(city_id, {}).get("name", "Unknown"),
+                "overdue": total
+            }
+            for city_id, total in counts.items()
+        ]
+
+    rows.sort(key=lambda r: r["overdue"], reverse=True)
+    return {"rows": rows, "total": sum(r["overdue"] for r in rows)}
+
+
+@admin_bp.route("/sla/overdue")
 @login_required
 @role_required("super_admin", "state_admin", "municipal_admin")
-def view_users():
+def sla_overdue():
 
-    current_user_id = session["user_id"]
-    current_role = session["role"]
-    current_priority = ROLE_PRIORITY[current_role]
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    breaches = overdue_breakdown(cursor, session["role"], current_user_context() or {})
+    cursor.close()
+    conn.close()
+
+    return jsonify(breaches)
+
+
+# ========================
+# ANALYTICS (DAILY ROLLUPS)
+# ========================
+def analytics_filters(role, profile, args):
+    """Rollup filters: the admin's own state / city, narrowed by the chart dropdowns."""
+    filters = {}
+    if role == "state_admin":
+        filters["state_id"] = profile.get("state_id")
+    elif role == "municipal_admin":
+        filters["city_id"] = profile.get("city_id")
+
+    for key in ("state_id", "city_id", "ward_id", "department_id"):
+        value = to_id(args.get(key))
+        if value is not None and key not in filters:
+            filters[key] = value
+
+    if args.get("category"):
+        filters["category"] = args["category"]
+    return filters
+
+
+def analytics_days(args):
+    days = to_id(args.get("days")) or 30
+    return max(1, min(days, current_app.config["ROLLUP_MAX_DAYS"]))
+
+
+def _group_name(locations, by, key):
+    if by == "state":
+        return locations.states_by_id.get(key, {}).get("name", "Unknown")
+    if by == "city":
+        return locations.cities.get(key, {}).get("name", "Unknown")
+    if by == "ward":
+        return locations.wards.get(key, {}).get("name", "Unknown")
+    if by == "department":
+        for departments in locations.departments_by_city.values():
+            for d in departments:
+                if d["department_id"] == key:
+                    return d["name"]
+        return "Unassigned"
+    return key or "Unknown"
+
+
+@admin_bp.route("/analytics/daily")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def analytics_daily():
+
+    filters = analytics_filters(session["role"], current_user_context() or {}, request.args)
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
+    series = rollups.daily_series(cursor, filters, analytics_days(request.args))
+    cursor.close()
+    conn.close()
 
-    # ---- GET AUTHORITATIVE PROFILE CONTEXT FROM DB ----
-    cursor.execute("""
-        SELECT state_id, city_id
-        FROM Users
-        WHERE user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
+    return jsonify(series)
 
-    profile_state_id = profile.get("state_id")
-    profile_city_id = profile.get("city_id")
 
-    # ---- BASE QUERY ----
-    query = """
-        SELECT u.user_id, u.name, u.mobile, u.email, u.role,
-               u.verified, u.assisted_signup, u.created_at,
-               s.name AS state_name,
-               c.name AS city_name,
-               w.name AS ward_name
-        FROM Users u
-        LEFT JOIN States s ON u.state_id = s.state_id
-        LEFT JOIN Cities c ON u.city_id = c.city_id
-        LEFT JOIN Wards w ON u.ward_id = w.ward_id
-        WHERE 1=1
-    """
-    params = []
+@admin_bp.route("/analytics/breakdown")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def analytics_breakdown():
 
-    # ---- STRICT ROLE HIERARCHY ----
-    allowed_roles = [
-        role for role, priority in ROLE_PRIORITY.items()
-        if priority < current_priority
+    by = request.args.get("by", "category")
+    if by not in rollups.BREAKDOWNS:
+        return jsonify({"error": "by must be one of " + ", ".join(rollups.BREAKDOWNS)}), 400
+
+    filters = analytics_filters(session["role"], current_user_context() or {}, request.args)
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    rows = rollups.breakdown(cursor, filters, by, analytics_days(request.args))
+    cursor.close()
+    conn.close()
+
+    locations = hierarchy()
+    for row in rows:
+        row["name"] = _group_name(locations, by, row["key"])
+
+    return jsonify({"by": by, "rows": rows})
+
+
+@admin_bp.route("/analytics/resolution")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def analytics_resolution():
+
+    by = request.args.get("by", "department")
+    if by not in GROUPINGS:
+        return jsonify({"error": "by must be one of " + ", ".join(GROUPINGS)}), 400
+
+    filters = analytics_filters(session["role"], current_user_context() or {}, request.args)
+    days = analytics_days(request.args)
+
+    # Copies: the cached groups are shared between requests
+    groups = [dict(g) for g in resolution_stats(by, filters, days)]
+
+    locations = hierarchy()
+    for group in groups:
+        group["name"] = _group_name(locations, by, group["key"])
+
+    return jsonify({"by": by, "days": days, "groups": groups})
+
+
+# ========================
+# DRILL-DOWN (IN-MEMORY STATE → CITY → WARD TREE)
+# ========================
+TREE_LEVELS = ("all", "state", "city", "ward")
+
+
+def tree_root(role, profile):
+    """Highest node an admin may see."""
+    if role == "state_admin":
+        return "state", profile.get("state_id")
+    if role == "municipal_admin":
+        return "city", profile.get("city_id")
+    return "all", None
+
+
+def tree_allowed(locations, role, profile, level, node_id):
+    if role == "super_admin":
+        return True
+    if role == "state_admin":
+        state_id = profile.get("state_id")
+        if level == "state":
+            return node_id == state_id
+        if level == "city":
+            return locations.city_in_state(node_id, state_id)
+        if level == "ward":
+            ward = locations.wards.get(node_id)
+            return bool(ward) and locations.city_in_state(ward["city_id"], state_id)
+        return False
+    if role == "municipal_admin":
+        city_id = profile.get("city_id")
+        if level == "city":
+            return node_id == city_id
+        if level == "ward":
+            ward = locations.wards.get(node_id)
+            return bool(ward) and ward["city_id"] == city_id
+    return False
+
+
+@admin_bp.route("/analytics/tree")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def analytics_tree():
+
+    role = session["role"]
+    profile = current_user_context() or {}
+    locations = hierarchy()
+
+    level = request.args.get("level")
+    if level is None:
+        level, node_id = tree_root(role, profile)
+    else:
+        node_id = to_id(request.args.get("id"))
+
+    if level not in TREE_LEVELS:
+        return jsonify({"error": "level must be one of " + ", ".join(TREE_LEVELS)}), 400
+    if not tree_allowed(locations, role, profile, level, node_id):
+        return jsonify({"error": "Outside your jurisdiction"}), 403
+
+    counts, children = issue_tree.drill_down(level, node_id)
+
+    rows = [
+        {"level": child_level, "id": child_id,
+         "name": _group_name(locations, child_level, child_id),
+         **issue_tree.summary(child_counts)}
+        for child_level, child_id, child_counts in children
     ]
-    query += " AND u.role IN (%s)" % ",".join(["%s"] * len(allowed_roles))
-    params.extend(allowed_roles)
+    rows.sort(key=lambda r: r["open"], reverse=True)
 
-    # ---- GEOGRAPHIC HARD SCOPING ----
-    if current_role == "state_admin":
-        query += " AND u.state_id = %s"
-        params.append(profile_state_id)
+    return jsonify({
+        "level": level,
+        "id": node_id,
+        "name": "All states" if level == "all" else _group_name(locations, level, node_id),
+        **issue_tree.summary(counts),
+        "children": rows
+    })
+
+# ========================
+# VIEW USERS
+# ========================
+@admin_bp.route("/users")
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def view_users():
 
-    elif current_role == "municipal_admin":
-        query += " AND u.city_id = %s"
-        params.append(profile_city_id)
+    current_role = session["role"]
 
-    query += " ORDER BY u.created_at ASC"
+    # ---- AUTHORITATIVE PROFILE CONTEXT (CACHED PER USER) ----
+    profile = current_user_context() or {}
 
-    cursor.execute(query, params)
-    users = cursor.fetchall()
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
-    cursor.execute("SELECT state_id, name FROM States ORDER BY name")
-    states = cursor.fetchall()
+    # ---- FIRST PAGE; THE REST ARRIVES THROUGH filter_users ----
+    where, params = directory_scope(ROLE_PRIORITY, current_role, profile, {})
+    users, next_cursor = split_page(
+        list_users(cursor, where, params, limit=DEFAULT_PAGE_SIZE + 1),
+        DEFAULT_PAGE_SIZE, id_key="user_id"
+    )
+    total = estimate_total(cursor, where, params)
 
     cursor.close()
     conn.close()
@@ -357,11 +527,13 @@ def view_users():
     return render_template(
         "admin/user.html",
         users=users,
-        states=states,
+        next_cursor=next_cursor,
+        total=total,
+        states=hierarchy().states,
         role=current_role,
         profile_location={
-            "state_id": profile_state_id,
-            "city_id": profile_city_id
+            "state_id": profile.get("state_id"),
+            "city_id": profile.get("city_id")
         }
     )
 
@@ -374,84 +546,25 @@ def view_users():
 @role_required("super_admin", "state_admin", "municipal_admin")
 def create_user():
 
-    current_user_id = session["user_id"]
     current_role = session["role"]
     current_priority = ROLE_PRIORITY[current_role]
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # ---- GET CREATOR PROFILE FROM DB (AUTHORITATIVE) ----
-    cursor.execute("""
-    SELECT 
-        u.state_id,
-        u.city_id,
-        s.name AS state_name,
-        c.name AS city_name
-    FROM Users u
-    LEFT JOIN States s ON u.state_id = s.state_id
-    LEFT JOIN Cities c ON u.city_id = c.city_id
-    WHERE u.user_id = %s
-    """, (current_user_id,))
-    profile = cursor.fetchone() or {}
-
+    # ---- CREATOR PROFILE (CACHED PER USER, AUTHORITATIVE) ----
+    profile = current_user_context() or {}
 
     profile_state_id = profile.get("state_id")
     profile_city_id = profile.get("city_id")
 
-    profile_state_name = profile.get("state_name")
-    profile_city_name = profile.get("city_name")
-
 
-    # ---- GET MASTER DATA ----
-    cursor.execute("SELECT state_id, name FROM States ORDER BY name")
-    states = cursor.fetchall()
+    # ---- MASTER DATA (IN-PROCESS LOCATION CACHE) ----
+    locations = hierarchy()
 
-    # ---- LOAD CITIES BASED ON ROLE ----
-    if current_role == "super_admin":
-        cursor.execute("SELECT city_id, name, state_id FROM Cities ORDER BY name")
-        cities = cursor.fetchall()
+    profile_state_name = locations.states_by_id.get(profile_state_id, {}).get("name")
+    profile_city_name = locations.cities.get(profile_city_id, {}).get("name")
 
-    elif current_role == "state_admin":
-        cursor.execute("""
-            SELECT city_id, name, state_id
-            FROM Cities
-            WHERE state_id = %s
-            ORDER BY name
-        """, (profile_state_id,))
-        cities = cursor.fetchall()
-
-    elif current_role == "municipal_admin":
-        cursor.execute("""
-            SELECT city_id, name, state_id
-            FROM Cities
-            WHERE city_id = %s
-        """, (profile_city_id,))
-        cities = cursor.fetchall()
-
-    # ---- LOAD WARDS BASED ON ROLE ----
-    if current_role == "super_admin":
-        cursor.execute("SELECT ward_id, name, city_id FROM Wards ORDER BY name")
-        wards = cursor.fetchall()
-
-    elif current_role == "state_admin":
-        cursor.execute("""
-            SELECT w.ward_id, w.name, w.city_id
-            FROM Wards w
-            JOIN Cities c ON w.city_id = c.city_id
-            WHERE c.state_id = %s
-            ORDER BY w.name
-        """, (profile_state_id,))
-        wards = cursor.fetchall()
-
-    elif current_role == "municipal_admin":
-        cursor.execute("""
-            SELECT ward_id, name, city_id
-            FROM Wards
-            WHERE city_id = %s
-            ORDER BY name
-        """, (profile_city_id,))
-        wards = cursor.fetchall()
+    # Only a municipal admin's own wards are listed; everyone else
+    # picks a ward through the /locations/search type-ahead
+    wards = locations.wards_in_city(profile_city_id) if current_role == "municipal_admin" else []
 
 
     # ---- ALLOWED ROLES (STRICT HIERARCHY) ----
@@ -501,6 +614,8 @@ def create_user():
         ward_id = int(form_ward_id) if form_ward_id else None
 
         # ---- INSERT USER ----
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
         cursor.execute("""
             INSERT INTO Users (
                 name, email, mobile, password, role,
@@ -520,13 +635,8 @@ def create_user():
         flash("User created successfully.", "success")
         return redirect(url_for("admin.view_users"))
 
-    cursor.close()
-    conn.close()
-
     return render_template(
         "admin/admin_create_user.html",
-        states=states,
-        cities=cities,
         wards=wards,
         allowed_roles=allowed_roles,
         role=current_role,
@@ -538,3 +648,64 @@ def create_user():
         }
     )
 
+
+# ========================
+# BULK USER IMPORT (CSV)
+# ========================
+@admin_bp.route("/users/import", methods=["GET", "POST"])
+@login_required
+@role_required("super_admin", "state_admin", "municipal_admin")
+def import_users():
+
+    current_role = session["role"]
+    current_priority = ROLE_PRIORITY[current_role]
+
+    allowed_roles = [
+        role for role, priority in ROLE_PRIORITY.items()
+        if priority < current_priority
+    ]
+
+    if request.method == "GET":
+        return render_template(
+            "admin/user_import.html",
+            allowed_roles=allowed_roles,
+            report=None
+        )
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a CSV file to import.", "danger")
+        return redirect(url_for("admin.import_users"))
+
+    try:
+        rows = user_import.read_rows(upload)
+    except user_import.UserImportFormatError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("admin.import_users"))
+
+    # ---- CREATOR PROFILE (CACHED PER USER, AUTHORITATIVE) ----
+    profile = current_user_context() or {}
+
+    if (current_role == "state_admin" and not profile.get("state_id")) or \
+            (current_role == "municipal_admin" and not (profile.get("state_id") and profile.get("city_id"))):
+        flash("Your profile location is incomplete.", "danger")
+        return redirect(url_for("profile.update_profile"))
+
+    conn = get_db_connection()
+    report = user_import.import_users(
+        conn, rows, hierarchy(), current_role, profile, allowed_roles
+    )
+    conn.close()
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(report)
+
+    flash(
+        f"Created {report['created']} of {report['total']} users.",
+        "success" if not report["failed"] else "warning"
+    )
+    return render_template(
+        "admin/user_import.html",
+        allowed_roles=allowed_roles,
+        report=report
+    )
@@ -3,6 +3,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 from utils.db import get_db_connection
 from utils.auth import login_required
+from utils import user_context
 
 auth_bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -78,7 +79,8 @@ def login():
     cursor = conn.cursor(dictionary=True)
 
     cursor.execute("""
-        SELECT user_id, role, verified
+        SELECT user_id, role, verified,
+               state_id, city_id, ward_id, department_id
         FROM Users
         WHERE mobile=%s AND password=%s
     """, (mobile, password))
@@ -100,6 +102,9 @@ def login():
     session["user_id"] = user["user_id"]
     session["role"] = user["role"]
 
+    # Scope is read on every dashboard call; keep it in memory from here on
+    user_context.remember(user)
+
     flash("Login successful.", "success")
     return redirect(url_for("dashboard.dashboard"))
 
@@ -2,6 +2,14 @@
 from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, flash
 from utils.db import get_db_connection
 from utils.auth import login_required
+from utils.locations import hierarchy
+from utils.user_context import current_user_context
+from utils.issue_search import search_filter
+from utils.issue_scope import role_scope, apply_ui_filters
+from utils.issue_query import list_query, page_with_stats
+from utils.conditional import conditional_response, issue_list_etag
+from utils.streaming import ndjson_lines, stream_response, NDJSON_MIMETYPE
+from utils.pagination import DEFAULT_PAGE_SIZE, page_size_from, decode_cursor, split_page
 
 dashboard_bp = Blueprint("dashboard", __name__, url_prefix="/dashboard")
 
@@ -31,20 +39,10 @@ def issues_dashboard():
     user_id = session["user_id"]
     role = session["role"]
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
     # ---------------- USER CONTEXT ----------------
-    cursor.execute("""
-        SELECT state_id, city_id, ward_id, department_id
-        FROM Users
-        WHERE user_id=%s
-    """, (user_id,))
-    user = cursor.fetchone()
+    user = current_user_context()
 
     if not user:
-        cursor.close()
-        conn.close()
         flash("User context lost. Please login again.", "danger")
         return redirect(url_for("auth.login"))
 
@@ -54,75 +52,17 @@ def issues_dashboard():
         "ward_id": user.get("ward_id")
     }
 
-    # ---------------- STATES ----------------
-    cursor.execute("SELECT state_id, name FROM States ORDER BY name")
-    states = cursor.fetchall()
-
-    # ---------------- BASE WHERE ----------------
-    where = " WHERE 1=1 "
-    params = []
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
 
     # ---------------- ROLE SCOPING ----------------
-    if role == "citizen":
-        # Citizen sees their own issues + all issues in their ward
-        conditions = ["i.reported_by = %s"]
-        params.append(user_id)
-
-        if user.get("ward_id"):
-            conditions.append("i.ward_id = %s")
-            params.append(user["ward_id"])
-
-        where += " AND (" + " OR ".join(conditions) + ")"
-
-    elif role in ["facilitator", "field_staff"] and user.get("ward_id"):
-        where += " AND i.ward_id = %s"
-        params.append(user["ward_id"])
-
-    elif role == "municipal_admin" and user.get("city_id"):
-        where += " AND i.city_id = %s"
-        params.append(user["city_id"])
-
-    elif role == "department_admin" and user.get("department_id"):
-        where += " AND i.assigned_department = %s"
-        params.append(user["department_id"])
-
-    # ---------------- ISSUES QUERY ----------------
-    issues_query = f"""
-        SELECT
-            i.issue_id,
-            i.title,
-            i.current_status AS status,
-            i.deadline,
-            s.name AS state_name,
-            c.name AS city_name,
-            w.name AS ward_name
-        FROM Issues i
-        LEFT JOIN States s ON i.state_id = s.state_id
-        LEFT JOIN Cities c ON i.city_id = c.city_id
-        LEFT JOIN Wards w ON i.ward_id = w.ward_id
-        {where}
-        ORDER BY i.created_at ASC
-    """
-
-    cursor.execute(issues_query, params)
-    issues = cursor.fetchall()
-
-    # ---------------- STATS ----------------
-    stats_query = f"""
-        SELECT
-            COUNT(*) AS Total,
-            COALESCE(SUM(i.current_status='Reported'),0) AS Reported,
-            COALESCE(SUM(i.current_status='Assigned'),0) AS Assigned,
-            COALESCE(SUM(i.current_status='In Progress'),0) AS `In Progress`,
-            COALESCE(SUM(i.current_status='In Review'),0) AS `In Review`,
-            COALESCE(SUM(i.current_status='Resolved'),0) AS Resolved,
-            COALESCE(SUM(i.current_status='Rejected'),0) AS Rejected
-        FROM Issues i
-        {where}
-    """
-
-    cursor.execute(stats_query, params)
-    stats = cursor.fetchone()
+    scope = role_scope(role, user_id, user)
+
+    # ---------------- ISSUES + STATS ----------------
+    # Only the first page is rendered; the rest is fetched via filter_issues
+    rows, stats = page_with_stats(cursor, scope, limit=DEFAULT_PAGE_SIZE + 1)
+
+    issues, next_cursor = split_page(rows, DEFAULT_PAGE_SIZE)
 
     cursor.close()
     conn.close()
@@ -131,8 +71,9 @@ def issues_dashboard():
         "dashboard.html",
         role=role,
         issues=issues,
+        next_cursor=next_cursor,
         stats=stats,
-        states=states,
+        states=hierarchy().states,
         profile_location=profile_location
     )
 
@@ -146,109 +87,71 @@ def filter_issues():
     user_id = session.get("user_id")
     role = session.get("role")
 
-    state_id = request.args.get("state_id")
-    city_id = request.args.get("city_id")
-    ward_id = request.args.get("ward_id")
-    department_id = request.args.get("department_id")
-    status = request.args.get("status")
     search = request.args.get("search")
+    page_size = page_size_from(request.args.get("limit"))
+
+    # ?format=ndjson streams every matching row instead of one page
+    stream = request.args.get("format") == "ndjson"
+
+    cursor_token = request.args.get("cursor")
+    after = None
+    if cursor_token:
+        try:
+            after = decode_cursor(cursor_token)
+        except ValueError:
+            return jsonify({"error": "Invalid cursor"}), 400
 
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
     # ---------------- USER CONTEXT ----------------
-    cursor.execute("""
-        SELECT state_id, city_id, ward_id, department_id
-        FROM Users
-        WHERE user_id=%s
-    """, (user_id,))
-    user = cursor.fetchone() or {}
+    user = current_user_context() or {}
 
-    where = " WHERE 1=1 "
-    params = []
+    # ---------------- ROLE SCOPING + USER-APPLIED FILTERS ----------------
+    scope = apply_ui_filters(role_scope(role, user_id, user), request.args)
 
-    # ---------------- ROLE SCOPING ----------------
-    if role == "citizen":
-        # Own issues + ward issues
-        conditions = ["i.reported_by = %s"]
-        params.append(user_id)
-        if user.get("ward_id"):
-            conditions.append("i.ward_id = %s")
-            params.append(user["ward_id"])
-        where += " AND (" + " OR ".join(conditions) + ")"
-
-    elif role in ["facilitator", "field_staff"] and user.get("ward_id"):
-        where += " AND i.ward_id = %s"
-        params.append(user["ward_id"])
-
-    elif role == "municipal_admin" and user.get("city_id"):
-        where += " AND i.city_id = %s"
-        params.append(user["city_id"])
-
-    elif role == "department_admin" and user.get("department_id"):
-        where += " AND i.assigned_department = %s"
-        params.append(user["department_id"])
-
-    # ---------------- USER-APPLIED FILTERS ----------------
-    if state_id:
-        where += " AND i.state_id = %s"
-        params.append(state_id)
-    if city_id:
-        where += " AND i.city_id = %s"
-        params.append(city_id)
-    if ward_id:
-        where += " AND i.ward_id = %s"
-        params.append(ward_id)
-    if department_id:
-        where += " AND i.assigned_department = %s"
-        params.append(department_id)
-    if status:
-        where += " AND i.current_status = %s"
-        params.append(status)
-    if search:
-        like = f"%{search}%"
-        where += " AND (i.title LIKE %s OR i.issue_id LIKE %s)"
-        params.extend([like, like])
-
-    # ---------------- ISSUES ----------------
-    issues_query = f"""
-        SELECT
-            i.issue_id,
-            i.title,
-            i.current_status AS status,
-            i.deadline,
-            s.name AS state_name,
-            c.name AS city_name,
-            w.name AS ward_name
-        FROM Issues i
-        LEFT JOIN States s ON i.state_id = s.state_id
-        LEFT JOIN Cities c ON i.city_id = c.city_id
-        LEFT JOIN Wards w ON i.ward_id = w.ward_id
-        {where}
-        ORDER BY i.created_at DESC
-    """
-
-    cursor.execute(issues_query, params)
-    issues = cursor.fetchall()
-
-    # ---------------- STATS ----------------
-    stats_query = f"""
-        SELECT
-            COUNT(*) AS Total,
-            COALESCE(SUM(i.current_status='Reported'),0) AS Reported,
-            COALESCE(SUM(i.current_status='Assigned'),0) AS Assigned,
-            COALESCE(SUM(i.current_status='In Progress'),0) AS `In Progress`,
-            COALESCE(SUM(i.current_status='In Review'),0) AS `In Review`,
-            COALESCE(SUM(i.current_status='Resolved'),0) AS Resolved,
-            COALESCE(SUM(i.current_status='Rejected'),0) AS Rejected
-        FROM Issues i
-        {where}
-    """
-
-    cursor.execute(stats_query, params)
-    stats = cursor.fetchone()
+    # ---------------- SEARCH ----------------
+    # Numeric term -> issue ID lookup, otherwise full-text (ranked)
+    search_sql, search_params, rank_sql, rank_params = search_filter(search)
+    if search_sql:
+        scope.add_sql(search_sql, search_params)
+
+    # ---------------- ISSUES (ONE PAGE) ----------------
+    # Keyset on (relevance, issue_id) when ranked, else (created_at, issue_id)
+    sort_key = "relevance" if rank_sql else "created_at"
+
+    if after and isinstance(after[0], float) != bool(rank_sql):
+        cursor.close()
+        conn.close()
+        return jsonify({"error": "Cursor does not match this search"}), 400
+
+    if stream:
+        issues_query, page_params = list_query(scope, rank_sql, rank_params, after=after)
+        # Unbuffered cursor: rows are pulled from MySQL as they are written out
+        stream_cursor = conn.cursor(dictionary=True)
+        stream_cursor.execute(issues_query, page_params)
+        cursor.close()
+        return stream_response(ndjson_lines(stream_cursor), NDJSON_MIMETYPE)
+
+    def build():
+        # Stats cover the whole filtered set; later pages reuse the first ones
+        if after:
+            cursor.execute(*list_query(
+                scope, rank_sql, rank_params, after=after, limit=page_size + 1
+            ))
+            issues, next_cursor = split_page(cursor.fetchall(), page_size, sort_key=sort_key)
+            return jsonify({"issues": issues, "stats": None, "next_cursor": next_cursor})
+
+        # ---------------- FIRST PAGE + STATS ----------------
+        rows, stats = page_with_stats(cursor, scope, rank_sql, rank_params, limit=page_size + 1)
+        issues, next_cursor = split_page(rows, page_size, sort_key=sort_key)
+        return jsonify({"issues": issues, "stats": stats, "next_cursor": next_cursor})
+
+    # Pollers get 304 from one Issue_Versions lookup while nothing changed
+    etag, last_modified = issue_list_etag(cursor, scope, request.args)
+    response = conditional_response(etag, last_modified, build)
 
     cursor.close()
     conn.close()
 
-    return jsonify({"issues": issues, "stats": stats})
+    return response
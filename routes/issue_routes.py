@@ -1,17 +1,17 @@
 # routes/issue_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, session, flash
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash, jsonify, abort
 from utils.db import get_db_connection
 from utils.auth import login_required, role_required
-from werkzeug.utils import secure_filename
-import os
+from utils import status_counts, image_pipeline, upload_store, issue_import, notifications, issue_view, sla
+from utils.locations import hierarchy
+from utils.user_context import current_user_context
+from utils.conditional import conditional_response, issue_page_etag
 from datetime import datetime
 
 # -----------------------------
 # CONFIGURATION
 # -----------------------------
 issue_bp = Blueprint("issues", __name__, url_prefix="/issues")
-UPLOAD_FOLDER = "static/uploads"
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
 # -----------------------------
 # CREATE NEW ISSUE
@@ -38,12 +38,8 @@ def create_issue():
             flash("All required fields must be filled.", "danger")
             return redirect(url_for("issues.create_issue"))
 
-        # Fetch user location
-        cursor.execute(
-            "SELECT state_id, city_id, ward_id FROM Users WHERE user_id=%s",
-            (user_id,)
-        )
-        location = cursor.fetchone()
+        # User location (cached profile scope)
+        location = current_user_context()
 
         if not location or not all([
             location["state_id"],
@@ -73,6 +69,8 @@ def create_issue():
 
         issue_id = cursor.lastrowid
 
+        status_counts.record_new_issue(cursor, location)
+
         # Initial status entry
         cursor.execute("""
             INSERT INTO Status_Updates (issue_id, status, remarks, updated_by)
@@ -81,21 +79,29 @@ def create_issue():
 
         # Image uploads
         images = request.files.getlist("images")
+        has_images = False
         for img in images:
             if img and img.filename:
-                filename = secure_filename(img.filename)
-                filepath = os.path.join(UPLOAD_FOLDER, filename)
-                img.save(filepath)
+                # Named by content hash; identical photos share one file
+                filepath = upload_store.save_upload(img)
 
                 cursor.execute("""
                     INSERT INTO Issue_Images (issue_id, image_file, uploaded_by)
                     VALUES (%s,%s,%s)
                 """, (issue_id, filepath, user_id))
+                has_images = True
+
+        # Thumbnails / web variants are generated in the background
+        if has_images:
+            image_pipeline.enqueue_issue_images(cursor, issue_id)
 
         conn.commit()
         cursor.close()
         conn.close()
 
+        if has_images:
+            image_pipeline.notify()
+
         flash("Issue reported successfully!", "success")
         return redirect(url_for("dashboard.dashboard"))
 
@@ -105,50 +111,80 @@ def create_issue():
 
 
 
+# -----------------------------
+# BULK IMPORT (OFFLINE / ASSISTED REPORTS)
+# -----------------------------
+@issue_bp.route("/import", methods=["GET", "POST"])
+@login_required
+@role_required("facilitator", "municipal_admin")
+def import_issues():
+    role = session["role"]
+
+    if request.method == "GET":
+        return render_template(
+            "issue_import.html",
+            categories=issue_import.ISSUE_CATEGORIES,
+            report=None
+        )
+
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a CSV or JSON file to import.", "danger")
+        return redirect(url_for("issues.import_issues"))
+
+    try:
+        rows = issue_import.read_rows(upload)
+    except issue_import.ImportFormatError as e:
+        flash(str(e), "danger")
+        return redirect(url_for("issues.import_issues"))
+
+    user = current_user_context()
+
+    if not user or not user["city_id"] or (role == "facilitator" and not user["ward_id"]):
+        flash("Your location details are incomplete. Please update your profile.", "danger")
+        return redirect(url_for("profile.profile_page"))
+
+    conn = get_db_connection()
+    report = issue_import.import_issues(
+        conn, upload.filename, rows, hierarchy(), user, role
+    )
+    conn.close()
+
+    if request.accept_mimetypes.best == "application/json":
+        return jsonify(report)
+
+    flash(
+        f"Imported {report['imported']} of {report['total']} issues.",
+        "success" if not report["failed"] else "warning"
+    )
+    return render_template(
+        "issue_import.html",
+        categories=issue_import.ISSUE_CATEGORIES,
+        report=report
+    )
+
+
 # -----------------------------
 # ISSUE DETAIL
 # -----------------------------
 @issue_bp.route("/<int:issue_id>")
 @login_required
 def issue_detail(issue_id):
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    # Fetch issue with location names
-    cursor.execute("""
-        SELECT i.*, 
-               s.name AS state_name, 
-               c.name AS city_name, 
-               w.name AS ward_name
-        FROM Issues i
-        LEFT JOIN States s ON i.state_id = s.state_id
-        LEFT JOIN Cities c ON i.city_id = c.city_id
-        LEFT JOIN Wards w ON i.ward_id = w.ward_id
-        WHERE i.issue_id=%s
-    """, (issue_id,))
-    issue = cursor.fetchone()
-    if not issue:
-        cursor.close()
-        conn.close()
+    # One primary-key version lookup decides between 304, cache and a reload
+    version = issue_view.issue_version(issue_id)
+    if version is None:
         return "Issue not found", 404
 
-    # Fetch status timeline
-    cursor.execute("""
-        SELECT su.status, su.remarks, su.updated_at, u.name
-        FROM Status_Updates su
-        JOIN Users u ON su.updated_by = u.user_id
-        WHERE su.issue_id=%s
-        ORDER BY su.updated_at ASC
-    """, (issue_id,))
-    timeline = cursor.fetchall()
-
-    # Fetch images
-    cursor.execute("SELECT image_file AS file_path FROM Issue_Images WHERE issue_id=%s", (issue_id,))
-    images = cursor.fetchall()
+    def render():
+        # Cached per issue; a miss loads issue, timeline and images in one round trip
+        view = issue_view.issue_view(issue_id, version)
+        if not view:
+            abort(404)
+        return render_template("issue_detail.html", **view)
 
-    cursor.close()
-    conn.close()
-    return render_template("issue_detail.html", issue=issue, timeline=timeline, images=images)
+    return conditional_response(
+        issue_page_etag(issue_id, version), version[0], render
+    )
 
 
 # -----------------------------
@@ -165,18 +201,34 @@ def update_issue_status(issue_id):
     conn = get_db_connection()
     cursor = conn.cursor()
 
+    before = status_counts.lock_issue(cursor, issue_id)
+    if not before:
+        cursor.close()
+        conn.close()
+        return "Issue not found", 404
+
     cursor.execute("""
         UPDATE Issues SET current_status=%s, updated_at=NOW() WHERE issue_id=%s
     """, (new_status, issue_id))
 
+    status_counts.record_transition(cursor, before, status=new_status)
+
     cursor.execute("""
         INSERT INTO Status_Updates (issue_id, status, remarks, updated_by)
         VALUES (%s,%s,%s,%s)
     """, (issue_id, new_status, remarks, user_id))
 
+    # Closing an issue takes it out of the overdue counts
+    sla.refresh_issue(cursor, issue_id)
+
+    # Delivered by the background dispatcher once this commits
+    notifications.enqueue_status_change(cursor, issue_id, new_status, remarks)
+
     conn.commit()
     cursor.close()
     conn.close()
+    issue_view.invalidate(issue_id)
+    notifications.notify()
 
     flash("Issue status updated!", "success")
     return redirect(url_for("issues.issue_detail", issue_id=issue_id))
@@ -204,19 +256,36 @@ def assign_issue(issue_id):
         deadline = request.form.get("deadline")
         remarks = request.form.get("remarks")
 
+        before = status_counts.lock_issue(cursor, issue_id)
+
         cursor.execute("""
-            UPDATE Issues SET assigned_department=%s, deadline=%s, current_status='Assigned'
+            UPDATE Issues
+            SET assigned_department=%s, deadline=%s, current_status='Assigned', updated_at=NOW()
             WHERE issue_id=%s
         """, (department_id, deadline, issue_id))
 
+        status_counts.record_transition(
+            cursor, before, status="Assigned", department_id=int(department_id or 0)
+        )
+
         cursor.execute("""
             INSERT INTO Status_Updates (issue_id, status, remarks, updated_by)
             VALUES (%s,'Assigned',%s,%s)
         """, (issue_id, remarks, session["user_id"]))
 
+        # New deadline / department: re-evaluate escalations and overdue counts
+        sla.refresh_issue(cursor, issue_id)
+
+        # Reporter + department admins, delivered after commit
+        notifications.enqueue_status_change(cursor, issue_id, "Assigned", remarks)
+        if department_id:
+            notifications.enqueue_assignment(cursor, issue_id, department_id, deadline)
+
         conn.commit()
         cursor.close()
         conn.close()
+        issue_view.invalidate(issue_id)
+        notifications.notify()
         flash("Issue assigned successfully!", "success")
         return redirect(url_for("issues.issue_detail", issue_id=issue_id))
 
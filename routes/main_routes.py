@@ -1,6 +1,11 @@
 
-from flask import Blueprint, render_template
+import os
+from flask import Blueprint, render_template, send_from_directory, abort
 from utils.db import get_db_connection
+from utils import status_counts, upload_store
+
+# Content-addressed files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
 
 main_bp = Blueprint("main", __name__)
 
@@ -9,29 +14,17 @@ def home():
     conn = get_db_connection()
     cursor = conn.cursor(dictionary=True)
 
-    # Total Issues
-    cursor.execute("SELECT COUNT(*) AS total FROM Issues")
-    total_issues = cursor.fetchone()["total"]
+    # Counters are maintained alongside every issue write
+    stats = status_counts.status_totals(cursor)
 
-    # Resolved Issues
-    cursor.execute("SELECT COUNT(*) AS total FROM Issues WHERE current_status = 'Resolved'")
-    resolved_issues = cursor.fetchone()["total"]
+    total_issues = stats["Total"]
+    resolved_issues = stats["Resolved"]
 
     # In Progress Issues
-    cursor.execute("""
-        SELECT COUNT(*) AS total 
-        FROM Issues 
-        WHERE current_status IN ('Assigned', 'In Progress', 'In Review')
-    """)
-    in_progress_issues = cursor.fetchone()["total"]
+    in_progress_issues = stats["Assigned"] + stats["In Progress"] + stats["In Review"]
 
     # Pending Issues (Reported but not yet assigned)
-    cursor.execute("""
-        SELECT COUNT(*) AS total 
-        FROM Issues 
-        WHERE current_status = 'Reported'
-    """)
-    pending_issues = cursor.fetchone()["total"]
+    pending_issues = stats["Reported"]
 
     cursor.close()
     conn.close()
@@ -54,3 +47,23 @@ def home():
         active_rate=active_rate
     )
 
+
+# -----------------------------
+# UPLOADED FILES (CONTENT-ADDRESSED)
+# -----------------------------
+@main_bp.route("/uploads/<path:key>")
+def uploaded_file(key):
+    if upload_store.store_key(upload_store.path_for(key)) != key:
+        abort(404)
+
+    digest = os.path.splitext(key.rsplit("/", 1)[-1])[0]
+    response = send_from_directory(
+        upload_store.disk_path(upload_store.STORE_ROOT),
+        key,
+        max_age=IMMUTABLE_MAX_AGE,
+        conditional=True,
+        etag=digest
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
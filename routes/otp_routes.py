@@ -1,20 +1,12 @@
 # routes/otp_routes.py
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app
 from utils.db import get_db_connection
-from datetime import datetime, timedelta
-import random
+from utils import otp
 
 otp_bp = Blueprint("otp_bp", __name__)
 
 
-# ---------------------------------
-# OTP GENERATOR
-# ---------------------------------
-def generate_otp():
-    return str(random.randint(100000, 999999))
-
-
 # ---------------------------------
 # REQUEST OTP
 # ---------------------------------
@@ -32,31 +24,18 @@ def request_otp():
             flash("Mobile number is required.", "danger")
             return redirect(url_for("otp_bp.request_otp"))
 
-        otp_code = generate_otp()
-        expires_at = datetime.now() + timedelta(minutes=1)
-
-        conn = get_db_connection()
-        cursor = conn.cursor()
-
-        # enforce single active OTP
-        cursor.execute(
-            "DELETE FROM OTP_Verification WHERE mobile=%s",
-            (mobile,)
-        )
-
-        cursor.execute("""
-            INSERT INTO OTP_Verification (mobile, otp_code, expires_at)
-            VALUES (%s, %s, %s)
-        """, (mobile, otp_code, expires_at))
-
-        conn.commit()
-        cursor.close()
-        conn.close()
+        # Rate limited per mobile and per client before anything is stored
+        try:
+            otp_code = otp.generate_otp(mobile, otp.client_ip())
+        except otp.OTPRateLimited as e:
+            flash(str(e), "danger")
+            return redirect(url_for("otp_bp.request_otp"))
 
         session["otp_mobile"] = mobile
 
         # (DEV ONLY — replace with SMS in prod)
-        flash(f"Your OTP is {otp_code} (valid for 1 minute)", "success")
+        ttl = current_app.config["OTP_TTL"]
+        flash(f"Your OTP is {otp_code} (valid for {ttl} seconds)", "success")
 
         return redirect(url_for("otp_bp.verify_otp"))
 
@@ -82,40 +61,21 @@ def verify_otp():
             flash("OTP is required.", "danger")
             return redirect(url_for("otp_bp.verify_otp"))
 
-        conn = get_db_connection()
-        cursor = conn.cursor(dictionary=True)
-
-        cursor.execute("""
-            SELECT otp_code, expires_at
-            FROM OTP_Verification
-            WHERE mobile=%s
-            ORDER BY expires_at DESC
-            LIMIT 1
-        """, (mobile,))
+        # A valid OTP is consumed by the check itself
+        verified, reason = otp.verify_otp(mobile, otp_input, otp.client_key())
 
-        record = cursor.fetchone()
+        if reason == otp.RATE_LIMITED:
+            flash("Too many attempts. Please try again later.", "danger")
+            return redirect(url_for("otp_bp.verify_otp"))
 
-        if not record or datetime.now() > record["expires_at"]:
-            cursor.close()
-            conn.close()
+        if reason == otp.EXPIRED:
             flash("OTP expired. Please request a new one.", "danger")
             return redirect(url_for("otp_bp.request_otp"))
 
-        if otp_input != record["otp_code"]:
-            cursor.close()
-            conn.close()
+        if not verified:
             flash("Incorrect OTP.", "danger")
             return redirect(url_for("otp_bp.verify_otp"))
 
-        # OTP VALID → destroy it
-        cursor.execute(
-            "DELETE FROM OTP_Verification WHERE mobile=%s",
-            (mobile,)
-        )
-        conn.commit()
-        cursor.close()
-        conn.close()
-
         # -------------------------
         # PURPOSE HANDLING
         # -------------------------
@@ -1,7 +1,9 @@
 # routes/profile_routes.py
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session
 from utils.db import get_db_connection
 from utils.auth import login_required
+from utils.locations import hierarchy, location_json, to_id
+from utils import user_context
 
 profile_bp = Blueprint("profile", __name__, url_prefix="/profile")
 
@@ -74,6 +76,10 @@ def update_profile():
         cursor.close()
         conn.close()
 
+        # Location changed: drop the cached scope here and in other workers
+        user_context.invalidate(user_id)
+        user_context.touch_session()
+
         flash("Profile updated successfully.", "success")
         return redirect(url_for("profile.profile_page"))
 
@@ -81,9 +87,6 @@ def update_profile():
     cursor.execute("SELECT * FROM Users WHERE user_id=%s", (user_id,))
     user = cursor.fetchone()
 
-    cursor.execute("SELECT state_id, name FROM States ORDER BY name")
-    states = cursor.fetchall()
-
     cursor.close()
     conn.close()
 
@@ -92,7 +95,7 @@ def update_profile():
     return render_template(
         "profile/update_profile.html",
         user=user,
-        states=states
+        states=hierarchy().states
     )
 
 
@@ -102,23 +105,11 @@ def update_profile():
 @profile_bp.route("/api/cities")
 @login_required
 def get_cities():
-    state_id = request.args.get("state_id")
-    if not state_id:
-        return jsonify({"cities": []})
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        "SELECT city_id, name FROM Cities WHERE state_id=%s ORDER BY name",
-        (state_id,)
+    state_id = to_id(request.args.get("state_id"))
+    return location_json(
+        f"cities-{state_id}",
+        lambda h: {"cities": h.cities_in_state(state_id)}
     )
-    cities = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return jsonify({"cities": cities})
 
 
 # -----------------------------
@@ -127,20 +118,8 @@ def get_cities():
 @profile_bp.route("/api/wards")
 @login_required
 def get_wards():
-    city_id = request.args.get("city_id")
-    if not city_id:
-        return jsonify({"wards": []})
-
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
-
-    cursor.execute(
-        "SELECT ward_id, name FROM Wards WHERE city_id=%s ORDER BY name",
-        (city_id,)
+    city_id = to_id(request.args.get("city_id"))
+    return location_json(
+        f"wards-{city_id}",
+        lambda h: {"wards": h.wards_in_city(city_id)}
     )
-    wards = cursor.fetchall()
-
-    cursor.close()
-    conn.close()
-
-    return jsonify({"wards": wards})
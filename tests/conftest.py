@@ -0,0 +1,38 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# The app is not an installed package: import utils / routes from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeCursor:
+    """
+    Records every execute() and answers fetches from queued result sets,
+    one per statement, in order.
+    """
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.queries = []
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        self.queries.append((sql, list(params or ())))
+        self._rows = self.results.pop(0) if self.results else []
+
+    def fetchall(self):
+        return self._rows
+
+    def fetchone(self):
+        return self._rows[0] if self._rows else None
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def fake_cursor():
+    return FakeCursor
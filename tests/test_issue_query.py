@@ -0,0 +1,316 @@
+# tests/test_issue_query.py
+"""
+SQL shape, parameters and keyset clauses of the dashboard queries for each
+role_scope / IssueScope combination (utils/issue_scope, utils/issue_query),
+plus an EXPLAIN check that runs only against a configured database.
+"""
+from datetime import datetime
+
+import pytest
+from flask import Flask
+
+from utils import issue_query
+from utils.issue_query import list_query, page_with_stats, query_shapes, stats_query
+from utils.issue_scope import apply_ui_filters, role_scope
+from utils.issue_search import search_filter
+from utils.pagination import keyset_clause
+
+USER = {"state_id": 1, "city_id": 2, "ward_id": 3, "department_id": 4}
+CREATED = datetime(2026, 1, 2, 3, 4, 5)
+
+# role -> (clauses, params, counter filters or None)
+ROLE_SCOPES = {
+    "super_admin": ([], [], []),
+    "state_admin": ([" AND i.state_id = %s"], [1], [("state_id", 1)]),
+    "municipal_admin": ([" AND i.city_id = %s"], [2], [("city_id", 2)]),
+    "department_admin": ([" AND i.assigned_department = %s"], [4], [("department_id", 4)]),
+    "facilitator": ([" AND i.ward_id = %s"], [3], [("ward_id", 3)]),
+    "field_staff": ([" AND i.ward_id = %s"], [3], [("ward_id", 3)]),
+    "citizen": ([" AND (i.reported_by = %s OR i.ward_id = %s)"], [99, 3], None),
+}
+
+UI_ARGS = [
+    {},
+    {"status": "Assigned"},
+    {"ward_id": "3"},
+    {"city_id": "2", "status": "Resolved"},
+    {"department_id": "4"},
+]
+
+
+def _placeholders(sql):
+    return sql.count("%s")
+
+
+# -------------------------------------------------
+# role_scope / apply_ui_filters
+# -------------------------------------------------
+@pytest.mark.parametrize("role", sorted(ROLE_SCOPES))
+def test_role_scope(role):
+    clauses, params, counters = ROLE_SCOPES[role]
+    scope = role_scope(role, 99, USER)
+    assert scope.clauses == clauses
+    assert scope.params == params
+    assert scope.counter_filters == counters
+
+
+@pytest.mark.parametrize("role, missing", [
+    ("state_admin", "state_id"),
+    ("municipal_admin", "city_id"),
+    ("department_admin", "department_id"),
+    ("facilitator", "ward_id"),
+    ("field_staff", "ward_id"),
+])
+def test_scope_without_profile_location_matches_nothing(role, missing):
+    scope = role_scope(role, 99, {**USER, missing: None})
+    assert scope.clauses == [" AND 1=0"]
+    assert scope.params == []
+
+
+def test_unknown_role_matches_nothing():
+    assert role_scope("visitor", 99, USER).clauses == [" AND 1=0"]
+
+
+def test_citizen_without_ward_sees_own_issues():
+    scope = role_scope("citizen", 99, {**USER, "ward_id": None})
+    assert scope.clauses == [" AND (i.reported_by = %s)"]
+    assert scope.params == [99]
+
+
+@pytest.mark.parametrize("args", UI_ARGS)
+def test_ui_filters_narrow_the_scope(args):
+    scope = apply_ui_filters(role_scope("municipal_admin", 99, USER), args)
+
+    location = {k: v for k, v in args.items() if k != "status"}
+
+    # Role predicate first, then dropdowns, then status
+    assert scope.params == [2] + list(location.values()) + (
+        [args["status"]] if "status" in args else []
+    )
+    assert scope.status == args.get("status")
+    assert scope.filters == {"city_id": 2, **location}
+    assert scope.counter_filters == [("city_id", 2)] + list(location.items())
+
+
+def test_same_shape_reuses_compiled_sql():
+    a = role_scope("municipal_admin", 1, USER)
+    b = role_scope("municipal_admin", 2, {**USER, "city_id": 8})
+    assert a.shape == b.shape
+    assert list_query(a, limit=10)[0] is list_query(b, limit=10)[0]
+
+
+# -------------------------------------------------
+# list_query / stats_query
+# -------------------------------------------------
+@pytest.mark.parametrize("role", sorted(ROLE_SCOPES))
+@pytest.mark.parametrize("args", UI_ARGS)
+def test_first_page(role, args):
+    scope = apply_ui_filters(role_scope(role, 99, USER), args)
+    sql, params = list_query(scope, limit=51)
+
+    assert scope.where in sql
+    assert "ORDER BY i.created_at DESC, i.issue_id DESC" in sql
+    assert "LIMIT %s" in sql
+    assert " OVER " not in sql
+    assert params == scope.params + [51]
+    assert _placeholders(sql) == len(params)
+
+
+@pytest.mark.parametrize("role", sorted(ROLE_SCOPES))
+def test_next_page_uses_keyset(role):
+    scope = role_scope(role, 99, USER)
+    sql, params = list_query(scope, after=(CREATED, 500), limit=51)
+
+    assert " AND " + keyset_clause("i.created_at", "i.issue_id") in sql
+    assert "HAVING" not in sql
+    assert params == scope.params + [CREATED, CREATED, 500, 51]
+    assert _placeholders(sql) == len(params)
+
+
+@pytest.mark.parametrize("role", sorted(ROLE_SCOPES))
+def test_ranked_search_pages(role):
+    scope = role_scope(role, 99, USER)
+    search_sql, search_params, rank_sql, rank_params = search_filter("broken light")
+    scope.add_sql(search_sql, search_params)
+    assert scope.counter_filters is None
+
+    sql, params = list_query(scope, rank_sql, rank_params, limit=51)
+    assert "ORDER BY relevance DESC, i.issue_id DESC" in sql
+    assert params == ["+broken* +light*"] + scope.params + [51]
+    assert _placeholders(sql) == len(params)
+
+    sql, params = list_query(scope, rank_sql, rank_params, after=(1.5, 7), limit=51)
+    assert " HAVING " + keyset_clause("relevance", "i.issue_id") in sql
+    assert params == ["+broken* +light*"] + scope.params + [1.5, 1.5, 7, 51]
+    assert _placeholders(sql) == len(params)
+
+
+def test_issue_id_search_keeps_recency_order():
+    scope = role_scope("super_admin", 99, USER)
+    search_sql, search_params, rank_sql, rank_params = search_filter("#42")
+    scope.add_sql(search_sql, search_params)
+    assert rank_sql is None
+
+    sql, params = list_query(scope, rank_sql, rank_params, limit=51)
+    assert "i.issue_id = %s" in sql
+    assert params == [42, 51]
+
+
+def test_unlimited_list_has_no_limit():
+    sql, params = list_query(role_scope("super_admin", 1, USER))
+    assert "LIMIT" not in sql
+    assert params == []
+
+
+@pytest.mark.parametrize("role", sorted(ROLE_SCOPES))
+def test_stats_query(role):
+    scope = apply_ui_filters(role_scope(role, 99, USER), {"status": "Reported"})
+    sql, params = stats_query(scope)
+    assert "GROUP BY i.current_status" in sql
+    assert "ORDER BY" not in sql and "LIMIT" not in sql
+    assert params == scope.params
+    assert _placeholders(sql) == len(params)
+
+
+def test_query_shapes_cover_every_role():
+    sample = {
+        "state_id": 1, "city_id": 2, "ward_id": 3, "assigned_department": 4,
+        "reported_by": 99, "current_status": "Assigned", "created_at": CREATED, "issue_id": 500
+    }
+    shapes = list(query_shapes(sample, "road"))
+    for description, sql, params in shapes:
+        assert _placeholders(sql) == len(params), description
+    roles = {description.split()[0] for description, _, _ in shapes}
+    assert roles == set(issue_query.SHAPE_ROLES)
+
+
+# -------------------------------------------------
+# page_with_stats
+# -------------------------------------------------
+STATUS_ROWS = [{"status": "Reported", "total": 3}, {"status": "Resolved", "total": 2}]
+EXPECTED_STATS = {
+    "Total": 5, "Reported": 3, "Assigned": 0, "In Progress": 0,
+    "In Review": 0, "Resolved": 2, "Rejected": 0
+}
+
+
+def test_counter_scope_reads_the_counters(fake_cursor):
+    cursor = fake_cursor([{"issue_id": 1}], STATUS_ROWS)
+    rows, stats = page_with_stats(cursor, role_scope("municipal_admin", 99, USER), limit=51)
+
+    assert rows == [{"issue_id": 1}]
+    assert stats == EXPECTED_STATS
+    assert "LIMIT %s" in cursor.queries[0][0]
+    assert "Issue_Status_Counts" in cursor.queries[1][0]
+    assert cursor.queries[1][1] == [2]
+
+
+def test_ranked_search_is_one_pass(fake_cursor):
+    scope = role_scope("citizen", 99, USER)
+    search_sql, search_params, rank_sql, rank_params = search_filter("pothole")
+    scope.add_sql(search_sql, search_params)
+
+    stat_columns = {f"{issue_query.STATS_PREFIX}{k}": v for k, v in EXPECTED_STATS.items()}
+    cursor = fake_cursor([{"issue_id": 1, **stat_columns}, {"issue_id": 2, **stat_columns}])
+    rows, stats = page_with_stats(cursor, scope, rank_sql, rank_params, limit=51)
+
+    assert len(cursor.queries) == 1
+    assert "COUNT(*) OVER ()" in cursor.queries[0][0]
+    assert rows == [{"issue_id": 1}, {"issue_id": 2}]
+    assert stats == EXPECTED_STATS
+
+
+class FakePool:
+    def __init__(self, conn):
+        self.conn = conn
+        self.capacity = 2
+        self.released = []
+
+    def acquire(self, wait=True):
+        return self.conn
+
+    def release(self, conn):
+        self.released.append(conn)
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, *args, **kwargs):
+        return self._cursor
+
+
+def test_scan_scope_runs_stats_on_a_second_connection(fake_cursor):
+    stats_cursor = fake_cursor(STATUS_ROWS)
+    pool = FakePool(FakeConnection(stats_cursor))
+    app = Flask(__name__)
+    app.extensions["db_pool"] = pool
+
+    cursor = fake_cursor([{"issue_id": 1}])
+    with app.app_context():
+        rows, stats = page_with_stats(cursor, role_scope("citizen", 99, USER), limit=51)
+
+    assert rows == [{"issue_id": 1}]
+    assert stats == EXPECTED_STATS
+    assert len(cursor.queries) == 1 and "LIMIT %s" in cursor.queries[0][0]
+    assert "GROUP BY i.current_status" in stats_cursor.queries[0][0]
+    assert pool.released == [pool.conn]
+
+
+def test_scan_scope_without_a_free_connection_runs_inline(fake_cursor):
+    app = Flask(__name__)
+    app.extensions["db_pool"] = FakePool(None)
+
+    cursor = fake_cursor([{"issue_id": 1}], STATUS_ROWS)
+    with app.app_context():
+        rows, stats = page_with_stats(cursor, role_scope("citizen", 99, USER), limit=51)
+
+    assert stats == EXPECTED_STATS
+    assert "GROUP BY i.current_status" in cursor.queries[1][0]
+
+
+# -------------------------------------------------
+# EXPLAIN (needs config.py and a reachable database)
+# -------------------------------------------------
+def test_no_full_scans_of_issues():
+    mysql_connector = pytest.importorskip("mysql.connector")
+    try:
+        from config import Config
+    except ImportError:
+        pytest.skip("no config.py: database not configured")
+
+    try:
+        conn = mysql_connector.connect(
+            host=Config.DB_HOST,
+            user=Config.DB_USER,
+            password=Config.DB_PASSWORD,
+            database=Config.DB_NAME,
+            connection_timeout=3
+        )
+    except mysql_connector.Error as e:
+        pytest.skip(f"database not reachable: {e}")
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute("""
+            SELECT state_id, city_id, ward_id, assigned_department,
+                   reported_by, current_status, created_at, issue_id
+            FROM Issues
+            ORDER BY issue_id DESC
+            LIMIT 1
+        """)
+        sample = cursor.fetchone()
+        if not sample:
+            pytest.skip("Issues is empty; nothing to EXPLAIN")
+
+        failures = [
+            description
+            for description, sql, params in query_shapes(sample, "road")
+            if issue_query.full_scans(cursor, sql, params)
+        ]
+    finally:
+        cursor.close()
+        conn.close()
+
+    assert not failures
@@ -0,0 +1,93 @@
+# tests/test_resolution_stats.py
+"""
+Fixed timelines through both summary paths of utils/resolution_stats:
+the same percentiles and on-time shares whether or not NumPy is installed.
+"""
+import math
+import os
+
+import pytest
+
+from utils import resolution_stats
+
+HOUR = 3600.0
+NAN = math.nan
+
+# (group_key, reported_at, assigned_at, resolved_at, deadline_at)
+TIMELINES = [
+    # department 1: on time, late, still open
+    (1, 0.0, 1 * HOUR, 2 * HOUR, 3 * HOUR),
+    (1, 0.0, 2 * HOUR, 10 * HOUR, 5 * HOUR),
+    (1, 0.0, NAN, NAN, 5 * HOUR),
+    # department 2: resolved, no deadline
+    (2, 0.0, 4 * HOUR, 5 * HOUR, NAN),
+    # department 3: reported only
+    (3, 0.0, NAN, NAN, NAN),
+]
+
+EXPECTED = [
+    {
+        "key": 1, "issues": 3, "resolved": 2, "on_time_rate": 0.5,
+        "to_assign": {"p50": 1.5, "p90": 1.9},
+        "to_resolve": {"p50": 4.5, "p90": 7.3},
+        "total": {"p50": 6.0, "p90": 9.2},
+    },
+    {
+        "key": 2, "issues": 1, "resolved": 1, "on_time_rate": None,
+        "to_assign": {"p50": 4.0, "p90": 4.0},
+        "to_resolve": {"p50": 1.0, "p90": 1.0},
+        "total": {"p50": 5.0, "p90": 5.0},
+    },
+    {
+        "key": 3, "issues": 1, "resolved": 0, "on_time_rate": None,
+        "to_assign": None, "to_resolve": None, "total": None,
+    },
+]
+
+
+def _columns(rows):
+    return {
+        column: [row[n] for row in rows]
+        for n, column in enumerate(resolution_stats.COLUMNS)
+    }
+
+
+def test_python_summary():
+    assert resolution_stats._summarise_python(_columns(TIMELINES)) == EXPECTED
+
+
+def test_numpy_summary_matches_python():
+    # CI installs NumPy, so a missing one there is a failure, not a skip
+    if os.environ.get("CI"):
+        import numpy as np
+    else:
+        np = pytest.importorskip("numpy")
+    columns = {
+        name: np.array(values, dtype=np.float64)
+        for name, values in _columns(TIMELINES).items()
+    }
+    assert resolution_stats._summarise_numpy(columns) == EXPECTED
+
+
+def test_percentile_interpolates_between_ranks():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert resolution_stats._percentile(values, 50) == 2.5
+    assert resolution_stats._percentile(values, 90) == pytest.approx(3.7)
+    assert resolution_stats._percentile([7.0], 90) == 7.0
+
+
+def test_summarise_uses_numpy_when_installed(monkeypatch):
+    calls = []
+    monkeypatch.setattr(resolution_stats, "_summarise_numpy", lambda c: calls.append("numpy"))
+    monkeypatch.setattr(resolution_stats, "_summarise_python", lambda c: calls.append("python"))
+
+    monkeypatch.setattr(resolution_stats, "np", object())
+    resolution_stats.summarise({})
+    monkeypatch.setattr(resolution_stats, "np", None)
+    resolution_stats.summarise({})
+
+    assert calls == ["numpy", "python"]
+
+
+def test_empty_input():
+    assert resolution_stats._summarise_python(_columns([])) == []
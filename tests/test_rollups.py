@@ -0,0 +1,51 @@
+# tests/test_rollups.py
+"""Backlog walk in utils/rollups.daily_series over days with and without activity."""
+from datetime import date, timedelta
+
+from utils import rollups
+
+
+def _day(n, days):
+    return date.today() - timedelta(days=days - 1 - n)
+
+
+def test_backlog_walks_back_across_quiet_days(fake_cursor):
+    days = 5
+    rows = [
+        # day 0: three reports
+        {"day": _day(0, days), "status": "Reported", "entered": 3, "net": 3},
+        # day 2: one of them resolved
+        {"day": _day(2, days), "status": "Reported", "entered": 0, "net": -1},
+        {"day": _day(2, days), "status": "Resolved", "entered": 1, "net": 1},
+        # days 1, 3 and 4: nothing
+    ]
+
+    series = rollups.daily_series(fake_cursor(rows, [{"total": 2}]), {}, days)
+
+    assert series["days"] == [_day(n, days).isoformat() for n in range(days)]
+    assert series["reported"] == [3, 0, 0, 0, 0]
+    assert series["resolved"] == [0, 0, 1, 0, 0]
+    assert series["backlog"] == [3, 3, 2, 2, 2]
+
+
+def test_no_activity_keeps_backlog_flat(fake_cursor):
+    series = rollups.daily_series(fake_cursor([], [{"total": 7}]), {}, 4)
+    assert series["backlog"] == [7, 7, 7, 7]
+    assert series["reported"] == [0, 0, 0, 0]
+
+
+def test_rows_before_the_window_are_ignored(fake_cursor):
+    days = 3
+    rows = [
+        {"day": _day(-1, days), "status": "Reported", "entered": 5, "net": 5},
+        {"day": _day(1, days), "status": "Assigned", "entered": 2, "net": 2},
+    ]
+    series = rollups.daily_series(fake_cursor(rows, [{"total": 4}]), {}, days)
+    assert series["assigned"] == [0, 2, 0]
+    assert series["backlog"] == [2, 4, 4]
+
+
+def test_filters_are_passed_as_parameters(fake_cursor):
+    cursor = fake_cursor([], [{"total": 0}])
+    rollups.daily_series(cursor, {"city_id": 9}, 2)
+    assert all(params[-1] == 9 for _, params in cursor.queries)
@@ -0,0 +1,107 @@
+# utils/conditional.py
+"""
+Conditional GET helpers: a cheap version lookup decides whether the heavy
+queries and rendering run at all.
+"""
+import hashlib
+
+from flask import current_app, make_response, request, session
+from werkzeug.http import is_resource_modified
+
+from utils.locations import to_id
+
+
+def _digest(*parts):
+    return hashlib.sha1(repr(parts).encode()).hexdigest()[:16]
+
+
+def conditional_response(etag, last_modified, build):
+    """
+    304 when the client's ETag / Last-Modified is current, otherwise the
+    response from build(). Pages with pending flash messages are always
+    rebuilt so the messages are shown.
+    """
+    fresh = (
+        "_flashes" not in session
+        and not is_resource_modified(request.environ, etag=etag, last_modified=last_modified)
+    )
+
+    if fresh:
+        response = current_app.response_class(status=304)
+    else:
+        response = make_response(build())
+
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+# -------------------------------------------------
+# ISSUE LIST (Issue_Versions, migrations/009)
+# -------------------------------------------------
+# No trigger keeps an 'all' row (migrations/014): city stamps only ever
+# grow and are never deleted, so their sum moves whenever any issue does
+ALL_VERSION_SQL = """
+    SELECT COALESCE(SUM(version), 0), MAX(updated_at)
+    FROM Issue_Versions
+    WHERE scope_key LIKE 'city:%'
+"""
+
+
+def scope_version_key(scope):
+    """
+    Narrowest Issue_Versions row that covers every issue in the scope.
+    Filter values come from the query string, so "05" and "5" must read
+    the same row; anything that is not a plain id falls back to 'all'.
+    """
+    for key, prefix in (("ward_id", "ward"), ("city_id", "city")):
+        value = scope.filters.get(key)
+        if value:
+            location_id = to_id(value)
+            if location_id is None or location_id <= 0:
+                return "all"
+            return f"{prefix}:{location_id}"
+    return "all"
+
+
+def issue_list_version(cursor, scope):
+    """(version, updated_at) of the scope's Issue_Versions row."""
+    key = scope_version_key(scope)
+    if key == "all":
+        cursor.execute(ALL_VERSION_SQL)
+    else:
+        cursor.execute(
+            "SELECT version, updated_at FROM Issue_Versions WHERE scope_key=%s",
+            (key,)
+        )
+    row = cursor.fetchone()
+    if not row:
+        return 0, None
+    if isinstance(row, dict):
+        row = list(row.values())
+    return int(row[0]), row[1]
+
+
+def issue_list_etag(cursor, scope, args):
+    """
+    ETag + Last-Modified for a filtered issue list: the scope's change
+    stamp combined with everything that shapes the result (scope SQL and
+    parameters, query string).
+    """
+    version, updated_at = issue_list_version(cursor, scope)
+    key = scope_version_key(scope)
+    etag = f"issues-{key}-{version}-" + _digest(
+        scope.where, scope.params, sorted(args.items(multi=True))
+    )
+    return etag, updated_at
+
+
+# -------------------------------------------------
+# ISSUE DETAIL (utils/issue_view.py version tuple)
+# -------------------------------------------------
+def issue_page_etag(issue_id, version):
+    """The page shows role-dependent controls, so the role is part of the tag."""
+    return f"issue-{issue_id}-" + _digest(version, session.get("role"), session.get("user_id"))
@@ -1,12 +1,188 @@
 # utils/db.py
+import threading
+import time
+from collections import deque
+
 import mysql.connector
-from flask import current_app
+from flask import current_app, g
 
-def get_db_connection():
-    conn = mysql.connector.connect(
-        host=current_app.config["DB_HOST"],
-        user=current_app.config["DB_USER"],
-        password=current_app.config["DB_PASSWORD"],
-        database=current_app.config["DB_NAME"]
+from utils.metrics import InstrumentedCursor
+
+
+# Defaults used when config.py does not define the pool settings
+POOL_DEFAULTS = {
+    "DB_POOL_SIZE": 5,          # connections kept open between requests
+    "DB_POOL_MAX_OVERFLOW": 10, # extra connections allowed under burst load
+    "DB_POOL_TIMEOUT": 10,      # seconds to wait for a free connection
+    "DB_POOL_RECYCLE": 3600     # seconds before a connection is reopened
+}
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection becomes free within DB_POOL_TIMEOUT."""
+
+
+class PooledConnection:
+    """
+    Thin wrapper around a MySQL connection owned by the pool.
+
+    Route code keeps calling conn.close() as before; that call is a no-op
+    because the connection is returned to the pool on context teardown.
+    Cursors come back wrapped so every statement is timed (utils/metrics).
+    """
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.created_at = time.monotonic()
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self.raw.cursor(*args, **kwargs))
+
+    def close(self):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+class ConnectionPool:
+    """Bounded pool with overflow, checkout timeout and recycle age."""
+
+    def __init__(self, connect, size, max_overflow, timeout, recycle):
+        self._connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+
+        self._idle = deque()
+        self._checked_out = 0
+        self._waiting = 0
+        self._timeouts = 0
+        self._cond = threading.Condition()
+
+    @property
+    def checked_out(self):
+        return self._checked_out
+
+    @property
+    def idle(self):
+        return len(self._idle)
+
+    @property
+    def capacity(self):
+        return self.size + self.max_overflow
+
+    @property
+    def waiting(self):
+        return self._waiting
+
+    @property
+    def timeouts(self):
+        return self._timeouts
+
+    def _expired(self, conn):
+        return self.recycle and time.monotonic() - conn.created_at > self.recycle
+
+    def _discard(self, conn):
+        try:
+            conn.raw.close()
+        except mysql.connector.Error:
+            pass
+
+    def acquire(self, wait=True):
+        """A connection; with wait=False, None instead of waiting for one."""
+        deadline = time.monotonic() + self.timeout
+
+        with self._cond:
+            while True:
+                while self._idle:
+                    conn = self._idle.pop()
+                    if self._expired(conn):
+                        self._discard(conn)
+                        continue
+                    self._checked_out += 1
+                    return conn
+
+                if self._checked_out < self.capacity:
+                    # Reserve the slot, connect outside the lock
+                    self._checked_out += 1
+                    break
+
+                if not wait:
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(
+                        f"No database connection free after {self.timeout}s"
+                    )
+                self._waiting += 1
+                try:
+                    self._cond.wait(remaining)
+                finally:
+                    self._waiting -= 1
+
+        try:
+            return PooledConnection(self._connect())
+        except Exception:
+            with self._cond:
+                self._checked_out -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn):
+        keep = True
+        try:
+            # Drop anything the request left uncommitted (early returns)
+            conn.raw.rollback()
+        except mysql.connector.Error:
+            keep = False
+
+        with self._cond:
+            self._checked_out -= 1
+            if keep and not self._expired(conn) and len(self._idle) < self.size:
+                self._idle.append(conn)
+            else:
+                self._discard(conn)
+            self._cond.notify()
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in POOL_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    def connect():
+        return mysql.connector.connect(
+            host=app.config["DB_HOST"],
+            user=app.config["DB_USER"],
+            password=app.config["DB_PASSWORD"],
+            database=app.config["DB_NAME"],
+            consume_results=True
+        )
+
+    app.extensions["db_pool"] = ConnectionPool(
+        connect,
+        size=app.config["DB_POOL_SIZE"],
+        max_overflow=app.config["DB_POOL_MAX_OVERFLOW"],
+        timeout=app.config["DB_POOL_TIMEOUT"],
+        recycle=app.config["DB_POOL_RECYCLE"]
     )
-    return conn
+    app.teardown_appcontext(release_db_connection)
+
+
+def get_db_connection():
+    """Borrow one pooled connection for the current app/request context."""
+    if "db_conn" not in g:
+        g.db_conn = current_app.extensions["db_pool"].acquire()
+    return g.db_conn
+
+
+def release_db_connection(exc=None):
+    conn = g.pop("db_conn", None)
+    if conn is not None:
+        current_app.extensions["db_pool"].release(conn)
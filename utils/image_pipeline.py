@@ -0,0 +1,219 @@
+# utils/image_pipeline.py
+import os
+import threading
+
+from flask import current_app
+
+from utils.db import get_db_connection
+from utils import upload_store
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; jobs stay pending until installed
+    Image = None
+
+MAX_ATTEMPTS = 3
+STALE_AFTER_MINUTES = 10    # a job 'running' this long belonged to a dead worker
+
+PIPELINE_DEFAULTS = {
+    "IMAGE_WORKERS": 2,           # background threads per process
+    "IMAGE_POLL_INTERVAL": 30,    # seconds between sweeps for leftover jobs
+    "IMAGE_WEB_SIZE": 1600,       # longest edge of the web variant
+    "IMAGE_THUMB_SIZE": 320,      # longest edge of the thumbnail
+    "IMAGE_JPEG_QUALITY": 82
+}
+
+
+def make_variant(source, target, size, quality):
+    """
+    Writes a resized, EXIF-free JPEG of source to target.
+    Orientation from EXIF is applied to the pixels before it is dropped.
+    """
+    with Image.open(source) as img:
+        # Let the JPEG decoder downscale while decoding (much cheaper)
+        img.draft("RGB", (size, size))
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((size, size), Image.LANCZOS)
+        if img.mode != "RGB":
+            img = img.convert("RGB")
+        img.save(target, "JPEG", quality=quality, optimize=True, progressive=True)
+
+
+class ImagePipeline:
+    """
+    Processes Image_Jobs on a small pool of daemon threads.
+
+    Jobs are claimed with SELECT ... FOR UPDATE SKIP LOCKED, so several
+    workers (or processes, or `flask process-images`) can drain the same
+    queue without handing out a job twice.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.workers = app.config["IMAGE_WORKERS"]
+        self.poll_interval = app.config["IMAGE_POLL_INTERVAL"]
+
+        self._wake = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def notify(self):
+        """Called after a commit that enqueued jobs."""
+        self.start()
+        self._wake.set()
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                t = threading.Thread(
+                    target=self._run, name=f"image-pipeline-{n}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                while self.process_pending():
+                    pass
+            except Exception:
+                self.app.logger.exception("Image pipeline sweep failed")
+
+    def process_pending(self, limit=10):
+        """Claims and processes up to `limit` jobs; returns how many were handled."""
+        if Image is None:
+            return 0
+
+        with self.app.app_context():
+            jobs = self._claim(limit)
+            for job in jobs:
+                self._process(job)
+            return len(jobs)
+
+    def _claim(self, limit):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        # A stale job that already used every attempt probably took its worker
+        # down with it (OOM, decompression bomb): give up instead of retrying
+        cursor.execute("""
+            UPDATE Image_Jobs
+            SET status='failed', last_error='Worker stopped while processing this image'
+            WHERE status = 'running'
+              AND updated_at < NOW() - INTERVAL %s MINUTE
+              AND attempts >= %s
+        """, (STALE_AFTER_MINUTES, MAX_ATTEMPTS))
+
+        cursor.execute("""
+            SELECT j.job_id, j.image_id, j.attempts, im.image_file
+            FROM Image_Jobs j
+            JOIN Issue_Images im ON im.image_id = j.image_id
+            WHERE j.status = 'pending'
+               OR (j.status = 'running'
+                   AND j.updated_at < NOW() - INTERVAL %s MINUTE
+                   AND j.attempts < %s)
+            ORDER BY j.job_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (STALE_AFTER_MINUTES, MAX_ATTEMPTS, limit))
+        jobs = cursor.fetchall()
+
+        if jobs:
+            ids = [job["job_id"] for job in jobs]
+            cursor.execute(
+                "UPDATE Image_Jobs SET status='running', attempts=attempts+1 "
+                "WHERE job_id IN (%s)" % ",".join(["%s"] * len(ids)),
+                ids
+            )
+
+        conn.commit()
+        cursor.close()
+        return jobs
+
+    def _process(self, job):
+        config = self.app.config
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        try:
+            # Variants go through the content-addressed store as well
+            variants = {}
+            for name, size in (("thumb", config["IMAGE_THUMB_SIZE"]),
+                               ("web", config["IMAGE_WEB_SIZE"])):
+                tmp = upload_store.temp_path(".jpg")
+                try:
+                    make_variant(upload_store.disk_path(job["image_file"]), tmp, size, config["IMAGE_JPEG_QUALITY"])
+                except Exception:
+                    os.remove(tmp)
+                    raise
+                variants[name] = upload_store.adopt_file(tmp, ".jpg")
+
+            cursor.execute("""
+                UPDATE Issue_Images
+                SET thumb_file=%s, web_file=%s, processed_at=NOW()
+                WHERE image_id=%s
+            """, (variants["thumb"], variants["web"], job["image_id"]))
+
+            cursor.execute(
+                "UPDATE Image_Jobs SET status='done', last_error=NULL WHERE job_id=%s",
+                (job["job_id"],)
+            )
+
+        except Exception as e:
+            self.app.logger.warning("Image job %s failed: %s", job["job_id"], e)
+            # attempts was already incremented when the job was claimed
+            status = "failed" if job["attempts"] + 1 >= MAX_ATTEMPTS else "pending"
+            cursor.execute(
+                "UPDATE Image_Jobs SET status=%s, last_error=%s WHERE job_id=%s",
+                (status, str(e)[:255], job["job_id"])
+            )
+
+        conn.commit()
+        cursor.close()
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in PIPELINE_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    pipeline = ImagePipeline(app)
+    app.extensions["image_pipeline"] = pipeline
+
+    # Started with the first request, so jobs left pending by a restart are
+    # picked up without waiting for the next upload
+    app.before_request(pipeline.start)
+
+
+def enqueue_issue_images(cursor, issue_id):
+    """Queues every unprocessed image of an issue; run inside the issue's transaction."""
+
+    # Identical photos share one stored file, so reuse variants already made for it
+    cursor.execute("""
+        UPDATE Issue_Images new_im
+        JOIN Issue_Images done_im
+          ON done_im.image_file = new_im.image_file
+         AND done_im.processed_at IS NOT NULL
+        SET new_im.thumb_file = done_im.thumb_file,
+            new_im.web_file = done_im.web_file,
+            new_im.processed_at = NOW()
+        WHERE new_im.issue_id = %s AND new_im.processed_at IS NULL
+    """, (issue_id,))
+
+    cursor.execute("""
+        INSERT INTO Image_Jobs (image_id)
+        SELECT image_id FROM Issue_Images
+        WHERE issue_id=%s AND processed_at IS NULL
+    """, (issue_id,))
+
+
+def notify():
+    """Wakes the workers; call after the enqueuing transaction commits."""
+    current_app.extensions["image_pipeline"].notify()
@@ -0,0 +1,94 @@
+# utils/issue_export.py
+from itertools import groupby
+
+from flask import current_app
+
+from utils.streaming import STREAM_BATCH_SIZE
+
+ISSUE_COLUMNS = [
+    "issue_id", "title", "category", "current_status", "assisted", "source",
+    "state_name", "city_name", "ward_name", "department_name",
+    "deadline", "created_at", "updated_at"
+]
+
+HISTORY_COLUMNS = ["history_status", "history_remarks", "history_updated_at", "history_updated_by"]
+
+
+def export_query(where, with_history):
+    """
+    SELECT over the scoped issues in issue_id order (primary key order, so
+    MySQL can stream it without sorting). With history, one row per
+    Status_Updates entry, consecutive per issue.
+    """
+    history_select = ""
+    history_join = ""
+    order_by = "i.issue_id"
+
+    if with_history:
+        history_select = """,
+            su.status AS history_status,
+            su.remarks AS history_remarks,
+            su.updated_at AS history_updated_at,
+            u.name AS history_updated_by"""
+        history_join = """
+        LEFT JOIN Status_Updates su ON su.issue_id = i.issue_id
+        LEFT JOIN Users u ON su.updated_by = u.user_id"""
+        order_by = "i.issue_id, su.updated_at"
+
+    return f"""
+        SELECT
+            i.issue_id, i.title, i.category, i.current_status,
+            i.assisted, i.source,
+            s.name AS state_name,
+            c.name AS city_name,
+            w.name AS ward_name,
+            d.name AS department_name,
+            i.deadline, i.created_at, i.updated_at{history_select}
+        FROM Issues i
+        LEFT JOIN States s ON i.state_id = s.state_id
+        LEFT JOIN Cities c ON i.city_id = c.city_id
+        LEFT JOIN Wards w ON i.ward_id = w.ward_id
+        LEFT JOIN Departments d ON i.assigned_department = d.department_id{history_join}
+        {where}
+        ORDER BY {order_by}
+    """
+
+
+def _rows(cursor, batch_size):
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield from rows
+
+
+def ndjson_with_history(cursor, batch_size=STREAM_BATCH_SIZE):
+    """
+    Folds the one-row-per-update result back into one JSON object per
+    issue with a "history" list. Only one issue is held in memory.
+    """
+    dumps = current_app.json.dumps
+    out = []
+    try:
+        for _, rows in groupby(_rows(cursor, batch_size), key=lambda r: r["issue_id"]):
+            rows = list(rows)
+            issue = {c: rows[0][c] for c in ISSUE_COLUMNS}
+            issue["history"] = [
+                {
+                    "status": r["history_status"],
+                    "remarks": r["history_remarks"],
+                    "updated_at": r["history_updated_at"],
+                    "updated_by": r["history_updated_by"]
+                }
+                for r in rows if r["history_status"] is not None
+            ]
+            out.append(dumps(issue) + "\n")
+
+            if len(out) >= batch_size:
+                yield "".join(out)
+                out = []
+
+        if out:
+            yield "".join(out)
+    finally:
+        cursor.close()
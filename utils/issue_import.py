@@ -0,0 +1,170 @@
+# utils/issue_import.py
+import csv
+import io
+import json
+
+import mysql.connector
+
+from utils import status_counts
+from utils.locations import to_id
+
+ISSUE_CATEGORIES = ["Road", "Garbage", "Water", "Electricity", "Health", "Other"]
+
+IMPORT_CHUNK_SIZE = 1000     # rows per INSERT batch / transaction
+MAX_IMPORT_ROWS = 20000
+MAX_TITLE_LENGTH = 255
+
+
+class ImportFormatError(ValueError):
+    """The uploaded file cannot be read as a list of issue rows."""
+
+
+def read_rows(file_storage):
+    """Parses an uploaded .csv (with header) or .json (list of objects) file."""
+    name = (file_storage.filename or "").lower()
+
+    try:
+        if name.endswith(".json"):
+            rows = json.load(file_storage.stream)
+            if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+                raise ImportFormatError("JSON upload must be a list of issue objects.")
+
+        elif name.endswith(".csv"):
+            text = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig", newline="")
+            rows = list(csv.DictReader(text))
+
+        else:
+            raise ImportFormatError("Upload a .csv or .json file.")
+
+    except (UnicodeDecodeError, json.JSONDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"Could not read file: {e}") from e
+
+    if not rows:
+        raise ImportFormatError("The file contains no rows.")
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise ImportFormatError(f"At most {MAX_IMPORT_ROWS} rows can be imported at once.")
+
+    return rows
+
+
+def validate_row(raw, locations, allowed_wards, default_ward_id):
+    """Returns (issue dict, None) or (None, error message)."""
+    title = str(raw.get("title") or "").strip()
+    description = str(raw.get("description") or "").strip()
+    category = str(raw.get("category") or "").strip().capitalize()
+    ward_id = to_id(raw.get("ward_id")) or default_ward_id
+
+    if not title or not description:
+        return None, "Title and description are required."
+    if len(title) > MAX_TITLE_LENGTH:
+        return None, f"Title is longer than {MAX_TITLE_LENGTH} characters."
+    if category not in ISSUE_CATEGORIES:
+        return None, f"Unknown category '{raw.get('category') or ''}'."
+
+    ward = locations.wards.get(ward_id)
+    if not ward:
+        return None, "Ward is missing or does not exist."
+    if ward_id not in allowed_wards:
+        return None, "Ward is outside your area."
+
+    city = locations.cities[ward["city_id"]]
+    return {
+        "title": title,
+        "description": description,
+        "category": category,
+        "state_id": city["state_id"],
+        "city_id": city["city_id"],
+        "ward_id": ward_id
+    }, None
+
+
+def import_issues(conn, file_name, raw_rows, locations, user, role):
+    """
+    Validates every row, then inserts the valid ones in chunked
+    transactions (issues, initial status updates and status counters
+    per chunk). A failing chunk is rolled back on its own.
+
+    user: dict with user_id, city_id, ward_id of the importer.
+    Returns a report with per-row errors (row numbers are 1-based).
+    """
+    if role == "facilitator":
+        allowed_wards = {user.get("ward_id")}
+        default_ward_id = user.get("ward_id")
+    else:
+        allowed_wards = {w["ward_id"] for w in locations.wards_in_city(user.get("city_id"))}
+        default_ward_id = None
+
+    report = {"import_id": None, "total": len(raw_rows), "imported": 0, "failed": 0, "errors": []}
+
+    valid = []
+    for n, raw in enumerate(raw_rows, start=1):
+        issue, error = validate_row(raw, locations, allowed_wards, default_ward_id)
+        if error:
+            report["errors"].append({"row": n, "error": error})
+        else:
+            issue["row"] = n
+            valid.append(issue)
+
+    cursor = conn.cursor()
+
+    cursor.execute("""
+        INSERT INTO Issue_Imports (imported_by, file_name, rows_total)
+        VALUES (%s,%s,%s)
+    """, (user["user_id"], file_name[:255], len(raw_rows)))
+    import_id = cursor.lastrowid
+    conn.commit()
+    report["import_id"] = import_id
+
+    for start in range(0, len(valid), IMPORT_CHUNK_SIZE):
+        chunk = valid[start:start + IMPORT_CHUNK_SIZE]
+        try:
+            cursor.executemany("""
+                INSERT INTO Issues (
+                    title, description, category,
+                    state_id, city_id, ward_id,
+                    reported_by, source, assisted,
+                    current_status, import_id
+                )
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+            """, [
+                (
+                    i["title"], i["description"], i["category"],
+                    i["state_id"], i["city_id"], i["ward_id"],
+                    user["user_id"], role, True,
+                    "Reported", import_id
+                )
+                for i in chunk
+            ])
+
+            # Initial status entries for the issues this chunk just created
+            cursor.execute("""
+                INSERT INTO Status_Updates (issue_id, status, remarks, updated_by)
+                SELECT i.issue_id, 'Reported', %s, %s
+                FROM Issues i
+                WHERE i.import_id = %s
+                  AND NOT EXISTS (
+                      SELECT 1 FROM Status_Updates su WHERE su.issue_id = i.issue_id
+                  )
+            """, (f"Issue reported (offline import #{import_id})", user["user_id"], import_id))
+
+            status_counts.record_new_issues(cursor, chunk)
+
+            conn.commit()
+            report["imported"] += len(chunk)
+
+        except mysql.connector.Error as e:
+            conn.rollback()
+            for i in chunk:
+                report["errors"].append({"row": i["row"], "error": f"Database error: {e.msg}"})
+
+    report["failed"] = report["total"] - report["imported"]
+    report["errors"].sort(key=lambda e: e["row"])
+
+    cursor.execute("""
+        UPDATE Issue_Imports SET rows_imported=%s, rows_failed=%s
+        WHERE import_id=%s
+    """, (report["imported"], report["failed"], import_id))
+    conn.commit()
+    cursor.close()
+
+    return report
@@ -0,0 +1,276 @@
+# utils/issue_query.py
+"""
+Listing and stats SQL over a scoped set of Issues (see utils/issue_scope.py).
+
+Only the predicate set (IssueScope.shape) and the paging options change the
+SQL text, so each shape is compiled once per process and reused with new
+parameters. migrations/007 adds the composite indexes these shapes rely on;
+`flask explain-issue-queries` (and tests/test_issue_query.py, when a
+database is configured) checks them against a live database.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+
+from utils import status_counts
+from utils.issue_scope import role_scope, apply_ui_filters
+from utils.issue_search import search_filter
+from utils.pagination import DEFAULT_PAGE_SIZE, keyset_clause
+from utils.status_counts import STATUSES
+
+LIST_COLUMNS = """
+            i.issue_id,
+            i.title,
+            i.current_status AS status,
+            i.deadline,
+            i.created_at,
+            s.name AS state_name,
+            c.name AS city_name,
+            w.name AS ward_name"""
+
+LIST_JOINS = """
+        FROM Issues i
+        LEFT JOIN States s ON i.state_id = s.state_id
+        LEFT JOIN Cities c ON i.city_id = c.city_id
+        LEFT JOIN Wards w ON i.ward_id = w.ward_id"""
+
+# Same breakdown as window aggregates over the whole filtered set, carried
+# on every row of a page (prefixed so they can be split off again)
+STATS_PREFIX = "_stat_"
+WINDOW_STATS_COLUMNS = ",\n            ".join(
+    [f"COUNT(*) OVER () AS {STATS_PREFIX}Total"] + [
+        f"SUM(i.current_status='{status}') OVER () AS `{STATS_PREFIX}{status}`"
+        for status in STATUSES
+    ]
+)
+
+
+@lru_cache(maxsize=512)
+def _list_sql(shape, rank_sql, keyset, limited, with_stats=False):
+    where = " WHERE 1=1 " + "".join(shape)
+
+    if rank_sql:
+        order_by = "relevance DESC, i.issue_id DESC"
+        # HAVING so the relevance alias is compared without re-running MATCH
+        after = " HAVING " + keyset_clause("relevance", "i.issue_id") if keyset else ""
+    else:
+        order_by = "i.created_at DESC, i.issue_id DESC"
+        after = " AND " + keyset_clause("i.created_at", "i.issue_id") if keyset else ""
+
+    stats = f",\n            {WINDOW_STATS_COLUMNS}" if with_stats else ""
+
+    return f"""
+        SELECT{LIST_COLUMNS}
+            {rank_sql or ""}{stats}{LIST_JOINS}
+        {where}{after}
+        ORDER BY {order_by}
+        {"LIMIT %s" if limited else ""}
+    """
+
+
+@lru_cache(maxsize=512)
+def _stats_sql(shape):
+    # Grouped on the status column, which ends most scope indexes
+    # (migrations/007), so the breakdown can be read from the index alone
+    return f"""
+        SELECT i.current_status AS status, COUNT(*) AS total
+        FROM Issues i
+        WHERE 1=1 {"".join(shape)}
+        GROUP BY i.current_status
+    """
+
+
+def list_query(scope, rank_sql=None, rank_params=(), after=None, limit=None):
+    """
+    One page (or, with limit=None, all) of the scoped issues, newest first
+    or by relevance when rank_sql comes from search_filter().
+
+    after: decoded cursor (sort value, issue_id) of the previous page.
+    Returns (sql, params).
+    """
+    sql = _list_sql(scope.shape, rank_sql, after is not None, limit is not None)
+
+    params = list(rank_params) + scope.params
+    if after is not None:
+        params.extend([after[0], after[0], after[1]])
+    if limit is not None:
+        params.append(limit)
+
+    return sql, params
+
+
+def page_with_stats(cursor, scope, rank_sql=None, rank_params=(), limit=None):
+    """
+    First page plus the status breakdown of the whole scope:
+
+    - counter-backed scopes: LIMIT-bounded page + Issue_Status_Counts;
+    - relevance-ranked search: one pass, since every match is read to sort
+      it anyway; window aggregates carry the breakdown on each row;
+    - other scopes (citizen own-or-ward, ...): the page and a grouped scan
+      run at the same time on two pooled connections, the page keeping its
+      LIMIT so it stops after `limit` rows read in index order.
+
+    Returns (rows, stats).
+    """
+    if scope.counter_filters is not None:
+        cursor.execute(*list_query(scope, rank_sql, rank_params, limit=limit))
+        rows = cursor.fetchall()
+        return rows, status_counts.status_totals(cursor, scope.counter_filters, status=scope.status)
+
+    if rank_sql:
+        return _ranked_page_with_stats(cursor, scope, rank_sql, rank_params, limit)
+
+    pending = _submit_scan_stats(scope)
+    cursor.execute(*list_query(scope, limit=limit))
+    rows = cursor.fetchall()
+    # No spare connection: run the scan here instead of waiting for one
+    stats = pending.result() if pending else scan_stats(cursor, scope)
+    return rows, stats
+
+
+def _ranked_page_with_stats(cursor, scope, rank_sql, rank_params, limit):
+    # Not for keyset pages: the HAVING on relevance would narrow the window
+    sql = _list_sql(scope.shape, rank_sql, False, limit is not None, with_stats=True)
+    params = list(rank_params) + scope.params
+    if limit is not None:
+        params.append(limit)
+
+    cursor.execute(sql, params)
+    rows = cursor.fetchall()
+
+    stats = {"Total": 0, **{status: 0 for status in STATUSES}}
+    for row in rows:
+        for key in stats:
+            stats[key] = int(row.pop(STATS_PREFIX + key) or 0)
+
+    return rows, stats
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _stats_executor(pool):
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=pool.capacity, thread_name_prefix="issue-stats"
+                )
+    return _executor
+
+
+def _submit_scan_stats(scope):
+    """
+    Starts scan_stats on a second pooled connection; None when the pool has
+    no connection free right now (the caller then runs it itself).
+    """
+    app = current_app._get_current_object()
+    pool = app.extensions["db_pool"]
+    conn = pool.acquire(wait=False)
+    if conn is None:
+        return None
+
+    def run():
+        try:
+            with app.app_context():
+                cursor = conn.cursor(dictionary=True)
+                try:
+                    return scan_stats(cursor, scope)
+                finally:
+                    cursor.close()
+        finally:
+            pool.release(conn)
+
+    try:
+        return _stats_executor(pool).submit(run)
+    except Exception:
+        pool.release(conn)
+        raise
+
+
+def stats_query(scope):
+    """Status breakdown of the scoped issues. Returns (sql, params)."""
+    return _stats_sql(scope.shape), scope.params
+
+
+def scan_stats(cursor, scope):
+    """
+    Status breakdown by scanning Issues; the fallback when the scope has
+    reporter or search predicates that Issue_Status_Counts cannot answer.
+    """
+    cursor.execute(*stats_query(scope))
+    counts = {status: 0 for status in STATUSES}
+    for row in cursor.fetchall():
+        if not isinstance(row, dict):
+            row = dict(zip(("status", "total"), row))
+        if row["status"] in counts:
+            counts[row["status"]] = int(row["total"])
+    return {"Total": sum(counts.values()), **counts}
+
+
+
+def full_scans(cursor, sql, params):
+    """EXPLAIN rows in which Issues is read with a full table scan."""
+    cursor.execute("EXPLAIN " + sql, params)
+    return [
+        row for row in cursor.fetchall()
+        if row.get("table") == "i" and row.get("type") == "ALL"
+    ]
+
+
+# -------------------------------------------------
+# QUERY SHAPES (EXPLAIN checks)
+# -------------------------------------------------
+SHAPE_ROLES = (
+    "citizen", "facilitator", "field_staff", "municipal_admin",
+    "department_admin", "state_admin", "super_admin"
+)
+
+
+def query_shapes(sample, search):
+    """
+    Every dashboard query shape for each role, filter and search variant,
+    with parameters taken from one sample Issues row (state_id, city_id,
+    ward_id, assigned_department, reported_by, current_status, created_at,
+    issue_id). Yields (description, sql, params).
+    """
+    user = {
+        "state_id": sample["state_id"],
+        "city_id": sample["city_id"],
+        "ward_id": sample["ward_id"],
+        "department_id": sample["assigned_department"]
+    }
+    ui_variants = [
+        {},
+        {"status": sample["current_status"]},
+        {"ward_id": sample["ward_id"]},
+        {"city_id": sample["city_id"], "status": sample["current_status"]},
+        {"department_id": sample["assigned_department"]}
+    ]
+
+    for role in SHAPE_ROLES:
+        for args in ui_variants:
+            for term in (None, search):
+                scope = apply_ui_filters(
+                    role_scope(role, sample["reported_by"], user),
+                    {k: v for k, v in args.items() if v is not None}
+                )
+                search_sql, search_params, rank_sql, rank_params = search_filter(term)
+                if search_sql:
+                    scope.add_sql(search_sql, search_params)
+
+                after = (1.0 if rank_sql else sample["created_at"], sample["issue_id"])
+                limit = DEFAULT_PAGE_SIZE + 1
+                queries = [
+                    ("page", list_query(scope, rank_sql, rank_params, limit=limit)),
+                    ("next page", list_query(scope, rank_sql, rank_params, after=after, limit=limit))
+                ]
+                if scope.counter_filters is None:
+                    queries.append(("stats", stats_query(scope)))
+
+                for label, (sql, params) in queries:
+                    yield f"{role} {args or ''} search={term!r}: {label}", sql, params
@@ -0,0 +1,113 @@
+# utils/issue_scope.py
+"""
+Role-based visibility of Issues, shared by the dashboard, exports and
+anything else that lists issues. SQL fragments assume the alias `i`.
+"""
+
+
+class IssueScope:
+    """
+    Accumulates a WHERE clause over Issues i, plus the same predicates as
+    Issue_Status_Counts filters while the counters can still answer them.
+    """
+
+    def __init__(self):
+        # Static SQL fragments; values only ever go into params
+        self.clauses = []
+        self.params = []
+        # None once a predicate the counters cannot express is added
+        self.counter_filters = []
+        # Every equality filter applied, by counter key (kept regardless)
+        self.filters = {}
+        self.status = None
+
+    @property
+    def shape(self):
+        """Hashable key of the predicate set, independent of the values."""
+        return tuple(self.clauses)
+
+    @property
+    def where(self):
+        return " WHERE 1=1 " + "".join(self.clauses)
+
+    def require(self, column, value, counter_key):
+        self.clauses.append(f" AND {column} = %s")
+        self.params.append(value)
+        self.filters[counter_key] = value
+        if self.counter_filters is not None:
+            self.counter_filters.append((counter_key, value))
+
+    def require_status(self, status):
+        self.clauses.append(" AND i.current_status = %s")
+        self.params.append(status)
+        self.status = status
+
+    def add_sql(self, sql, params):
+        self.clauses.append(sql)
+        self.params.extend(params)
+        self.counter_filters = None
+
+
+def _require_own(scope, column, value, counter_key):
+    # A profile without its location matches nothing rather than everything
+    if value:
+        scope.require(column, value, counter_key)
+    else:
+        scope.add_sql(" AND 1=0", [])
+
+
+def role_scope(role, user_id, user):
+    """
+    user: the caller's Users row (state_id, city_id, ward_id, department_id).
+    Only super_admin is unrestricted.
+    """
+    scope = IssueScope()
+
+    if role == "citizen":
+        # Citizen sees their own issues + all issues in their ward
+        conditions = ["i.reported_by = %s"]
+        params = [user_id]
+        if user.get("ward_id"):
+            conditions.append("i.ward_id = %s")
+            params.append(user["ward_id"])
+        scope.add_sql(" AND (" + " OR ".join(conditions) + ")", params)
+
+    elif role in ["facilitator", "field_staff"]:
+        _require_own(scope, "i.ward_id", user.get("ward_id"), "ward_id")
+
+    elif role == "state_admin":
+        _require_own(scope, "i.state_id", user.get("state_id"), "state_id")
+
+    elif role == "municipal_admin":
+        _require_own(scope, "i.city_id", user.get("city_id"), "city_id")
+
+    elif role == "department_admin":
+        _require_own(scope, "i.assigned_department", user.get("department_id"), "department_id")
+
+    elif role != "super_admin":
+        scope.add_sql(" AND 1=0", [])
+
+    return scope
+
+
+# UI filter arg -> (Issues column, counter key)
+UI_FILTERS = [
+    ("state_id", "i.state_id"),
+    ("city_id", "i.city_id"),
+    ("ward_id", "i.ward_id"),
+    ("department_id", "i.assigned_department")
+]
+
+
+def apply_ui_filters(scope, args):
+    """Narrows a scope with the dashboard dropdowns (request.args)."""
+    for key, column in UI_FILTERS:
+        value = args.get(key)
+        if value:
+            scope.require(column, value, key)
+
+    status = args.get("status")
+    if status:
+        scope.require_status(status)
+
+    return scope
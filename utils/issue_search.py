@@ -0,0 +1,40 @@
+# utils/issue_search.py
+import re
+
+# InnoDB boolean-mode operators; stripped so user input is always literal
+_OPERATORS = re.compile(r'[+\-<>()~*"@]+')
+
+MATCH_EXPR = "MATCH(i.title, i.description) AGAINST (%s IN BOOLEAN MODE)"
+
+
+def boolean_query(term):
+    """
+    "broken street li" -> "+broken* +street* +li*"
+    Every word is required and prefix-matched, which suits type-ahead.
+    """
+    words = _OPERATORS.sub(" ", term).split()
+    return " ".join(f"+{w}*" for w in words)
+
+
+def search_filter(term):
+    """
+    Returns (where_sql, where_params, rank_sql, rank_params) for a search term.
+
+    - Numeric terms are treated as an issue ID (primary key lookup).
+    - Anything else goes through the full-text index on (title, description);
+      rank_sql then selects the relevance score as `relevance`.
+    rank_sql is None when results keep the default recency ordering.
+    """
+    term = (term or "").strip().lstrip("#")
+
+    if term.isdigit():
+        return " AND i.issue_id = %s", [int(term)], None, []
+
+    query = boolean_query(term)
+    if not query:
+        return "", [], None, []
+
+    return (
+        f" AND {MATCH_EXPR}", [query],
+        f", {MATCH_EXPR} AS relevance", [query]
+    )
@@ -0,0 +1,230 @@
+# utils/issue_tree.py
+"""
+In-memory State → City → Ward issue counts by status.
+
+Each process loads the tree once and then follows changes ward by ward:
+Issue_Versions (migrations/009) stamps every ward an issue write touches,
+so a refresh compares those stamps and re-reads Issue_Status_Counts for
+the changed wards only, pushing the differences up through their city and
+state. Subtree rollups ("all wards in city X by status") are then answered
+from memory.
+"""
+import threading
+import time
+from collections import Counter
+
+from flask import current_app
+
+from utils.conditional import ALL_VERSION_SQL
+from utils.db import get_db_connection
+from utils.status_counts import STATUSES
+
+CLOSED_STATUSES = ("Resolved", "Rejected")
+
+LEAF_SQL = """
+    SELECT state_id, city_id, ward_id, status, SUM(total) AS total
+    FROM Issue_Status_Counts
+    {where}
+    GROUP BY state_id, city_id, ward_id, status
+    HAVING SUM(total) <> 0
+"""
+
+
+def summary(counts):
+    """JSON shape of one node: per-status counts plus open / closed totals."""
+    return {
+        "counts": {s: counts.get(s, 0) for s in STATUSES},
+        "open": sum(n for s, n in counts.items() if s not in CLOSED_STATUSES),
+        "resolved": counts.get("Resolved", 0),
+        "rejected": counts.get("Rejected", 0)
+    }
+
+
+class IssueTree:
+    """
+    Status counters for every ward, city and state, plus the whole
+    country. Leaves are keyed by the issue's (state, city, ward); 0 stands
+    for an unset id, like Issue_Status_Counts.
+    """
+
+    def __init__(self):
+        self.leaves = {}             # (state_id, city_id, ward_id) -> Counter
+        self.cities = {}             # city_id -> Counter
+        self.states = {}             # state_id -> Counter
+        self.total = Counter()
+        self.cities_by_state = {}    # state_id -> {city_id}
+        self.leaves_by_city = {}     # city_id -> {(state_id, city_id, ward_id)}
+        self.leaves_by_ward = {}     # ward_id -> {(state_id, city_id, ward_id)}
+
+    def _apply(self, key, counts, sign):
+        state_id, city_id, _ = key
+        for node in (
+            self.total,
+            self.states.setdefault(state_id, Counter()),
+            self.cities.setdefault(city_id, Counter())
+        ):
+            for status, n in counts.items():
+                node[status] += sign * n
+
+    def set_leaf(self, key, counts):
+        """Replaces one leaf and moves its ancestors by the difference."""
+        old = self.leaves.pop(key, None)
+        if old:
+            self._apply(key, old, -1)
+
+        state_id, city_id, ward_id = key
+        if counts:
+            self.leaves[key] = counts
+            self._apply(key, counts, 1)
+            self.cities_by_state.setdefault(state_id, set()).add(city_id)
+            self.leaves_by_city.setdefault(city_id, set()).add(key)
+            self.leaves_by_ward.setdefault(ward_id, set()).add(key)
+        else:
+            self.leaves_by_city.get(city_id, set()).discard(key)
+            self.leaves_by_ward.get(ward_id, set()).discard(key)
+
+    def replace_wards(self, ward_ids, rows):
+        """Swaps in fresh counter rows for every leaf of the given wards."""
+        fresh = {}
+        for r in rows:
+            key = (r["state_id"], r["city_id"], r["ward_id"])
+            fresh.setdefault(key, Counter())[r["status"]] = int(r["total"])
+
+        stale = set()
+        for ward_id in ward_ids:
+            stale |= self.leaves_by_ward.get(ward_id, set())
+
+        for key in stale - set(fresh):
+            self.set_leaf(key, None)
+        for key, counts in fresh.items():
+            self.set_leaf(key, counts)
+
+    # ---- subtree rollups ----
+    def node(self, level, node_id=None):
+        if level == "all":
+            return self.total
+        if level == "state":
+            return self.states.get(node_id, Counter())
+        if level == "city":
+            return self.cities.get(node_id, Counter())
+        return sum(
+            (self.leaves[key] for key in self.leaves_by_ward.get(node_id, ())),
+            Counter()
+        )
+
+    def children(self, level, node_id=None):
+        """[(child level, child id, Counter)] one level down."""
+        if level == "all":
+            return [("state", s, c) for s, c in self.states.items() if +c]
+        if level == "state":
+            return [
+                ("city", city_id, self.cities[city_id])
+                for city_id in self.cities_by_state.get(node_id, ())
+                if +self.cities[city_id]
+            ]
+        if level == "city":
+            wards = {}
+            for key in self.leaves_by_city.get(node_id, ()):
+                wards.setdefault(key[2], Counter()).update(self.leaves[key])
+            return [("ward", ward_id, c) for ward_id, c in wards.items()]
+        return []
+
+
+class IssueTreeCache:
+    """
+    Per-process IssueTree. Issue_Versions is polled at most once every
+    ISSUE_TREE_CHECK_INTERVAL seconds; an unchanged overall stamp costs one
+    scan of the city rows, otherwise only wards whose stamp moved are re-read.
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self._tree = None
+        self._all_version = None
+        self._ward_versions = {}
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The current tree; callers read it under `with cache.lock`."""
+        if self._tree and time.monotonic() - self._checked_at < self.check_interval:
+            return self._tree
+
+        with self._lock:
+            if not (self._tree and time.monotonic() - self._checked_at < self.check_interval):
+                cursor = get_db_connection().cursor(dictionary=True)
+                try:
+                    if self._tree is None:
+                        self._load(cursor)
+                    else:
+                        self._refresh(cursor)
+                finally:
+                    cursor.close()
+                self._checked_at = time.monotonic()
+            return self._tree
+
+    @property
+    def lock(self):
+        return self._lock
+
+    def _versions(self, cursor):
+        # Stamps are read before the counters, so a write landing in between
+        # shows up again on the next poll rather than being missed
+        cursor.execute("SELECT scope_key, version FROM Issue_Versions")
+        versions = {r["scope_key"]: r["version"] for r in cursor.fetchall()}
+        wards = {
+            int(key[5:]): version
+            for key, version in versions.items() if key.startswith("ward:")
+        }
+        overall = sum(v for key, v in versions.items() if key.startswith("city:"))
+        return overall, wards
+
+    def _load(self, cursor):
+        self._all_version, self._ward_versions = self._versions(cursor)
+
+        cursor.execute(LEAF_SQL.format(where=""))
+        tree = IssueTree()
+        tree.replace_wards((), cursor.fetchall())
+        self._tree = tree
+
+    def _refresh(self, cursor):
+        cursor.execute(ALL_VERSION_SQL)
+        row = cursor.fetchone()
+        if row and int(list(row.values())[0]) == self._all_version:
+            return
+
+        all_version, wards = self._versions(cursor)
+        changed = [
+            ward_id for ward_id, version in wards.items()
+            if self._ward_versions.get(ward_id) != version
+        ]
+        if changed:
+            cursor.execute(
+                LEAF_SQL.format(where="WHERE ward_id IN (%s)" % ",".join(["%s"] * len(changed))),
+                changed
+            )
+            self._tree.replace_wards(changed, cursor.fetchall())
+
+        self._all_version, self._ward_versions = all_version, wards
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    app.config.setdefault("ISSUE_TREE_CHECK_INTERVAL", 15)
+    app.extensions["issue_tree"] = IssueTreeCache(app.config["ISSUE_TREE_CHECK_INTERVAL"])
+
+
+def drill_down(level, node_id=None):
+    """
+    (node Counter, [(child level, child id, Counter)]) for one node of the
+    tree: level is "all", "state", "city" or "ward".
+    """
+    cache = current_app.extensions["issue_tree"]
+    tree = cache.get()
+    with cache.lock:
+        return (
+            Counter(tree.node(level, node_id)),
+            [(lvl, cid, Counter(c)) for lvl, cid, c in tree.children(level, node_id)]
+        )
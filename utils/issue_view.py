@@ -0,0 +1,152 @@
+# utils/issue_view.py
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+
+from utils.db import get_db_connection
+
+# Cheap check run on every view: one primary-key row plus two indexed counts.
+# Status changes bump updated_at and add a Status_Updates row; finished
+# thumbnails show up as processed images.
+VERSION_SQL = """
+    SELECT i.updated_at,
+           (SELECT COUNT(*) FROM Status_Updates su
+            WHERE su.issue_id = i.issue_id) AS updates,
+           (SELECT COUNT(im.processed_at) FROM Issue_Images im
+            WHERE im.issue_id = i.issue_id) AS processed_images
+    FROM Issues i
+    WHERE i.issue_id = %s
+"""
+
+# Issue, timeline and images in one round trip (three result sets). The
+# timeline keeps updates whose author is not a user (e.g. SLA sweeps), so
+# its length always matches the count in VERSION_SQL.
+DETAIL_SQL = """
+    SELECT i.*,
+           s.name AS state_name,
+           c.name AS city_name,
+           w.name AS ward_name
+    FROM Issues i
+    LEFT JOIN States s ON i.state_id = s.state_id
+    LEFT JOIN Cities c ON i.city_id = c.city_id
+    LEFT JOIN Wards w ON i.ward_id = w.ward_id
+    WHERE i.issue_id = %s;
+
+    SELECT su.status, su.remarks, su.updated_at, COALESCE(u.name, 'System') AS name
+    FROM Status_Updates su
+    LEFT JOIN Users u ON su.updated_by = u.user_id
+    WHERE su.issue_id = %s
+    ORDER BY su.updated_at ASC;
+
+    SELECT image_file AS file_path, thumb_file, web_file, processed_at
+    FROM Issue_Images
+    WHERE issue_id = %s
+"""
+
+
+class IssueViewCache:
+    """Bounded LRU of assembled issue views, each stored with its version."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, issue_id, version):
+        with self._lock:
+            entry = self._entries.get(issue_id)
+            if not entry or entry[0] != version:
+                return None
+            self._entries.move_to_end(issue_id)
+            return entry[1]
+
+    def put(self, issue_id, version, view):
+        with self._lock:
+            self._entries[issue_id] = (version, view)
+            self._entries.move_to_end(issue_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, issue_id):
+        with self._lock:
+            self._entries.pop(issue_id, None)
+
+
+def _result_sets(cursor, sql, params):
+    """Runs a multi-statement query and returns every result set's rows."""
+    if hasattr(cursor, "fetchsets"):   # Connector/Python 9.2+
+        cursor.execute(sql, params, map_results=True)
+        return [rows for _, rows in cursor.fetchsets()]
+    return [
+        result.fetchall()
+        for result in cursor.execute(sql, params, multi=True)
+        if result.with_rows
+    ]
+
+
+def version_key(issue, timeline, images):
+    """Same tuple VERSION_SQL yields, computed from a loaded view."""
+    return (
+        issue["updated_at"],
+        len(timeline),
+        sum(1 for im in images if im["processed_at"] is not None)
+    )
+
+
+def load_issue_view(cursor, issue_id):
+    """Fetches the whole issue page in one round trip; None if not found."""
+    issue_rows, timeline, images = _result_sets(
+        cursor, DETAIL_SQL, (issue_id, issue_id, issue_id)
+    )
+    if not issue_rows:
+        return None
+    return {"issue": issue_rows[0], "timeline": timeline, "images": images}
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    app.config.setdefault("ISSUE_VIEW_CACHE_SIZE", 1000)
+    app.extensions["issue_view"] = IssueViewCache(app.config["ISSUE_VIEW_CACHE_SIZE"])
+
+
+def issue_version(issue_id):
+    """Current version tuple of an issue, or None if it does not exist."""
+    cursor = get_db_connection().cursor()
+    cursor.execute(VERSION_SQL, (issue_id,))
+    row = cursor.fetchone()
+    cursor.close()
+    return tuple(row) if row else None
+
+
+def issue_view(issue_id, version=None):
+    """
+    {"issue", "timeline", "images"} for the detail page, from memory while
+    the issue's version is unchanged. None if the issue does not exist.
+    """
+    cache = current_app.extensions["issue_view"]
+
+    if version is None:
+        version = issue_version(issue_id)
+        if version is None:
+            return None
+
+    view = cache.get(issue_id, version)
+    if view is not None:
+        return view
+
+    cursor = get_db_connection().cursor(dictionary=True)
+    view = load_issue_view(cursor, issue_id)
+    cursor.close()
+
+    if view is not None:
+        # Keyed by what was actually loaded, which may be newer than `version`
+        cache.put(issue_id, version_key(**view), view)
+    return view
+
+
+def invalidate(issue_id):
+    """Drops this process's copy; other workers notice the version change."""
+    current_app.extensions["issue_view"].invalidate(issue_id)
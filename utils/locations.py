@@ -0,0 +1,219 @@
+# utils/locations.py
+import threading
+import time
+from bisect import bisect_left
+
+from flask import current_app, request, jsonify
+
+from utils.db import get_db_connection
+
+
+def to_id(value):
+    """Parses an id from request args; None when missing or invalid."""
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class LocationSnapshot:
+    """Immutable, fully indexed copy of States → Cities → Wards (+ Departments)."""
+
+    def __init__(self, version, states, cities, wards, departments):
+        self.version = version
+        self.states = states
+        self.states_by_id = {s["state_id"]: s for s in states}
+
+        self.cities = {c["city_id"]: c for c in cities}
+        self.wards = {w["ward_id"]: w for w in wards}
+
+        self.all_cities = cities
+        self.all_wards = wards
+
+        self.cities_by_state = {}
+        for c in cities:
+            self.cities_by_state.setdefault(c["state_id"], []).append(c)
+
+        self.wards_by_city = {}
+        for w in wards:
+            self.wards_by_city.setdefault(w["city_id"], []).append(w)
+
+        self.departments_by_city = {}
+        for d in departments:
+            self.departments_by_city.setdefault(d["city_id"], []).append(d)
+
+        # Type-ahead: sorted (folded name, kind, id) per scope. None holds
+        # everything, ("state", id) a state's cities and wards, ("city", id)
+        # the city itself and its wards.
+        self.prefix_index = {}
+        for c in cities:
+            entry = (c["name"].casefold(), "city", c["city_id"])
+            for scope in (None, ("state", c["state_id"]), ("city", c["city_id"])):
+                self.prefix_index.setdefault(scope, []).append(entry)
+        for w in wards:
+            entry = (w["name"].casefold(), "ward", w["ward_id"])
+            scopes = [None, ("city", w["city_id"])]
+            city = self.cities.get(w["city_id"])
+            if city:
+                scopes.append(("state", city["state_id"]))
+            for scope in scopes:
+                self.prefix_index.setdefault(scope, []).append(entry)
+        for entries in self.prefix_index.values():
+            entries.sort()
+
+    def cities_in_state(self, state_id):
+        return self.cities_by_state.get(state_id, [])
+
+    def wards_in_city(self, city_id):
+        return self.wards_by_city.get(city_id, [])
+
+    def wards_in_state(self, state_id):
+        wards = [
+            w for c in self.cities_in_state(state_id)
+            for w in self.wards_in_city(c["city_id"])
+        ]
+        return sorted(wards, key=lambda w: w["name"])
+
+    def departments_in_city(self, city_id):
+        return self.departments_by_city.get(city_id, [])
+
+    def city_in_state(self, city_id, state_id):
+        city = self.cities.get(city_id)
+        return bool(city) and city["state_id"] == state_id
+
+    def path(self, kind, location_id):
+        """State / City (/ Ward) ids and names for one city or ward."""
+        ward = self.wards.get(location_id) if kind == "ward" else None
+        city = self.cities.get(ward["city_id"] if ward else location_id) or {}
+        state = self.states_by_id.get(city.get("state_id")) or {}
+
+        names = [n for n in (ward and ward["name"], city.get("name"), state.get("name")) if n]
+        return {
+            "kind": kind,
+            "state_id": state.get("state_id"),
+            "state_name": state.get("name"),
+            "city_id": city.get("city_id"),
+            "city_name": city.get("name"),
+            "ward_id": ward["ward_id"] if ward else None,
+            "ward_name": ward["name"] if ward else None,
+            "label": ", ".join(names)
+        }
+
+    def search(self, prefix, kinds=("city", "ward"), scope=None, limit=20):
+        """
+        Cities / wards whose name starts with prefix (case-insensitive),
+        in name order, as path() dicts. scope: None, ("state", id) or ("city", id).
+        """
+        prefix = (prefix or "").strip().casefold()
+        if not prefix:
+            return []
+
+        entries = self.prefix_index.get(scope, [])
+        results = []
+        for n in range(bisect_left(entries, (prefix,)), len(entries)):
+            name, kind, location_id = entries[n]
+            if not name.startswith(prefix):
+                break
+            if kind in kinds:
+                results.append(self.path(kind, location_id))
+                if len(results) >= limit:
+                    break
+        return results
+
+
+class LocationCache:
+    """
+    Per-process hierarchy cache. Location_Version is polled at most once
+    every LOCATION_CACHE_CHECK_INTERVAL seconds; the full hierarchy is only
+    reloaded when that version moves (or after invalidate()).
+    """
+
+    def __init__(self, check_interval):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._checked_at = 0.0
+        self._snapshot = None
+
+    def get(self):
+        snapshot = self._snapshot
+        if snapshot and time.monotonic() - self._checked_at < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+
+            cursor = get_db_connection().cursor(dictionary=True)
+            cursor.execute("SELECT version FROM Location_Version WHERE id = 1")
+            row = cursor.fetchone()
+            version = row["version"] if row else 0
+
+            if not self._snapshot or self._snapshot.version != version:
+                self._snapshot = self._load(cursor, version)
+
+            cursor.close()
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def _load(self, cursor, version):
+        cursor.execute("SELECT state_id, name FROM States ORDER BY name")
+        states = cursor.fetchall()
+
+        cursor.execute("SELECT city_id, name, state_id FROM Cities ORDER BY name")
+        cities = cursor.fetchall()
+
+        cursor.execute("SELECT ward_id, name, city_id FROM Wards ORDER BY name")
+        wards = cursor.fetchall()
+
+        cursor.execute("""
+            SELECT department_id, name, city_id
+            FROM Departments
+            ORDER BY name
+        """)
+        departments = cursor.fetchall()
+
+        return LocationSnapshot(version, states, cities, wards, departments)
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    app.config.setdefault("LOCATION_CACHE_CHECK_INTERVAL", 30)
+    app.extensions["locations"] = LocationCache(
+        app.config["LOCATION_CACHE_CHECK_INTERVAL"]
+    )
+
+
+def hierarchy():
+    """Current LocationSnapshot for this process."""
+    return current_app.extensions["locations"].get()
+
+
+def invalidate():
+    """Drop this process's copy; call after editing the hierarchy in-app."""
+    current_app.extensions["locations"].invalidate()
+
+
+def location_json(tag, build):
+    """
+    JSON response for a dropdown endpoint, tagged with the hierarchy
+    version so unchanged lists are answered with 304 Not Modified.
+    tag must identify the resolved lookup, e.g. "cities-12".
+    """
+    snapshot = hierarchy()
+    etag = f"loc-{snapshot.version}-{tag}"
+
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+    else:
+        response = jsonify(build(snapshot))
+
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,345 @@
+# utils/metrics.py
+"""
+Query and request instrumentation, exposed at /metrics.
+
+Every cursor handed out by the pool is an InstrumentedCursor: each
+execute / executemany is timed, added to the current request's totals and
+to a per-statement-kind histogram, and logged with its normalised SQL when
+it takes longer than SLOW_QUERY_MS. Requests feed per-endpoint latency and
+query-count histograms, and the pool is read as gauges at scrape time.
+
+Figures live in process memory, so with several worker processes each one
+reports its own; scrape them per process or run one worker.
+"""
+import hmac
+import re
+import threading
+import time
+
+from flask import Response, abort, current_app, g, has_request_context, request
+
+METRICS_DEFAULTS = {
+    "SLOW_QUERY_MS": 200,             # queries at or above this are logged
+    "METRICS_TOKEN": None,            # bearer token /metrics requires, when set
+    "METRICS_DEBUG_HEADER": None      # X-DB-Queries / Server-Timing headers; None follows app.debug
+}
+
+# Seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+# Queries per request
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+
+MAX_LOGGED_SQL = 1000
+
+
+# -------------------------------------------------
+# REGISTRY
+# -------------------------------------------------
+def _labels(names, values):
+    if not names:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        )
+        for name, value in zip(names, values)
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, buckets, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self.label_names = label_names
+        self._series = {}    # labels -> [per-bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[n] += 1
+                    break
+            else:
+                series[len(self.buckets)] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, labels + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {series[-1]:.6f}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """
+    Read at scrape time: `read` returns [(label values tuple, value)].
+    kind="counter" for totals another object already keeps.
+    """
+
+    def __init__(self, name, help_text, read, label_names=(), kind="gauge"):
+        self.name = name
+        self.help = help_text
+        self.read = read
+        self.label_names = label_names
+        self.kind = kind
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in self.read():
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# -------------------------------------------------
+# QUERIES
+# -------------------------------------------------
+_STRING = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER = re.compile(r"%s|%\(\w+\)s")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_VALUES_LIST = re.compile(r"(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+")
+_SPACE = re.compile(r"\s+")
+
+
+def normalise_sql(sql):
+    """
+    One line per statement shape: literals and placeholders become ?,
+    IN / VALUES lists collapse to (...), whitespace is squeezed.
+    """
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    sql = _STRING.sub("?", sql)
+    sql = _PLACEHOLDER.sub("?", sql)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("(...)", sql)
+    sql = _VALUES_LIST.sub(r"\1", sql)
+    sql = _SPACE.sub(" ", sql).strip()
+    return sql[:MAX_LOGGED_SQL]
+
+
+def statement_kind(sql):
+    if isinstance(sql, (bytes, bytearray)):
+        sql = sql.decode("utf-8", "replace")
+    words = sql.split(None, 1)
+    return words[0].upper() if words else "UNKNOWN"
+
+
+def record_query(sql, param_count, elapsed, rows=None):
+    """Adds one statement to the request totals, histograms and slow log."""
+    if has_request_context():
+        stats = g.get("db_stats")
+        if stats is not None:
+            stats["queries"] += 1
+            stats["seconds"] += elapsed
+
+    metrics = current_app.extensions.get("metrics")
+    if metrics is None:
+        return
+    kind = statement_kind(sql)
+    metrics.query_seconds.observe(elapsed, kind)
+
+    if elapsed * 1000 >= current_app.config["SLOW_QUERY_MS"]:
+        metrics.slow_queries.inc(kind)
+        current_app.logger.warning(
+            "Slow query %.1f ms (%d params%s, endpoint %s): %s",
+            elapsed * 1000,
+            param_count,
+            f", {rows} rows" if rows is not None else "",
+            request.endpoint if has_request_context() else "-",
+            normalise_sql(sql)
+        )
+
+
+def _param_count(params):
+    return len(params) if params else 0
+
+
+class InstrumentedCursor:
+    """A MySQL cursor whose execute / executemany calls are timed."""
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def execute(self, operation, params=None, **kwargs):
+        started = time.perf_counter()
+        try:
+            # multi=True returns a generator; only sending the batch is timed
+            return self.raw.execute(operation, params, **kwargs)
+        finally:
+            record_query(operation, _param_count(params), time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params):
+        seq_params = list(seq_params)
+        started = time.perf_counter()
+        try:
+            return self.raw.executemany(operation, seq_params)
+        finally:
+            record_query(
+                operation,
+                sum(_param_count(p) for p in seq_params),
+                time.perf_counter() - started,
+                rows=len(seq_params)
+            )
+
+    def __iter__(self):
+        return iter(self.raw)
+
+    def __getattr__(self, name):
+        return getattr(self.raw, name)
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+class AppMetrics:
+    def __init__(self, pool):
+        self.registry = Registry()
+        add = self.registry.add
+
+        self.request_seconds = add(Histogram(
+            "dti_http_request_duration_seconds", "Time to build a response, by endpoint.",
+            LATENCY_BUCKETS, ("endpoint", "method")
+        ))
+        self.requests = add(Counter(
+            "dti_http_requests_total", "Responses sent, by endpoint and status.",
+            ("endpoint", "method", "status")
+        ))
+        self.request_queries = add(Histogram(
+            "dti_http_request_db_queries", "Database queries issued per request.",
+            QUERY_COUNT_BUCKETS, ("endpoint",)
+        ))
+        self.request_db_seconds = add(Histogram(
+            "dti_http_request_db_seconds", "Time spent in database queries per request.",
+            LATENCY_BUCKETS, ("endpoint",)
+        ))
+        self.query_seconds = add(Histogram(
+            "dti_db_query_duration_seconds", "Database statement time, by statement kind.",
+            QUERY_BUCKETS, ("kind",)
+        ))
+        self.slow_queries = add(Counter(
+            "dti_db_slow_queries_total", "Statements at or above SLOW_QUERY_MS.", ("kind",)
+        ))
+
+        add(Gauge(
+            "dti_db_pool_connections", "Pooled connections by state.",
+            lambda: [(("checked_out",), pool.checked_out), (("idle",), pool.idle)],
+            ("state",)
+        ))
+        add(Gauge(
+            "dti_db_pool_capacity", "DB_POOL_SIZE + DB_POOL_MAX_OVERFLOW.",
+            lambda: [((), pool.capacity)]
+        ))
+        add(Gauge(
+            "dti_db_pool_saturation", "Share of the pool's capacity checked out.",
+            lambda: [((), round(pool.checked_out / pool.capacity, 4) if pool.capacity else 0)]
+        ))
+        add(Gauge(
+            "dti_db_pool_waiting", "Requests waiting for a free connection.",
+            lambda: [((), pool.waiting)]
+        ))
+        add(Gauge(
+            "dti_db_pool_timeouts_total", "Checkouts that gave up after DB_POOL_TIMEOUT.",
+            lambda: [((), pool.timeouts)], kind="counter"
+        ))
+
+
+def init_app(app):
+    for key, value in METRICS_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    if app.config["METRICS_DEBUG_HEADER"] is None:
+        app.config["METRICS_DEBUG_HEADER"] = app.debug
+
+    metrics = AppMetrics(app.extensions["db_pool"])
+    app.extensions["metrics"] = metrics
+
+    @app.before_request
+    def start_request_metrics():
+        g.request_started = time.perf_counter()
+        g.db_stats = {"queries": 0, "seconds": 0.0}
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.get("request_started")
+        stats = g.get("db_stats")
+        if started is None or stats is None:
+            return response
+
+        # Endpoint names, not paths, keep the label set bounded
+        endpoint = request.endpoint or "unmatched"
+        metrics.request_seconds.observe(time.perf_counter() - started, endpoint, request.method)
+        metrics.requests.inc(endpoint, request.method, response.status_code)
+        metrics.request_queries.observe(stats["queries"], endpoint)
+        metrics.request_db_seconds.observe(stats["seconds"], endpoint)
+
+        if app.config["METRICS_DEBUG_HEADER"]:
+            response.headers["X-DB-Queries"] = str(stats["queries"])
+            response.headers["X-DB-Time-Ms"] = f"{stats['seconds'] * 1000:.1f}"
+            response.headers["Server-Timing"] = (
+                f'db;dur={stats["seconds"] * 1000:.1f};desc="{stats["queries"]} queries"'
+            )
+        return response
+
+    app.add_url_rule("/metrics", "metrics", metrics_view)
+
+
+def metrics_view():
+    token = current_app.config["METRICS_TOKEN"]
+    if token:
+        supplied = request.headers.get("Authorization", "")
+        if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+            abort(403)
+
+    return Response(
+        current_app.extensions["metrics"].registry.render(),
+        mimetype="text/plain; version=0.0.4"
+    )
@@ -0,0 +1,317 @@
+# utils/notifications.py
+import json
+import os
+import smtplib
+import threading
+from datetime import datetime
+from email.message import EmailMessage
+from itertools import groupby
+
+from flask import current_app
+
+from utils.db import get_db_connection
+
+STALE_AFTER_MINUTES = 10    # a row 'sending' this long belonged to a dead dispatcher
+
+NOTIFY_DEFAULTS = {
+    "NOTIFY_WORKERS": 1,              # dispatcher threads per process
+    "NOTIFY_POLL_INTERVAL": 15,       # seconds between outbox sweeps
+    "NOTIFY_BATCH_SIZE": 100,         # messages claimed per sweep
+    "NOTIFY_COALESCE_SECONDS": 30,    # hold new messages so bursts collapse
+    "NOTIFY_MAX_ATTEMPTS": 5,
+    "NOTIFY_BACKOFF_BASE": 30,        # seconds before the first retry, doubled each time
+    "NOTIFY_BACKOFF_MAX": 3600,
+    "NOTIFY_EMAIL_SINK": "file",      # file | smtp
+    "NOTIFY_SINK_DIR": os.path.join("instance", "outbox"),
+    "NOTIFY_SMTP_HOST": "localhost",
+    "NOTIFY_SMTP_PORT": 1025,
+    "NOTIFY_SMTP_SENDER": "noreply@localhost"
+}
+
+
+# -------------------------------------------------
+# SINKS
+# send_batch(messages) returns one error string (or None) per message
+# -------------------------------------------------
+class FileSink:
+    """Offline stub: appends each message as a JSON line to <dir>/<channel>.log."""
+
+    def __init__(self, directory, channel):
+        self.path = os.path.join(directory, f"{channel}.log")
+
+    def send_batch(self, messages):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as log:
+            for m in messages:
+                log.write(json.dumps({
+                    "sent_at": datetime.now().isoformat(timespec="seconds"),
+                    "to": m["recipient"],
+                    "subject": m["subject"],
+                    "body": m["body"]
+                }) + "\n")
+        return [None] * len(messages)
+
+
+class SMTPSink:
+    """Sends a whole batch over one SMTP connection (e.g. a local debugging server)."""
+
+    def __init__(self, host, port, sender):
+        self.host = host
+        self.port = port
+        self.sender = sender
+
+    def send_batch(self, messages):
+        errors = []
+        with smtplib.SMTP(self.host, self.port, timeout=30) as smtp:
+            for m in messages:
+                msg = EmailMessage()
+                msg["From"] = self.sender
+                msg["To"] = m["recipient"]
+                msg["Subject"] = m["subject"]
+                msg.set_content(m["body"])
+                try:
+                    smtp.send_message(msg)
+                    errors.append(None)
+                except smtplib.SMTPException as e:
+                    errors.append(str(e))
+        return errors
+
+
+def build_sinks(config):
+    directory = config["NOTIFY_SINK_DIR"]
+    # No SMS gateway yet: SMS always goes to the offline stub
+    sinks = {"sms": FileSink(directory, "sms")}
+
+    if config["NOTIFY_EMAIL_SINK"] == "smtp":
+        sinks["email"] = SMTPSink(
+            config["NOTIFY_SMTP_HOST"], config["NOTIFY_SMTP_PORT"], config["NOTIFY_SMTP_SENDER"]
+        )
+    else:
+        sinks["email"] = FileSink(directory, "email")
+
+    return sinks
+
+
+# -------------------------------------------------
+# DISPATCHER
+# -------------------------------------------------
+class NotificationDispatcher:
+    """
+    Delivers Notification_Outbox rows on a daemon thread.
+
+    Rows are claimed with SELECT ... FOR UPDATE SKIP LOCKED (like
+    Image_Jobs), grouped per channel and handed to that channel's sink as
+    one batch. Failures are retried with exponential backoff.
+    """
+
+    def __init__(self, app, sinks):
+        self.app = app
+        self.sinks = sinks
+        self.workers = app.config["NOTIFY_WORKERS"]
+        self.poll_interval = app.config["NOTIFY_POLL_INTERVAL"]
+
+        self._wake = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def notify(self):
+        """Called after a commit that wrote outbox rows."""
+        self.start()
+        self._wake.set()
+
+    def start(self):
+        if self._threads or not self.workers:
+            return
+        with self._lock:
+            if self._threads:
+                return
+            for n in range(self.workers):
+                t = threading.Thread(
+                    target=self._run, name=f"notifications-{n}", daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.poll_interval)
+            self._wake.clear()
+            try:
+                while self.dispatch_pending():
+                    pass
+            except Exception:
+                self.app.logger.exception("Notification dispatch failed")
+
+    def dispatch_pending(self, hold=None):
+        """
+        Claims and delivers one batch of due messages; returns how many.
+        hold overrides NOTIFY_COALESCE_SECONDS (0 sends everything due now).
+        """
+        config = self.app.config
+        if hold is None:
+            hold = config["NOTIFY_COALESCE_SECONDS"]
+
+        with self.app.app_context():
+            messages = self._claim(config["NOTIFY_BATCH_SIZE"], hold)
+            for channel, batch in groupby(messages, key=lambda m: m["channel"]):
+                self._deliver(channel, list(batch))
+            return len(messages)
+
+    def _claim(self, limit, hold):
+        conn = get_db_connection()
+        cursor = conn.cursor(dictionary=True)
+
+        max_attempts = self.app.config["NOTIFY_MAX_ATTEMPTS"]
+
+        # A stale row that used every attempt may be what crashed the
+        # dispatcher, and may already have gone out: stop re-sending it
+        cursor.execute("""
+            UPDATE Notification_Outbox
+            SET status='failed', last_error='Dispatcher stopped while sending this message'
+            WHERE status = 'sending'
+              AND updated_at < NOW() - INTERVAL %s MINUTE
+              AND attempts >= %s
+        """, (STALE_AFTER_MINUTES, max_attempts))
+
+        cursor.execute("""
+            SELECT message_id, channel, recipient, subject, body, attempts
+            FROM Notification_Outbox
+            WHERE (status = 'pending'
+                   AND next_attempt_at <= NOW()
+                   AND created_at <= NOW() - INTERVAL %s SECOND)
+               OR (status = 'sending'
+                   AND updated_at < NOW() - INTERVAL %s MINUTE
+                   AND attempts < %s)
+            ORDER BY channel, message_id
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        """, (hold, STALE_AFTER_MINUTES, max_attempts, limit))
+        messages = cursor.fetchall()
+
+        if messages:
+            ids = [m["message_id"] for m in messages]
+            cursor.execute(
+                "UPDATE Notification_Outbox SET status='sending', attempts=attempts+1 "
+                "WHERE message_id IN (%s)" % ",".join(["%s"] * len(ids)),
+                ids
+            )
+
+        conn.commit()
+        cursor.close()
+        return messages
+
+    def _deliver(self, channel, messages):
+        config = self.app.config
+
+        try:
+            errors = self.sinks[channel].send_batch(messages)
+        except Exception as e:
+            self.app.logger.warning("%s sink failed for %d message(s): %s", channel, len(messages), e)
+            errors = [str(e)] * len(messages)
+
+        sent, retry = [], []
+        for m, error in zip(messages, errors):
+            if error is None:
+                sent.append(m["message_id"])
+                continue
+            # attempts was already incremented when the message was claimed
+            attempts = m["attempts"] + 1
+            status = "failed" if attempts >= config["NOTIFY_MAX_ATTEMPTS"] else "pending"
+            delay = min(config["NOTIFY_BACKOFF_BASE"] * 2 ** (attempts - 1), config["NOTIFY_BACKOFF_MAX"])
+            retry.append((status, error[:255], delay, m["message_id"]))
+
+        conn = get_db_connection()
+        cursor = conn.cursor()
+
+        if sent:
+            cursor.execute(
+                "UPDATE Notification_Outbox SET status='sent', last_error=NULL "
+                "WHERE message_id IN (%s)" % ",".join(["%s"] * len(sent)),
+                sent
+            )
+        if retry:
+            cursor.executemany("""
+                UPDATE Notification_Outbox
+                SET status=%s, last_error=%s, next_attempt_at = NOW() + INTERVAL %s SECOND
+                WHERE message_id=%s
+            """, retry)
+
+        conn.commit()
+        cursor.close()
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in NOTIFY_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    dispatcher = NotificationDispatcher(app, build_sinks(app.config))
+    app.extensions["notifications"] = dispatcher
+
+    # Started with the first request, so messages left in the outbox by a
+    # restart go out without waiting for the next status change
+    app.before_request(dispatcher.start)
+
+
+def _coalesce(cursor, issue_id):
+    """
+    A newer status update supersedes the reporter's messages about the same
+    issue that have not gone out yet. The issue row is locked by the caller,
+    so concurrent updates to one issue cannot interleave here.
+    """
+    cursor.execute("""
+        UPDATE Notification_Outbox o
+        JOIN Issues i ON i.issue_id = o.issue_id
+        JOIN Users u ON u.user_id = i.reported_by
+        SET o.status = 'coalesced'
+        WHERE o.issue_id = %s
+          AND o.status = 'pending'
+          AND o.recipient IN (u.mobile, u.email)
+    """, (issue_id,))
+
+
+def enqueue_status_change(cursor, issue_id, status, remarks=None):
+    """
+    Queues SMS + email to the issue's reporter; run inside the status
+    change's transaction so the message exists iff the change commits.
+    """
+    _coalesce(cursor, issue_id)
+
+    body_sql = """CONCAT('Issue #', i.issue_id, ' "', i.title, '" is now ', %s,
+                          COALESCE(CONCAT(' - ', NULLIF(%s, '')), ''))"""
+    subject = f"Issue #{issue_id}: {status}"
+
+    cursor.execute(f"""
+        INSERT INTO Notification_Outbox (channel, recipient, issue_id, subject, body)
+        SELECT 'sms', u.mobile, i.issue_id, %s, {body_sql}
+        FROM Issues i
+        JOIN Users u ON u.user_id = i.reported_by
+        WHERE i.issue_id = %s AND u.mobile <> ''
+        UNION ALL
+        SELECT 'email', u.email, i.issue_id, %s, {body_sql}
+        FROM Issues i
+        JOIN Users u ON u.user_id = i.reported_by
+        WHERE i.issue_id = %s AND u.email <> ''
+    """, (
+        subject, status, remarks, issue_id,
+        subject, status, remarks, issue_id
+    ))
+
+
+def enqueue_assignment(cursor, issue_id, department_id, deadline=None):
+    """Queues an email to the admins of the department an issue was assigned to."""
+    cursor.execute("""
+        INSERT INTO Notification_Outbox (channel, recipient, issue_id, subject, body)
+        SELECT 'email', u.email, i.issue_id, %s,
+               CONCAT('Issue #', i.issue_id, ' "', i.title, '" was assigned to your department',
+                      COALESCE(CONCAT(', due ', NULLIF(%s, '')), ''), '.')
+        FROM Issues i
+        JOIN Users u ON u.department_id = %s AND u.role = 'department_admin'
+        WHERE i.issue_id = %s AND u.email <> ''
+    """, (f"New issue #{issue_id} assigned", deadline, department_id, issue_id))
+
+
+def notify():
+    """Starts / wakes the dispatcher; call after the enqueuing transaction commits."""
+    current_app.extensions["notifications"].notify()
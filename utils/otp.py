@@ -1,84 +1,303 @@
 # utils/otp.py
-import random
+"""
+One-time passwords for signup / password reset.
+
+OTPs are short-lived and rewritten on every request, so by default they
+live in process memory instead of MySQL; an OTP flood never reaches the
+primary database. Backends (OTP_BACKEND):
+
+- "memory"   : per-process dict; the default, for a single worker
+- "redis"    : shared store (OTP_REDIS_URL) for multi-worker deployments
+- "database" : the original OTP_Verification table
+
+Every backend also provides the sliding-window rate limits applied to OTP
+generation (per mobile and per client IP) and to verification attempts
+(per mobile and client). Only Redis shares them between processes; the
+other backends keep them in memory, never in MySQL. Behind a reverse
+proxy set TRUSTED_PROXY_HOPS (see app.py) so the client IP is the real one.
+"""
+import hashlib
+import hmac
+import secrets
+import threading
+import time
+from collections import deque
 from datetime import datetime, timedelta
+
+from flask import current_app, request, session
+
 from utils.db import get_db_connection
 
+try:
+    import redis
+except ImportError:  # only needed for OTP_BACKEND = "redis"
+    redis = None
 
-def generate_otp(mobile):
-    """Generates a 6-digit OTP and stores it in DB with 1 min expiry"""
+OTP_DEFAULTS = {
+    "OTP_BACKEND": "memory",
+    "OTP_REDIS_URL": "redis://localhost:6379/0",
+    "OTP_TTL": 60,                # seconds an OTP stays valid
+    "OTP_MOBILE_LIMIT": 3,        # OTPs per mobile ...
+    "OTP_MOBILE_WINDOW": 900,     # ... per this many seconds
+    "OTP_IP_LIMIT": 10,           # OTP requests per client IP ...
+    "OTP_IP_WINDOW": 3600,        # ... per this many seconds
+    "OTP_VERIFY_LIMIT": 5,        # verification attempts per mobile and client ...
+    "OTP_VERIFY_WINDOW": 900,     # ... per this many seconds
+    "OTP_CODE_GUESSES": 10,       # wrong guesses, from any client, before a code is burnt
+    "OTP_SWEEP_INTERVAL": 60      # seconds between expiry sweeps (memory)
+}
 
-    otp = f"{random.randint(100000, 999999)}"
-    expires_at = datetime.now() + timedelta(minutes=1)
+# verify_otp() failure reasons
+EXPIRED = "expired"
+INVALID = "invalid"
+RATE_LIMITED = "rate_limited"
 
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    # Clean any previous OTPs for this mobile (single active OTP rule)
-    cursor.execute("""
-        DELETE FROM OTP_Verification
-        WHERE mobile = %s
-    """, (mobile,))
+class OTPRateLimited(Exception):
+    """Too many OTP requests for this mobile number or client."""
 
-    # Insert new OTP
-    cursor.execute("""
-        INSERT INTO OTP_Verification (mobile, otp_code, expires_at)
-        VALUES (%s, %s, %s)
-    """, (mobile, otp, expires_at))
 
-    conn.commit()
-    cursor.close()
-    conn.close()
+class LocalRateLimiter:
+    """
+    Sliding-window counters in process memory. Only allowed hits are
+    recorded, so a blocked client is let in again as soon as its oldest
+    hit leaves the window.
+    """
 
-    return otp
+    def __init__(self, sweep_interval):
+        self.sweep_interval = sweep_interval
+        self._hits = {}                 # key -> (window, deque of timestamps)
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
 
+    def allow(self, key, limit, window):
+        now = time.monotonic()
+        with self._lock:
+            self._maybe_sweep(now)
+            _, hits = self._hits.setdefault(key, (window, deque()))
+            while hits and hits[0] <= now - window:
+                hits.popleft()
+            if len(hits) >= limit:
+                return False
+            hits.append(now)
+            return True
 
-def verify_otp(mobile, otp_input):
-    """Verifies OTP and deletes all OTPs on success or expiry"""
+    def _maybe_sweep(self, now):
+        """Drops idle windows; called with the lock held."""
+        if now - self._swept_at < self.sweep_interval:
+            return
+        self._swept_at = now
+        stale = [
+            key for key, (window, hits) in self._hits.items()
+            if not hits or hits[-1] <= now - window
+        ]
+        for key in stale:
+            del self._hits[key]
+        self._sweep(now)
 
-    conn = get_db_connection()
-    cursor = conn.cursor(dictionary=True)
+    def _sweep(self, now):
+        pass
 
-    # Fetch latest OTP for this mobile
-    cursor.execute("""
-        SELECT *
-        FROM OTP_Verification
-        WHERE mobile = %s
-        ORDER BY created_at DESC
-        LIMIT 1
-    """, (mobile,))
 
-    record = cursor.fetchone()
+class MemoryOTPStore(LocalRateLimiter):
+    """Single active OTP per mobile, expiring after its TTL."""
+
+    def __init__(self, sweep_interval):
+        super().__init__(sweep_interval)
+        self._codes = {}                # mobile -> (code, expires_at)
+
+    def save(self, mobile, code, ttl):
+        with self._lock:
+            self._maybe_sweep(time.monotonic())
+            self._codes[mobile] = (code, time.monotonic() + ttl)
+
+    def get(self, mobile):
+        with self._lock:
+            entry = self._codes.get(mobile)
+            if not entry:
+                return None
+            code, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del self._codes[mobile]
+                return None
+            return code
+
+    def delete(self, mobile):
+        with self._lock:
+            self._codes.pop(mobile, None)
+
+    def _sweep(self, now):
+        expired = [m for m, (_, expires_at) in self._codes.items() if expires_at <= now]
+        for mobile in expired:
+            del self._codes[mobile]
 
-    if not record:
-        cursor.close()
-        conn.close()
-        return False, "OTP not found"
 
-    # Expired OTP → cleanup
-    if record["expires_at"] < datetime.now():
+class DatabaseOTPStore(LocalRateLimiter):
+    """OTP_Verification table (rate limits kept in memory, off the primary)."""
+
+    def save(self, mobile, code, ttl):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        # enforce single active OTP
+        cursor.execute("DELETE FROM OTP_Verification WHERE mobile=%s", (mobile,))
         cursor.execute("""
-            DELETE FROM OTP_Verification
-            WHERE mobile = %s
-        """, (mobile,))
+            INSERT INTO OTP_Verification (mobile, otp_code, expires_at)
+            VALUES (%s, %s, %s)
+        """, (mobile, code, datetime.now() + timedelta(seconds=ttl)))
         conn.commit()
         cursor.close()
-        conn.close()
-        return False, "OTP expired"
 
-    # Wrong OTP
-    if record["otp_code"] != otp_input:
+    def get(self, mobile):
+        cursor = get_db_connection().cursor(dictionary=True)
+        cursor.execute("""
+            SELECT otp_code
+            FROM OTP_Verification
+            WHERE mobile=%s AND expires_at > %s
+            ORDER BY expires_at DESC
+            LIMIT 1
+        """, (mobile, datetime.now()))
+        record = cursor.fetchone()
+        cursor.close()
+        return record["otp_code"] if record else None
+
+    def delete(self, mobile):
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM OTP_Verification WHERE mobile=%s", (mobile,))
+        conn.commit()
         cursor.close()
-        conn.close()
-        return False, "Invalid OTP"
 
-    # ✅ Correct OTP → CLEANUP
-    cursor.execute("""
-        DELETE FROM OTP_Verification
-        WHERE mobile = %s
-    """, (mobile,))
-    conn.commit()
 
-    cursor.close()
-    conn.close()
+# Prune, count and record in one step, so concurrent requests cannot all
+# pass the check before any of them is added
+ALLOW_SCRIPT = """
+local now, window, limit = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, now - window)
+if redis.call('ZCARD', KEYS[1]) >= limit then
+    return 0
+end
+redis.call('ZADD', KEYS[1], now, ARGV[4])
+redis.call('EXPIRE', KEYS[1], math.ceil(window) + 1)
+return 1
+"""
+
+
+class RedisOTPStore:
+    """Redis (or compatible) keys with native expiry; rate limits in sorted sets."""
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url, decode_responses=True)
+        self._allow = self.client.register_script(ALLOW_SCRIPT)
+
+    def save(self, mobile, code, ttl):
+        self.client.set(f"otp:{mobile}", code, ex=ttl)
+
+    def get(self, mobile):
+        return self.client.get(f"otp:{mobile}")
+
+    def delete(self, mobile):
+        self.client.delete(f"otp:{mobile}")
+
+    def allow(self, key, limit, window):
+        now = time.time()
+        return bool(self._allow(
+            keys=[f"otp-rate:{key}"],
+            args=[now, window, limit, f"{now}:{secrets.token_hex(4)}"]
+        ))
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in OTP_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    backend = app.config["OTP_BACKEND"]
+    if backend == "memory":
+        store = MemoryOTPStore(app.config["OTP_SWEEP_INTERVAL"])
+    elif backend == "database":
+        store = DatabaseOTPStore(app.config["OTP_SWEEP_INTERVAL"])
+    elif backend == "redis":
+        if redis is None:
+            raise RuntimeError("OTP_BACKEND is 'redis' but the redis package is not installed.")
+        store = RedisOTPStore(app.config["OTP_REDIS_URL"])
+    else:
+        raise RuntimeError(f"Unknown OTP_BACKEND {backend!r}.")
+
+    app.extensions["otp"] = store
+
+
+def _store():
+    return current_app.extensions["otp"]
+
+
+def client_ip():
+    """The caller's address (the forwarded one when TRUSTED_PROXY_HOPS is set)."""
+    return request.remote_addr
+
+
+def client_key():
+    """Who is verifying: the client IP, else this browser session."""
+    ip = client_ip()
+    if ip:
+        return f"ip:{ip}"
+    if "otp_client" not in session:
+        session["otp_client"] = secrets.token_hex(8)
+    return f"session:{session['otp_client']}"
+
+
+def generate_otp(mobile, client_ip=None):
+    """
+    Creates a 6-digit OTP for mobile, replacing any earlier one.
+    Raises OTPRateLimited when the mobile or client IP is over its limit;
+    the IP limit is skipped when client_ip is None.
+    """
+    config = current_app.config
+    store = _store()
+
+    if client_ip and not store.allow(f"ip:{client_ip}", config["OTP_IP_LIMIT"], config["OTP_IP_WINDOW"]):
+        raise OTPRateLimited("Too many OTP requests from your network. Please try again later.")
+    if not store.allow(f"mobile:{mobile}", config["OTP_MOBILE_LIMIT"], config["OTP_MOBILE_WINDOW"]):
+        raise OTPRateLimited("Too many OTPs sent to this number. Please try again later.")
+
+    otp = f"{secrets.randbelow(900000) + 100000}"
+    store.save(mobile, otp, config["OTP_TTL"])
+    return otp
+
+
+def _guess_key(mobile, code):
+    # Counted per issued code, but the live code must not appear in a key
+    digest = hmac.new(
+        current_app.config["SECRET_KEY"].encode(), f"{mobile}:{code}".encode(), hashlib.sha256
+    ).hexdigest()
+    return f"guess:{digest}"
+
+
+def verify_otp(mobile, otp_input, client):
+    """
+    Returns (True, None) and consumes the OTP when it matches, otherwise
+    (False, EXPIRED | INVALID | RATE_LIMITED).
+
+    Attempts are limited per mobile *and* client (see client_key), so a
+    stranger cannot lock the owner out; a code that collects
+    OTP_CODE_GUESSES wrong guesses from anyone is discarded.
+    """
+    config = current_app.config
+    store = _store()
+
+    if not store.allow(f"verify:{mobile}:{client}", config["OTP_VERIFY_LIMIT"], config["OTP_VERIFY_WINDOW"]):
+        return False, RATE_LIMITED
+
+    code = store.get(mobile)
+    if code is None:
+        return False, EXPIRED
+
+    if not hmac.compare_digest(code.encode(), otp_input.strip().encode()):
+        if not store.allow(_guess_key(mobile, code), config["OTP_CODE_GUESSES"] - 1, config["OTP_TTL"]):
+            store.delete(mobile)
+            return False, EXPIRED
+        return False, INVALID
 
-    return True, "OTP verified"
+    store.delete(mobile)
+    return True, None
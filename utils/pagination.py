@@ -0,0 +1,66 @@
+# utils/pagination.py
+import base64
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+def page_size_from(value):
+    """Parse a ?limit= value, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def encode_cursor(sort_value, row_id):
+    """
+    Opaque cursor for keyset pagination on (sort_value, id).
+    sort_value is a datetime (recency order) or a number (relevance order).
+    """
+    if isinstance(sort_value, datetime):
+        raw = f"t{sort_value.isoformat()}|{row_id}"
+    else:
+        raw = f"r{float(sort_value)!r}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Returns (sort_value, id); raises ValueError on a malformed cursor."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        sort_value, row_id = raw.split("|", 1)
+        kind, sort_value = sort_value[0], sort_value[1:]
+        if kind == "t":
+            return datetime.fromisoformat(sort_value), int(row_id)
+        if kind == "r":
+            return float(sort_value), int(row_id)
+        raise ValueError(kind)
+    except (UnicodeError, ValueError, TypeError, IndexError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def keyset_clause(sort_col, id_col, descending=True):
+    """
+    Fragment selecting rows strictly after the cursor
+    for ORDER BY sort_col DESC, id_col DESC (ASC, ASC with descending=False).
+    Params: (sort_value, sort_value, id).
+    """
+    op = "<" if descending else ">"
+    return f"({sort_col} {op} %s OR ({sort_col} = %s AND {id_col} {op} %s))"
+
+
+def split_page(rows, page_size, sort_key="created_at", id_key="issue_id"):
+    """
+    Rows are fetched with LIMIT page_size + 1; the extra row only
+    signals that another page exists.
+    Returns (rows, next_cursor).
+    """
+    if len(rows) <= page_size:
+        return rows, None
+
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_key], last[id_key])
@@ -0,0 +1,278 @@
+# utils/resolution_stats.py
+"""
+Resolution-time percentiles per department or ward.
+
+MySQL collapses every issue's Status_Updates timeline into one row of stage
+timestamps (reported / assigned / resolved, plus the deadline); the rows
+are streamed into column arrays in batches and the durations, medians,
+p90s and on-time shares are computed over whole arrays with NumPy.
+Results are cached per scope for RESOLUTION_STATS_TTL seconds.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+from utils.db import get_db_connection
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the pure-Python path gives the same numbers
+    np = None
+
+RESOLUTION_DEFAULTS = {
+    "RESOLUTION_STATS_TTL": 600,          # seconds a scope's figures are reused
+    "RESOLUTION_STATS_CACHE_SIZE": 256,   # cached (scope, grouping, window) entries
+    "RESOLUTION_FETCH_SIZE": 50000        # timeline rows pulled per fetch
+}
+
+PERCENTILES = (50, 90)
+
+# Stage durations reported, as (name, from column, to column)
+STAGES = (
+    ("to_assign", "reported_at", "assigned_at"),
+    ("to_resolve", "assigned_at", "resolved_at"),
+    ("total", "reported_at", "resolved_at")
+)
+
+# Grouping (request arg) -> Issues column
+GROUPINGS = {
+    "department": "i.assigned_department",
+    "ward": "i.ward_id"
+}
+
+# Analytics filter key -> Issues column
+FILTER_COLUMNS = {
+    "state_id": "i.state_id",
+    "city_id": "i.city_id",
+    "ward_id": "i.ward_id",
+    "department_id": "i.assigned_department",
+    "category": "i.category"
+}
+
+# One row per issue; the covering (issue_id, status, updated_at) index
+# from migrations/012 answers the MIN()s without touching remarks.
+TIMELINE_SQL = """
+    SELECT COALESCE({group_column}, 0) AS group_key,
+           UNIX_TIMESTAMP(COALESCE(
+               MIN(CASE WHEN su.status = 'Reported' THEN su.updated_at END),
+               i.created_at)) AS reported_at,
+           UNIX_TIMESTAMP(MIN(CASE WHEN su.status = 'Assigned' THEN su.updated_at END)) AS assigned_at,
+           UNIX_TIMESTAMP(MIN(CASE WHEN su.status = 'Resolved' THEN su.updated_at END)) AS resolved_at,
+           UNIX_TIMESTAMP(i.deadline) AS deadline_at
+    FROM Issues i
+    LEFT JOIN Status_Updates su ON su.issue_id = i.issue_id
+    WHERE i.created_at >= NOW() - INTERVAL %s DAY{where}
+    GROUP BY i.issue_id
+"""
+
+COLUMNS = ("group_key", "reported_at", "assigned_at", "resolved_at", "deadline_at")
+
+
+# -------------------------------------------------
+# LOADING
+# -------------------------------------------------
+def timeline_query(by, filters, days):
+    """(sql, params) for the per-issue stage timestamps in a scope."""
+    clauses, params = [], [days]
+    for key, value in filters.items():
+        clauses.append(f" AND {FILTER_COLUMNS[key]} = %s")
+        params.append(value)
+    sql = TIMELINE_SQL.format(group_column=GROUPINGS[by], where="".join(clauses))
+    return sql, params
+
+
+def _number(value):
+    return math.nan if value is None else float(value)
+
+
+def load_columns(cursor, sql, params, fetch_size):
+    """
+    Runs a timeline query and returns {column: sequence}: float64 arrays
+    (NaN for missing stages) with NumPy, plain lists without it.
+    """
+    cursor.execute(sql, params)
+    chunks = {c: [] for c in COLUMNS}
+
+    while True:
+        rows = cursor.fetchmany(fetch_size)
+        if not rows:
+            break
+        for n, column in enumerate(COLUMNS):
+            values = [_number(r[n]) for r in rows]
+            chunks[column].append(np.array(values, dtype=np.float64) if np else values)
+
+    if np is None:
+        return {c: [v for part in parts for v in part] for c, parts in chunks.items()}
+    return {
+        c: np.concatenate(parts) if parts else np.empty(0, dtype=np.float64)
+        for c, parts in chunks.items()
+    }
+
+
+# -------------------------------------------------
+# SUMMARIES
+# durations are reported in hours
+# -------------------------------------------------
+def _summarise_numpy(columns):
+    keys = columns["group_key"].astype(np.int64)
+    durations = {
+        name: (columns[end] - columns[start]) / 3600.0
+        for name, start, end in STAGES
+    }
+    resolved = ~np.isnan(columns["resolved_at"])
+    with_deadline = resolved & ~np.isnan(columns["deadline_at"])
+    on_time = with_deadline & (columns["resolved_at"] <= columns["deadline_at"])
+
+    # Sort once; every group is then a contiguous slice
+    order = np.argsort(keys, kind="stable")
+    keys = keys[order]
+    group_keys, starts, counts = np.unique(keys, return_index=True, return_counts=True)
+
+    sorted_durations = {name: d[order] for name, d in durations.items()}
+    if len(keys):
+        flags = np.stack([resolved, with_deadline, on_time])[:, order].astype(np.int64)
+        resolved_n, deadline_n, on_time_n = np.add.reduceat(flags, starts, axis=1)
+
+    groups = []
+    for g, key in enumerate(group_keys):
+        lo, hi = starts[g], starts[g] + counts[g]
+        stats = {}
+        for name, values in sorted_durations.items():
+            values = values[lo:hi]
+            values = values[~np.isnan(values)]
+            stats[name] = (
+                dict(zip(
+                    (f"p{p}" for p in PERCENTILES),
+                    (round(float(v), 2) for v in np.percentile(values, PERCENTILES))
+                ))
+                if len(values) else None
+            )
+        groups.append(_group(
+            int(key), int(counts[g]), int(resolved_n[g]),
+            int(deadline_n[g]), int(on_time_n[g]), stats
+        ))
+    return groups
+
+
+def _percentile(sorted_values, p):
+    """Linear interpolation between closest ranks (NumPy's default method)."""
+    position = (len(sorted_values) - 1) * p / 100
+    lower = math.floor(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def _summarise_python(columns):
+    by_key = {}
+    for n, key in enumerate(columns["group_key"]):
+        by_key.setdefault(int(key), []).append(n)
+
+    groups = []
+    for key in sorted(by_key):
+        rows = by_key[key]
+        stats = {}
+        for name, start, end in STAGES:
+            values = sorted(
+                (columns[end][n] - columns[start][n]) / 3600.0 for n in rows
+                if not (math.isnan(columns[end][n]) or math.isnan(columns[start][n]))
+            )
+            stats[name] = (
+                {f"p{p}": round(_percentile(values, p), 2) for p in PERCENTILES}
+                if values else None
+            )
+
+        resolved = [n for n in rows if not math.isnan(columns["resolved_at"][n])]
+        with_deadline = [n for n in resolved if not math.isnan(columns["deadline_at"][n])]
+        on_time = [n for n in with_deadline if columns["resolved_at"][n] <= columns["deadline_at"][n]]
+        groups.append(_group(key, len(rows), len(resolved), len(with_deadline), len(on_time), stats))
+    return groups
+
+
+def _group(key, issues, resolved, with_deadline, on_time, stats):
+    return {
+        "key": key,
+        "issues": issues,
+        "resolved": resolved,
+        "on_time_rate": round(on_time / with_deadline, 3) if with_deadline else None,
+        **stats
+    }
+
+
+def summarise(columns):
+    """Per-group counts, on-time share and p50 / p90 hours for each stage."""
+    if np is not None:
+        return _summarise_numpy(columns)
+    return _summarise_python(columns)
+
+
+# -------------------------------------------------
+# CACHE
+# -------------------------------------------------
+class TTLCache:
+    """Bounded LRU whose entries expire after `ttl` seconds."""
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if not entry:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in RESOLUTION_DEFAULTS.items():
+        app.config.setdefault(key, value)
+    app.extensions["resolution_stats"] = TTLCache(
+        app.config["RESOLUTION_STATS_CACHE_SIZE"], app.config["RESOLUTION_STATS_TTL"]
+    )
+    if np is None:
+        app.logger.warning(
+            "NumPy is not installed; resolution-time analytics use the per-row Python summary"
+        )
+
+
+def resolution_stats(by, filters, days):
+    """
+    Summaries for issues created in the last `days` days within `filters`
+    (analytics filter keys), grouped by department or ward.
+    """
+    cache = current_app.extensions["resolution_stats"]
+    key = (by, days, tuple(sorted(filters.items())))
+
+    groups = cache.get(key)
+    if groups is not None:
+        return groups
+
+    sql, params = timeline_query(by, filters, days)
+    cursor = get_db_connection().cursor()
+    try:
+        columns = load_columns(cursor, sql, params, current_app.config["RESOLUTION_FETCH_SIZE"])
+    finally:
+        cursor.close()
+
+    groups = summarise(columns)
+    cache.put(key, groups)
+    return groups
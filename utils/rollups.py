@@ -0,0 +1,337 @@
+# utils/rollups.py
+"""
+Daily issue aggregates for the admin analytics charts.
+
+Triggers on Issues (migrations/011) queue one Issue_Events row per status,
+location, department or category change. roll_up() drains that queue in
+batches and folds it into Issue_Daily_Rollups (per day and key) and
+Issue_Rollup_Totals (issues currently in each status), so the chart
+endpoints read a bounded range of pre-aggregated rows no matter how much
+history Issues and Status_Updates hold.
+"""
+import threading
+import time
+from datetime import date, timedelta
+
+from flask import current_app
+
+from utils.db import get_db_connection
+
+ROLLUP_DEFAULTS = {
+    "ROLLUP_WORKER": True,          # run the rollup thread inside web workers
+    "ROLLUP_INTERVAL": 60,          # seconds between queue drains
+    "ROLLUP_BATCH_SIZE": 5000,      # events folded per transaction
+    "ROLLUP_MAX_DAYS": 365          # longest range the chart endpoints serve
+}
+
+# Key columns shared by Issue_Events, Issue_Daily_Rollups and Issue_Rollup_Totals
+KEY_COLUMNS = ("state_id", "city_id", "ward_id", "department_id", "category", "status")
+
+# Series reported by daily_series(): status entered -> series name
+ENTERED_SERIES = {
+    "Reported": "reported",
+    "Assigned": "assigned",
+    "Resolved": "resolved",
+    "Rejected": "rejected"
+}
+
+CLOSED_STATUSES = ("Resolved", "Rejected")
+
+# Breakdown dimension (request arg) -> rollup column
+BREAKDOWNS = {
+    "state": "state_id",
+    "city": "city_id",
+    "ward": "ward_id",
+    "department": "department_id",
+    "category": "category",
+    "status": "status"
+}
+
+
+# -------------------------------------------------
+# ROLLUP JOB
+# -------------------------------------------------
+def _aggregate(events):
+    """Sums a batch of events into daily and total deltas per key."""
+    daily, totals = {}, {}
+    for e in events:
+        key = tuple(e[c] for c in KEY_COLUMNS)
+        entered, net = daily.get((e["event_date"],) + key, (0, 0))
+        daily[(e["event_date"],) + key] = (entered + e["entered"], net + e["net"])
+        totals[key] = totals.get(key, 0) + e["net"]
+    return daily, totals
+
+
+def roll_up(batch_size=None):
+    """
+    Folds queued Issue_Events into the rollup tables, one batch per
+    transaction, and returns how many events were consumed.
+
+    Events are claimed with FOR UPDATE SKIP LOCKED and deleted in the same
+    transaction as the upserts, so concurrent runs never count an event
+    twice and an event from a transaction that commits late is simply
+    picked up by the next run.
+    """
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    if batch_size is None:
+        batch_size = current_app.config["ROLLUP_BATCH_SIZE"]
+
+    consumed = 0
+    try:
+        while True:
+            cursor.execute("""
+                SELECT event_id, event_date, state_id, city_id, ward_id,
+                       department_id, category, status, entered, net
+                FROM Issue_Events
+                ORDER BY event_id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+            """, (batch_size,))
+            events = cursor.fetchall()
+            if not events:
+                break
+
+            daily, totals = _aggregate(events)
+            cursor.executemany("""
+                INSERT INTO Issue_Daily_Rollups
+                    (day, state_id, city_id, ward_id, department_id, category, status, entered, net)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s)
+                ON DUPLICATE KEY UPDATE
+                    entered = entered + VALUES(entered),
+                    net = net + VALUES(net)
+            """, [key + delta for key, delta in daily.items()])
+
+            changed = [key + (delta,) for key, delta in totals.items() if delta]
+            if changed:
+                cursor.executemany("""
+                    INSERT INTO Issue_Rollup_Totals
+                        (state_id, city_id, ward_id, department_id, category, status, total)
+                    VALUES (%s,%s,%s,%s,%s,%s,%s)
+                    ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+                """, changed)
+
+            ids = [e["event_id"] for e in events]
+            cursor.execute(
+                "DELETE FROM Issue_Events WHERE event_id IN (%s)" % ",".join(["%s"] * len(ids)),
+                ids
+            )
+
+            conn.commit()
+            consumed += len(events)
+            if len(events) < batch_size:
+                break
+    finally:
+        conn.rollback()
+        cursor.close()
+
+    return consumed
+
+
+def rebuild(conn):
+    """
+    Recomputes both rollup tables from history in one transaction and
+    empties the event queue. Status_Updates rows are replayed in order per
+    issue; entries that repeat the previous status (remarks, SLA
+    escalations) are not transitions. History does not record past
+    locations, so every day is attributed to the issue's current key.
+    Run while issue writes are quiet.
+    """
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Issue_Events")
+    cursor.execute("DELETE FROM Issue_Daily_Rollups")
+    cursor.execute("DELETE FROM Issue_Rollup_Totals")
+
+    cursor.execute("""
+        INSERT INTO Issue_Daily_Rollups
+            (day, state_id, city_id, ward_id, department_id, category, status, entered, net)
+        WITH history AS (
+            SELECT su.issue_id, su.status, su.updated_at,
+                   LAG(su.status) OVER (
+                       PARTITION BY su.issue_id ORDER BY su.updated_at
+                   ) AS prev_status
+            FROM Status_Updates su
+        ),
+        transitions AS (
+            SELECT issue_id, status, DATE(updated_at) AS day, 1 AS entered, 1 AS net
+            FROM history
+            WHERE prev_status IS NULL OR prev_status <> status
+            UNION ALL
+            SELECT issue_id, prev_status, DATE(updated_at), 0, -1
+            FROM history
+            WHERE prev_status <> status
+        )
+        SELECT t.day,
+               COALESCE(i.state_id, 0), COALESCE(i.city_id, 0),
+               COALESCE(i.ward_id, 0), COALESCE(i.assigned_department, 0),
+               COALESCE(i.category, ''), t.status,
+               SUM(t.entered), SUM(t.net)
+        FROM transitions t
+        JOIN Issues i ON i.issue_id = t.issue_id
+        GROUP BY 1, 2, 3, 4, 5, 6, 7
+    """)
+    rows = cursor.rowcount
+
+    cursor.execute("""
+        INSERT INTO Issue_Rollup_Totals
+            (state_id, city_id, ward_id, department_id, category, status, total)
+        SELECT COALESCE(state_id, 0), COALESCE(city_id, 0),
+               COALESCE(ward_id, 0), COALESCE(assigned_department, 0),
+               COALESCE(category, ''), current_status, COUNT(*)
+        FROM Issues
+        GROUP BY 1, 2, 3, 4, 5, 6
+    """)
+
+    conn.commit()
+    cursor.close()
+    return rows
+
+
+class RollupWorker:
+    """Runs roll_up every ROLLUP_INTERVAL seconds on a daemon thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config["ROLLUP_INTERVAL"]
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread:
+            return
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name="issue-rollups", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self.app.app_context():
+                    roll_up()
+            except Exception:
+                self.app.logger.exception("Issue rollup failed")
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in ROLLUP_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    worker = RollupWorker(app)
+    app.extensions["rollups"] = worker
+
+    # Started with the first request rather than at import time
+    if app.config["ROLLUP_WORKER"]:
+        app.before_request(worker.start)
+
+
+# -------------------------------------------------
+# CHART QUERIES
+# filters: {rollup column: value}, already limited to the caller's scope
+# -------------------------------------------------
+def _where(filters):
+    clauses, params = [], []
+    for column, value in filters.items():
+        if column not in KEY_COLUMNS:
+            raise ValueError(f"Unknown rollup column {column!r}")
+        clauses.append(f" AND {column} = %s")
+        params.append(value)
+    return "".join(clauses), params
+
+
+def daily_series(cursor, filters, days):
+    """
+    Per-day reported / assigned / resolved / rejected counts and the open
+    backlog at the end of each day, for the last `days` days (today included).
+    """
+    where, params = _where(filters)
+    first = date.today() - timedelta(days=days - 1)
+
+    cursor.execute(f"""
+        SELECT day, status, SUM(entered) AS entered, SUM(net) AS net
+        FROM Issue_Daily_Rollups
+        WHERE day >= %s{where}
+        GROUP BY day, status
+    """, [first] + params)
+    rows = cursor.fetchall()
+
+    closed = ",".join(["%s"] * len(CLOSED_STATUSES))
+    cursor.execute(f"""
+        SELECT COALESCE(SUM(total), 0) AS total
+        FROM Issue_Rollup_Totals
+        WHERE status NOT IN ({closed}){where}
+    """, list(CLOSED_STATUSES) + params)
+    backlog_now = int(cursor.fetchone()["total"])
+
+    labels = [first + timedelta(days=n) for n in range(days)]
+    index = {d: n for n, d in enumerate(labels)}
+    series = {name: [0] * days for name in ENTERED_SERIES.values()}
+    open_net = [0] * days
+
+    for r in rows:
+        n = index.get(r["day"])
+        if n is None:
+            continue
+        name = ENTERED_SERIES.get(r["status"])
+        if name:
+            series[name][n] += int(r["entered"])
+        if r["status"] not in CLOSED_STATUSES:
+            open_net[n] += int(r["net"])
+
+    # Walk back from today's backlog, undoing each later day's change
+    backlog = [0] * days
+    running = backlog_now
+    for n in range(days - 1, -1, -1):
+        backlog[n] = running
+        running -= open_net[n]
+
+    return {
+        "days": [d.isoformat() for d in labels],
+        **series,
+        "backlog": backlog
+    }
+
+
+def breakdown(cursor, filters, by, days):
+    """
+    Totals over the last `days` days grouped by one key column, plus each
+    group's current open backlog: [{"key", "reported", ..., "backlog"}].
+    """
+    column = BREAKDOWNS[by]
+    where, params = _where(filters)
+    first = date.today() - timedelta(days=days - 1)
+
+    counts = ", ".join(
+        f"SUM(CASE WHEN status = %s THEN entered ELSE 0 END) AS {name}"
+        for name in ENTERED_SERIES.values()
+    )
+    cursor.execute(f"""
+        SELECT {column} AS `key`, {counts}
+        FROM Issue_Daily_Rollups
+        WHERE day >= %s{where}
+        GROUP BY {column}
+    """, list(ENTERED_SERIES) + [first] + params)
+    groups = {
+        r["key"]: {name: int(r[name] or 0) for name in ENTERED_SERIES.values()}
+        for r in cursor.fetchall()
+    }
+
+    closed = ",".join(["%s"] * len(CLOSED_STATUSES))
+    cursor.execute(f"""
+        SELECT {column} AS `key`, SUM(total) AS total
+        FROM Issue_Rollup_Totals
+        WHERE status NOT IN ({closed}){where}
+        GROUP BY {column}
+    """, list(CLOSED_STATUSES) + params)
+    backlog = {r["key"]: int(r["total"]) for r in cursor.fetchall()}
+
+    empty = {name: 0 for name in ENTERED_SERIES.values()}
+    return [
+        {"key": key, **groups.get(key, empty), "backlog": backlog.get(key, 0)}
+        for key in sorted(set(groups) | set(backlog), key=str)
+    ]
@@ -0,0 +1,266 @@
+# utils/sla.py
+"""
+Deadline (SLA) tracking for assigned issues.
+
+A scheduler walks open issues whose deadline falls inside a bounded window
+(idx_issues_deadline_status), escalates each once per level by writing an
+Issue_Escalations row plus a Status_Updates entry, and keeps
+Issue_Overdue_Counts per (city, department) so admin views read breaches
+directly. Routes call refresh_issue() when a status, deadline or
+department changes so the counters follow along in the same transaction.
+"""
+import threading
+import time
+
+from flask import current_app
+
+from utils.db import get_db_connection
+
+SLA_DEFAULTS = {
+    "SLA_SCHEDULER": True,          # run the checker thread inside web workers
+    "SLA_CHECK_INTERVAL": 300,      # seconds between sweeps
+    "SLA_BATCH_SIZE": 500,          # issues escalated per transaction
+    "SLA_WARN_HOURS": 24,           # "due soon" this long before the deadline
+    "SLA_LOOKBACK_DAYS": 30,        # oldest deadline a regular sweep looks at
+    "SLA_SYSTEM_USER_ID": None      # author of escalation entries (default: assigner)
+}
+
+CLOSED_STATUSES = ("Resolved", "Rejected")
+
+LEVEL_REMARKS = {
+    "due_soon": "SLA: deadline {deadline} is approaching.",
+    "overdue": "SLA breached: deadline {deadline} has passed."
+}
+
+ISSUE_SQL = """
+    SELECT i.issue_id, i.city_id, i.assigned_department, i.current_status,
+           i.deadline, i.reported_by,
+           i.deadline <= NOW() AS is_overdue,
+           i.deadline <= NOW() + INTERVAL %s HOUR AS is_due_soon
+    FROM Issues i
+"""
+
+
+def _rows(cursor):
+    rows = cursor.fetchall()
+    if rows and not isinstance(rows[0], dict):
+        rows = [dict(zip(cursor.column_names, r)) for r in rows]
+    return rows
+
+
+def _bump_overdue(cursor, city_id, department_id, delta):
+    cursor.execute("""
+        INSERT INTO Issue_Overdue_Counts (city_id, department_id, total)
+        VALUES (%s,%s,%s)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+    """, (city_id or 0, department_id or 0, delta))
+
+
+def _level(issue):
+    if issue["is_overdue"]:
+        return "overdue"
+    if issue["is_due_soon"]:
+        return "due_soon"
+    return None
+
+
+def _escalate(cursor, issue, level, system_user_id):
+    """Records one escalation; a no-op if this level was already recorded."""
+    cursor.execute("""
+        INSERT IGNORE INTO Issue_Escalations
+            (issue_id, level, deadline, city_id, department_id)
+        VALUES (%s,%s,%s,%s,%s)
+    """, (
+        issue["issue_id"], level, issue["deadline"],
+        issue["city_id"] or 0, issue["assigned_department"] or 0
+    ))
+    if cursor.rowcount != 1:
+        return False
+
+    # Timeline entry; authored by the configured system user, else whoever assigned it
+    cursor.execute("""
+        INSERT INTO Status_Updates (issue_id, status, remarks, updated_by)
+        SELECT %s, %s, %s, COALESCE(%s, (
+            SELECT su.updated_by FROM Status_Updates su
+            WHERE su.issue_id = %s AND su.status = 'Assigned'
+            ORDER BY su.updated_at DESC
+            LIMIT 1
+        ), %s)
+    """, (
+        issue["issue_id"], issue["current_status"],
+        LEVEL_REMARKS[level].format(deadline=issue["deadline"]),
+        system_user_id, issue["issue_id"], issue["reported_by"]
+    ))
+
+    if level == "overdue":
+        _bump_overdue(cursor, issue["city_id"], issue["assigned_department"], 1)
+    return True
+
+
+def refresh_issue(cursor, issue_id):
+    """
+    Re-evaluates one issue after a status / deadline / department change;
+    run inside that transaction, with the issue row already locked.
+    Escalations that no longer apply are dropped (and leave the overdue
+    counts); a deadline that is already due escalates immediately.
+    """
+    config = current_app.config
+
+    cursor.execute(ISSUE_SQL + " WHERE i.issue_id = %s", (config["SLA_WARN_HOURS"], issue_id))
+    issues = _rows(cursor)
+    if not issues:
+        return
+    issue = issues[0]
+    closed = issue["current_status"] in CLOSED_STATUSES
+
+    # Compared in SQL so DATE and DATETIME deadlines match
+    cursor.execute("""
+        SELECT e.level, e.city_id, e.department_id,
+               (e.deadline <=> i.deadline
+                AND e.city_id = COALESCE(i.city_id, 0)
+                AND e.department_id = COALESCE(i.assigned_department, 0)) AS still_valid
+        FROM Issue_Escalations e
+        JOIN Issues i ON i.issue_id = e.issue_id
+        WHERE e.issue_id = %s
+    """, (issue_id,))
+
+    present = set()
+    for e in _rows(cursor):
+        if e["still_valid"] and not closed:
+            present.add(e["level"])
+            continue
+        cursor.execute(
+            "DELETE FROM Issue_Escalations WHERE issue_id=%s AND level=%s",
+            (issue_id, e["level"])
+        )
+        if e["level"] == "overdue":
+            _bump_overdue(cursor, e["city_id"], e["department_id"], -1)
+
+    level = None if closed else _level(issue)
+    if level and level not in present:
+        _escalate(cursor, issue, level, config["SLA_SYSTEM_USER_ID"])
+
+
+def check_deadlines(app, full=False):
+    """
+    One sweep: escalates every open issue whose deadline crossed the
+    due-soon / overdue line. Runs in batches of SLA_BATCH_SIZE, each its own
+    transaction; a MySQL named lock keeps workers from sweeping at once.
+    full=True drops the SLA_LOOKBACK_DAYS bound (catch-up after downtime).
+    Returns the number of issues escalated (None if another sweep holds the lock).
+    """
+    config = app.config
+
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+
+    cursor.execute("SELECT GET_LOCK('sla-scheduler', 0) AS acquired")
+    if not cursor.fetchone()["acquired"]:
+        cursor.close()
+        return None
+
+    window = "" if full else " AND i.deadline > NOW() - INTERVAL %s DAY"
+    params = [config["SLA_WARN_HOURS"], config["SLA_WARN_HOURS"]]
+    if not full:
+        params.append(config["SLA_LOOKBACK_DAYS"])
+    params.append(config["SLA_BATCH_SIZE"])
+
+    # Rows a request is updating right now are skipped; its refresh_issue covers them
+    sweep_sql = ISSUE_SQL + f"""
+        WHERE i.deadline <= NOW() + INTERVAL %s HOUR{window}
+          AND i.current_status NOT IN ('Resolved', 'Rejected')
+          AND NOT EXISTS (
+              SELECT 1 FROM Issue_Escalations e
+              WHERE e.issue_id = i.issue_id
+                AND e.level = IF(i.deadline <= NOW(), 'overdue', 'due_soon')
+          )
+        ORDER BY i.deadline, i.issue_id
+        LIMIT %s
+        FOR UPDATE SKIP LOCKED
+    """
+
+    escalated = 0
+    try:
+        while True:
+            cursor.execute(sweep_sql, params)
+            issues = cursor.fetchall()
+
+            for issue in issues:
+                if _escalate(cursor, issue, _level(issue), config["SLA_SYSTEM_USER_ID"]):
+                    escalated += 1
+
+            conn.commit()
+            if len(issues) < config["SLA_BATCH_SIZE"]:
+                break
+    finally:
+        conn.rollback()
+        cursor.execute("SELECT RELEASE_LOCK('sla-scheduler')")
+        cursor.fetchall()
+        cursor.close()
+
+    return escalated
+
+
+class SLAScheduler:
+    """Runs check_deadlines every SLA_CHECK_INTERVAL seconds on a daemon thread."""
+
+    def __init__(self, app):
+        self.app = app
+        self.interval = app.config["SLA_CHECK_INTERVAL"]
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._thread:
+            return
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name="sla-scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                with self.app.app_context():
+                    check_deadlines(self.app)
+            except Exception:
+                self.app.logger.exception("SLA sweep failed")
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    for key, value in SLA_DEFAULTS.items():
+        app.config.setdefault(key, value)
+
+    scheduler = SLAScheduler(app)
+    app.extensions["sla"] = scheduler
+
+    # Started with the first request rather than at import time
+    if app.config["SLA_SCHEDULER"]:
+        app.before_request(scheduler.start)
+
+
+def overdue_by_city(cursor, city_ids=None):
+    """{city_id: overdue issues}, optionally limited to some cities."""
+    sql = "SELECT city_id, SUM(total) AS total FROM Issue_Overdue_Counts WHERE total > 0"
+    params = []
+    if city_ids is not None:
+        if not city_ids:
+            return {}
+        sql += " AND city_id IN (%s)" % ",".join(["%s"] * len(city_ids))
+        params.extend(city_ids)
+    cursor.execute(sql + " GROUP BY city_id", params)
+    return {r["city_id"]: int(r["total"]) for r in cursor.fetchall()}
+
+
+def overdue_by_department(cursor, city_id):
+    """{department_id: overdue issues} within one city (0 = unassigned)."""
+    cursor.execute("""
+        SELECT department_id, total FROM Issue_Overdue_Counts
+        WHERE city_id = %s AND total > 0
+    """, (city_id or 0,))
+    return {r["department_id"]: r["total"] for r in cursor.fetchall()}
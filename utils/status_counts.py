@@ -0,0 +1,155 @@
+# utils/status_counts.py
+"""
+Issue counters per (state, city, ward, department, status).
+
+Every write that changes an issue's status, location or department
+adjusts Issue_Status_Counts on the same cursor, so the counts commit
+or roll back together with the issue itself.
+"""
+
+STATUSES = ["Reported", "Assigned", "In Progress", "In Review", "Resolved", "Rejected"]
+
+# Filters the counter table can answer (UI/scope name -> column)
+COUNTER_COLUMNS = {
+    "state_id": "state_id",
+    "city_id": "city_id",
+    "ward_id": "ward_id",
+    "department_id": "department_id"
+}
+
+
+def _row_dict(cursor, row):
+    if row is None or isinstance(row, dict):
+        return row
+    return dict(zip(cursor.column_names, row))
+
+
+def _bump(cursor, issue, status, delta):
+    cursor.execute("""
+        INSERT INTO Issue_Status_Counts
+            (state_id, city_id, ward_id, department_id, status, total)
+        VALUES (%s,%s,%s,%s,%s,%s)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+    """, (
+        issue.get("state_id") or 0,
+        issue.get("city_id") or 0,
+        issue.get("ward_id") or 0,
+        issue.get("assigned_department") or 0,
+        status,
+        delta
+    ))
+
+
+def record_new_issue(cursor, issue):
+    """issue: dict with state_id, city_id, ward_id (and optional assigned_department)."""
+    _bump(cursor, issue, issue.get("current_status", "Reported"), 1)
+
+
+def record_new_issues(cursor, issues):
+    """Batched record_new_issue(): one upsert row per distinct counter key."""
+    deltas = {}
+    for issue in issues:
+        key = (
+            issue.get("state_id") or 0,
+            issue.get("city_id") or 0,
+            issue.get("ward_id") or 0,
+            issue.get("assigned_department") or 0,
+            issue.get("current_status", "Reported")
+        )
+        deltas[key] = deltas.get(key, 0) + 1
+
+    if not deltas:
+        return
+
+    cursor.executemany("""
+        INSERT INTO Issue_Status_Counts
+            (state_id, city_id, ward_id, department_id, status, total)
+        VALUES (%s,%s,%s,%s,%s,%s)
+        ON DUPLICATE KEY UPDATE total = total + VALUES(total)
+    """, [key + (delta,) for key, delta in deltas.items()])
+
+
+def lock_issue(cursor, issue_id):
+    """
+    Locks the issue row for the rest of the transaction and returns
+    the fields the counters are keyed on, or None if it does not exist.
+    """
+    cursor.execute("""
+        SELECT issue_id, state_id, city_id, ward_id,
+               assigned_department, current_status
+        FROM Issues
+        WHERE issue_id=%s
+        FOR UPDATE
+    """, (issue_id,))
+    return _row_dict(cursor, cursor.fetchone())
+
+
+def record_transition(cursor, before, status=None, department_id=None):
+    """
+    Moves one issue between counters.
+    before: row returned by lock_issue() prior to the UPDATE.
+    """
+    after = dict(before)
+    if status is not None:
+        after["current_status"] = status
+    if department_id is not None:
+        after["assigned_department"] = department_id
+
+    if (after["current_status"], after["assigned_department"] or 0) == \
+            (before["current_status"], before["assigned_department"] or 0):
+        return
+
+    _bump(cursor, before, before["current_status"], -1)
+    _bump(cursor, after, after["current_status"], 1)
+
+
+def status_totals(cursor, filters=(), status=None):
+    """
+    Status breakdown from the counters, in the same shape as the
+    dashboard stats aggregate.
+    filters: (key, value) pairs, e.g. [("city_id", 3)]; all are ANDed.
+    status: optional status filter, other statuses report 0.
+    """
+    where = " WHERE 1=1 "
+    params = []
+    for key, value in filters:
+        where += f" AND {COUNTER_COLUMNS[key]} = %s"
+        params.append(value)
+
+    cursor.execute(f"""
+        SELECT status, COALESCE(SUM(total),0) AS total
+        FROM Issue_Status_Counts
+        {where}
+        GROUP BY status
+    """, params)
+
+    counts = {name: 0 for name in STATUSES}
+    for row in cursor.fetchall():
+        row = _row_dict(cursor, row)
+        if status is None or row["status"] == status:
+            counts[row["status"]] = int(row["total"])
+
+    return {"Total": sum(counts.values()), **counts}
+
+
+def rebuild(conn):
+    """Recomputes every counter from Issues in a single transaction."""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM Issue_Status_Counts")
+    cursor.execute("""
+        INSERT INTO Issue_Status_Counts
+            (state_id, city_id, ward_id, department_id, status, total)
+        SELECT
+            COALESCE(state_id, 0),
+            COALESCE(city_id, 0),
+            COALESCE(ward_id, 0),
+            COALESCE(assigned_department, 0),
+            current_status,
+            COUNT(*)
+        FROM Issues
+        GROUP BY 1, 2, 3, 4, 5
+    """)
+    rows = cursor.rowcount
+    conn.commit()
+    cursor.close()
+    return rows
@@ -0,0 +1,62 @@
+# utils/streaming.py
+import csv
+import io
+
+from flask import current_app, stream_with_context
+
+NDJSON_MIMETYPE = "application/x-ndjson"
+CSV_MIMETYPE = "text/csv"
+STREAM_BATCH_SIZE = 500
+
+
+def ndjson_lines(cursor, batch_size=STREAM_BATCH_SIZE):
+    """
+    Yields rows of an executed (unbuffered) cursor as NDJSON, one batch
+    of lines per chunk, so only batch_size rows are in memory at a time.
+    The cursor is closed when the stream ends or the client goes away.
+    """
+    dumps = current_app.json.dumps
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield "".join(dumps(row) + "\n" for row in rows)
+    finally:
+        cursor.close()
+
+
+def csv_lines(cursor, columns, batch_size=STREAM_BATCH_SIZE):
+    """Same as ndjson_lines() but as CSV with a header row; rows are dicts."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        chunk = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    try:
+        writer.writerow(columns)
+        yield flush()
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            writer.writerows([row.get(c) for c in columns] for row in rows)
+            yield flush()
+    finally:
+        cursor.close()
+
+
+def stream_response(chunks, mimetype, headers=None):
+    """
+    Chunked response that keeps the request context (and so the pooled
+    DB connection) alive until the generator is exhausted.
+    """
+    return current_app.response_class(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers=headers
+    )
@@ -0,0 +1,122 @@
+# utils/upload_store.py
+import hashlib
+import os
+import tempfile
+
+from flask import current_app, url_for
+from werkzeug.utils import secure_filename
+
+# Files live at STORE_ROOT/<aa>/<bb>/<sha256><ext>; the stored path
+# (what Issue_Images.image_file holds) includes STORE_ROOT and is relative
+# to the app's root_path, never to the working directory.
+STORE_ROOT = os.path.join("static", "uploads")
+CHUNK_SIZE = 64 * 1024
+
+# Same bytes should land on the same name regardless of how the client spelled it
+EXTENSION_ALIASES = {".jpeg": ".jpg", ".jpe": ".jpg", ".tif": ".tiff"}
+
+
+def normalised_extension(filename):
+    ext = os.path.splitext(secure_filename(filename or ""))[1].lower()
+    return EXTENSION_ALIASES.get(ext, ext)
+
+
+def key_for(digest, ext):
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{ext}"
+
+
+def path_for(key):
+    return os.path.join(STORE_ROOT, *key.split("/"))
+
+
+def disk_path(path):
+    """Filesystem location of a stored path (the same one the media route serves)."""
+    return os.path.join(current_app.root_path, path)
+
+
+def _commit(tmp_path, digest, ext):
+    """Moves a fully written temp file into place, or drops it if a copy exists."""
+    key = key_for(digest, ext)
+    target = path_for(key)
+    on_disk = disk_path(target)
+
+    if os.path.exists(on_disk):
+        os.remove(tmp_path)   # duplicate upload
+    else:
+        os.makedirs(os.path.dirname(on_disk), exist_ok=True)
+        os.chmod(tmp_path, 0o644)   # mkstemp files are owner-only
+        os.replace(tmp_path, on_disk)
+
+    return target
+
+
+def _spool(chunks, ext):
+    """Writes chunks to a temp file inside the store while hashing them."""
+    path = temp_path()
+
+    hasher = hashlib.sha256()
+    try:
+        with open(path, "wb") as tmp:
+            for chunk in chunks:
+                hasher.update(chunk)
+                tmp.write(chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    return _commit(path, hasher.hexdigest(), ext)
+
+
+def save_upload(file_storage):
+    """
+    Stores a werkzeug FileStorage by content hash in a single pass.
+    Returns the stored path; identical uploads share one file.
+    """
+    stream = file_storage.stream
+    chunks = iter(lambda: stream.read(CHUNK_SIZE), b"")
+    return _spool(chunks, normalised_extension(file_storage.filename))
+
+
+def adopt_file(path, ext=None):
+    """
+    Moves a file written elsewhere inside STORE_ROOT (e.g. a generated
+    variant) into the store under its content hash.
+    """
+    ext = ext if ext is not None else normalised_extension(path)
+    hasher = hashlib.sha256()
+    with open(path, "rb") as src:
+        for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return _commit(path, hasher.hexdigest(), ext)
+
+
+def temp_path(suffix=""):
+    """A fresh temp file path inside the store (same filesystem, so moves are atomic)."""
+    tmp_dir = disk_path(os.path.join(STORE_ROOT, "tmp"))
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(dir=tmp_dir, suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def store_key(path):
+    """Store key for a stored path, or None for legacy flat uploads."""
+    if not path:
+        return None
+    rel = os.path.relpath(path, STORE_ROOT).replace(os.sep, "/")
+    parts = rel.split("/")
+    if len(parts) != 3 or rel.startswith(".."):
+        return None
+    return rel
+
+
+def upload_url(path):
+    """
+    Public URL for an uploaded file. Content-addressed files go through the
+    immutable media route; legacy flat uploads stay under /static.
+    """
+    key = store_key(path)
+    if key:
+        return url_for("main.uploaded_file", key=key)
+    return "/" + path if path else ""
+
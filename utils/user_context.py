@@ -0,0 +1,122 @@
+# utils/user_context.py
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app, session
+
+from utils.db import get_db_connection
+
+CONTEXT_COLUMNS = ("user_id", "state_id", "city_id", "ward_id", "department_id")
+
+
+class UserContextCache:
+    """
+    Bounded LRU of each user's location/department scope.
+
+    Entries expire after USER_CONTEXT_TTL seconds. Every entry also records
+    the session's scope_version; a user whose own profile changed (possibly
+    in another worker) carries a newer version in their session and gets a
+    fresh row.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id, version):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry:
+                return None
+            context, cached_version, loaded_at = entry
+            if cached_version != version or time.monotonic() - loaded_at > self.ttl:
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return context
+
+    def put(self, user_id, version, context):
+        with self._lock:
+            self._entries[user_id] = (context, version, time.monotonic())
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+# -------------------------------------------------
+# FLASK INTEGRATION
+# -------------------------------------------------
+def init_app(app):
+    app.config.setdefault("USER_CONTEXT_CACHE_SIZE", 10000)
+    app.config.setdefault("USER_CONTEXT_TTL", 300)
+    app.extensions["user_context"] = UserContextCache(
+        app.config["USER_CONTEXT_CACHE_SIZE"],
+        app.config["USER_CONTEXT_TTL"]
+    )
+
+
+def _cache():
+    return current_app.extensions["user_context"]
+
+
+def context_from_row(row):
+    return {key: row.get(key) for key in CONTEXT_COLUMNS}
+
+
+def remember(row):
+    """Primes the cache from a Users row already fetched (e.g. at login)."""
+    context = context_from_row(row)
+    _cache().put(context["user_id"], session.get("scope_version", 0), context)
+    return context
+
+
+def current_user_context():
+    """
+    Scope of the logged-in user: user_id, state_id, city_id, ward_id,
+    department_id. None if the user no longer exists.
+    """
+    user_id = session.get("user_id")
+    if user_id is None:
+        return None
+
+    version = session.get("scope_version", 0)
+    context = _cache().get(user_id, version)
+    if context is not None:
+        return context
+
+    cursor = get_db_connection().cursor(dictionary=True)
+    cursor.execute("""
+        SELECT user_id, state_id, city_id, ward_id, department_id
+        FROM Users
+        WHERE user_id=%s
+    """, (user_id,))
+    row = cursor.fetchone()
+    cursor.close()
+
+    if not row:
+        return None
+
+    context = context_from_row(row)
+    _cache().put(user_id, version, context)
+    return context
+
+
+def invalidate(user_id):
+    """
+    Call after changing a user's state/city/ward/department. Other workers
+    pick the change up within USER_CONTEXT_TTL, or immediately for the user
+    whose own session is updated by touch_session().
+    """
+    _cache().invalidate(user_id)
+
+
+def touch_session():
+    """Marks the current session's scope as changed (own profile edits)."""
+    session["scope_version"] = session.get("scope_version", 0) + 1
@@ -0,0 +1,127 @@
+# utils/user_directory.py
+"""
+Admin user directory: one keyset page at a time, in signup order.
+
+Location names come from the in-process hierarchy instead of joins, search
+is a prefix match the Users indexes can serve (migrations/013), and the
+total is counted only up to USER_COUNT_CAP rows, past which the
+optimizer's row estimate is reported instead.
+"""
+import json
+
+from utils.locations import hierarchy
+from utils.pagination import keyset_clause
+
+USER_COUNT_CAP = 1000
+
+USER_COLUMNS = """
+    u.user_id, u.name, u.mobile, u.email, u.role,
+    u.verified, u.assisted_signup, u.created_at,
+    u.state_id, u.city_id, u.ward_id
+"""
+
+
+def directory_scope(role_priority, current_role, profile, args):
+    """
+    (where_sql, params) for the users an admin may list: strictly lower
+    roles, inside their own state / city, narrowed by the UI filters.
+    """
+    clauses, params = [], []
+
+    # ---- STRICT ROLE HIERARCHY ----
+    allowed_roles = [
+        role for role, priority in role_priority.items()
+        if priority < role_priority[current_role]
+    ]
+    clauses.append(" AND u.role IN (%s)" % ",".join(["%s"] * len(allowed_roles)))
+    params.extend(allowed_roles)
+
+    # ---- HARD GEOGRAPHIC SCOPING ----
+    if current_role == "state_admin":
+        clauses.append(" AND u.state_id = %s")
+        params.append(profile.get("state_id"))
+    elif current_role == "municipal_admin":
+        clauses.append(" AND u.city_id = %s")
+        params.append(profile.get("city_id"))
+
+    # ---- UI FILTERS (WITHIN ALLOWED SCOPE) ----
+    if current_role == "super_admin" and args.get("state_id"):
+        clauses.append(" AND u.state_id = %s")
+        params.append(args["state_id"])
+    if args.get("city_id"):
+        clauses.append(" AND u.city_id = %s")
+        params.append(args["city_id"])
+    if args.get("ward_id"):
+        clauses.append(" AND u.ward_id = %s")
+        params.append(args["ward_id"])
+
+    sql, search_params = search_clause(args.get("search"))
+    clauses.append(sql)
+    params.extend(search_params)
+
+    return " WHERE 1=1" + "".join(clauses), params
+
+
+def _escape_like(term):
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_clause(term):
+    """
+    Prefix search: digits match the start of the mobile number, anything
+    with '@' the start of the email, everything else the start of the name.
+    """
+    term = (term or "").strip()
+    if not term:
+        return "", []
+
+    prefix = _escape_like(term) + "%"
+    if term.lstrip("+").isdigit():
+        return " AND u.mobile LIKE %s", [prefix]
+    if "@" in term:
+        return " AND u.email LIKE %s", [prefix]
+    return " AND u.name LIKE %s", [prefix]
+
+
+def list_users(cursor, where, params, after=None, limit=50):
+    """
+    One page (limit rows) after the (created_at, user_id) cursor, oldest
+    signups first, with state / city / ward names filled in.
+    """
+    sql = f"SELECT {USER_COLUMNS} FROM Users u{where}"
+    params = list(params)
+    if after:
+        sql += " AND " + keyset_clause("u.created_at", "u.user_id", descending=False)
+        params.extend([after[0], after[0], after[1]])
+    sql += " ORDER BY u.created_at ASC, u.user_id ASC LIMIT %s"
+    params.append(limit)
+
+    cursor.execute(sql, params)
+    users = cursor.fetchall()
+
+    locations = hierarchy()
+    for u in users:
+        u["state_name"] = locations.states_by_id.get(u["state_id"], {}).get("name")
+        u["city_name"] = locations.cities.get(u["city_id"], {}).get("name")
+        u["ward_name"] = locations.wards.get(u["ward_id"], {}).get("name")
+    return users
+
+
+def estimate_total(cursor, where, params):
+    """
+    {"count", "exact"}: an exact count while it stays under USER_COUNT_CAP,
+    otherwise MySQL's row estimate for the same predicate.
+    """
+    cursor.execute(
+        f"SELECT COUNT(*) AS total FROM (SELECT 1 FROM Users u{where} LIMIT %s) capped",
+        list(params) + [USER_COUNT_CAP + 1]
+    )
+    total = cursor.fetchone()["total"]
+    if total <= USER_COUNT_CAP:
+        return {"count": total, "exact": True}
+
+    cursor.execute(f"EXPLAIN FORMAT=JSON SELECT 1 FROM Users u{where}", params)
+    plan = json.loads(cursor.fetchone()["EXPLAIN"])
+    table = plan.get("query_block", {}).get("table", {})
+    estimate = int(table.get("rows_produced_per_join") or table.get("rows_examined_per_scan") or 0)
+    return {"count": max(estimate, total), "exact": False}
@@ -0,0 +1,235 @@
+# utils/user_import.py
+import csv
+import io
+import re
+import secrets
+
+import mysql.connector
+
+from utils.locations import to_id
+
+USER_IMPORT_CHUNK_SIZE = 1000    # rows per INSERT batch / transaction
+MAX_USER_IMPORT_ROWS = 50000
+MAX_NAME_LENGTH = 100
+
+MOBILE_PATTERN = re.compile(r"^\+?\d{10,15}$")
+EMAIL_PATTERN = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class UserImportFormatError(ValueError):
+    """The uploaded file cannot be read as a list of user rows."""
+
+
+def read_rows(file_storage):
+    """Parses an uploaded .csv file with a header row."""
+    if not (file_storage.filename or "").lower().endswith(".csv"):
+        raise UserImportFormatError("Upload a .csv file.")
+
+    try:
+        text = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig", newline="")
+        rows = list(csv.DictReader(text))
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise UserImportFormatError(f"Could not read file: {e}") from e
+
+    if not rows:
+        raise UserImportFormatError("The file contains no rows.")
+    if len(rows) > MAX_USER_IMPORT_ROWS:
+        raise UserImportFormatError(f"At most {MAX_USER_IMPORT_ROWS} users can be imported at once.")
+
+    return rows
+
+
+def _location(raw, locations, role, profile):
+    """
+    (state_id, city_id, ward_id, None) inside the creator's area, or an
+    error as the last item. State / city admins cannot leave their own.
+    """
+    ward_id = to_id(raw.get("ward_id"))
+    city_id = to_id(raw.get("city_id"))
+    state_id = to_id(raw.get("state_id"))
+
+    # A ward alone is enough; its city and state are implied
+    ward = locations.wards.get(ward_id) if ward_id else None
+    if ward_id and not ward:
+        return None, None, None, "Ward does not exist."
+    if ward:
+        if city_id and city_id != ward["city_id"]:
+            return None, None, None, "Ward is not in that city."
+        city_id = ward["city_id"]
+
+    city = locations.cities.get(city_id) if city_id else None
+    if city_id and not city:
+        return None, None, None, "City does not exist."
+    if city:
+        if state_id and state_id != city["state_id"]:
+            return None, None, None, "City is not in that state."
+        state_id = city["state_id"]
+
+    if state_id and state_id not in locations.states_by_id:
+        return None, None, None, "State does not exist."
+
+    if role == "state_admin":
+        if state_id and state_id != profile.get("state_id"):
+            return None, None, None, "Location is outside your state."
+        state_id = profile.get("state_id")
+
+    elif role == "municipal_admin":
+        if city_id and city_id != profile.get("city_id"):
+            return None, None, None, "Location is outside your city."
+        state_id, city_id = profile.get("state_id"), profile.get("city_id")
+
+    return state_id, city_id, ward_id, None
+
+
+def validate_row(raw, locations, allowed_roles, role, profile):
+    """Returns (user dict, None) or (None, error message)."""
+    name = str(raw.get("name") or "").strip()
+    mobile = str(raw.get("mobile") or "").strip().replace(" ", "")
+    email = str(raw.get("email") or "").strip()
+    new_role = str(raw.get("role") or "").strip().lower()
+
+    if not name or not mobile:
+        return None, "Name and mobile are required."
+    if len(name) > MAX_NAME_LENGTH:
+        return None, f"Name is longer than {MAX_NAME_LENGTH} characters."
+    if not MOBILE_PATTERN.match(mobile):
+        return None, "Mobile must be 10 to 15 digits."
+    if email and not EMAIL_PATTERN.match(email):
+        return None, "Email is not valid."
+    if new_role not in allowed_roles:
+        return None, f"You cannot create users with role '{raw.get('role') or ''}'."
+
+    state_id, city_id, ward_id, error = _location(raw, locations, role, profile)
+    if error:
+        return None, error
+
+    department_id = to_id(raw.get("department_id"))
+    if department_id:
+        if department_id not in {d["department_id"] for d in locations.departments_in_city(city_id)}:
+            return None, "Department is not in the user's city."
+    elif new_role == "department_admin":
+        return None, "department_admin rows need a department_id."
+
+    return {
+        "name": name,
+        "mobile": mobile,
+        "email": email,
+        # No password column: a random one, replaced through the OTP reset flow
+        "password": str(raw.get("password") or "").strip() or secrets.token_urlsafe(12),
+        "role": new_role,
+        "state_id": state_id,
+        "city_id": city_id,
+        "ward_id": ward_id,
+        "department_id": department_id
+    }, None
+
+
+def existing_mobiles(cursor, mobiles):
+    """Mobiles already registered, found with one join against a temporary table."""
+    cursor.execute("""
+        CREATE TEMPORARY TABLE IF NOT EXISTS Import_Mobiles (
+            mobile VARCHAR(20) PRIMARY KEY
+        )
+    """)
+    cursor.execute("DELETE FROM Import_Mobiles")
+    try:
+        for start in range(0, len(mobiles), USER_IMPORT_CHUNK_SIZE):
+            cursor.executemany(
+                "INSERT IGNORE INTO Import_Mobiles (mobile) VALUES (%s)",
+                [(m,) for m in mobiles[start:start + USER_IMPORT_CHUNK_SIZE]]
+            )
+        cursor.execute("""
+            SELECT u.mobile FROM Users u
+            JOIN Import_Mobiles im ON im.mobile = u.mobile
+        """)
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.execute("DROP TEMPORARY TABLE IF EXISTS Import_Mobiles")
+
+
+def import_users(conn, raw_rows, locations, role, profile, allowed_roles):
+    """
+    Validates every row, checks all mobiles against Users at once, then
+    inserts the valid rows in chunked transactions; a failing chunk is
+    rolled back on its own.
+
+    Returns a report with one result per row (row numbers are 1-based):
+    {"row", "mobile", "status": "created" | "failed", "user_id" | "error"}.
+    """
+    report = {"total": len(raw_rows), "created": 0, "failed": 0, "results": []}
+    results = {}
+
+    valid, seen = [], set()
+    for n, raw in enumerate(raw_rows, start=1):
+        user, error = validate_row(raw, locations, allowed_roles, role, profile)
+        if not error and user["mobile"] in seen:
+            error = "Mobile appears earlier in this file."
+        if error:
+            results[n] = {"row": n, "mobile": str(raw.get("mobile") or ""), "status": "failed", "error": error}
+            continue
+        seen.add(user["mobile"])
+        user["row"] = n
+        valid.append(user)
+
+    cursor = conn.cursor()
+
+    taken = existing_mobiles(cursor, [u["mobile"] for u in valid])
+    conn.commit()
+
+    fresh = []
+    for u in valid:
+        if u["mobile"] in taken:
+            results[u["row"]] = {
+                "row": u["row"], "mobile": u["mobile"], "status": "failed",
+                "error": "Mobile is already registered."
+            }
+        else:
+            fresh.append(u)
+
+    for start in range(0, len(fresh), USER_IMPORT_CHUNK_SIZE):
+        chunk = fresh[start:start + USER_IMPORT_CHUNK_SIZE]
+        try:
+            cursor.executemany("""
+                INSERT INTO Users (
+                    name, email, mobile, password, role,
+                    state_id, city_id, ward_id, department_id,
+                    verified, assisted_signup
+                )
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,TRUE,TRUE)
+            """, [
+                (
+                    u["name"], u["email"], u["mobile"], u["password"], u["role"],
+                    u["state_id"], u["city_id"], u["ward_id"], u["department_id"]
+                )
+                for u in chunk
+            ])
+
+            # Ids of the rows just inserted, by mobile
+            cursor.execute(
+                "SELECT mobile, user_id FROM Users WHERE mobile IN (%s)"
+                % ",".join(["%s"] * len(chunk)),
+                [u["mobile"] for u in chunk]
+            )
+            ids = dict(cursor.fetchall())
+
+            conn.commit()
+            for u in chunk:
+                results[u["row"]] = {
+                    "row": u["row"], "mobile": u["mobile"], "status": "created",
+                    "user_id": ids.get(u["mobile"])
+                }
+            report["created"] += len(chunk)
+
+        except mysql.connector.Error as e:
+            conn.rollback()
+            for u in chunk:
+                results[u["row"]] = {
+                    "row": u["row"], "mobile": u["mobile"], "status": "failed",
+                    "error": f"Database error: {e.msg}"
+                }
+
+    cursor.close()
+
+    report["results"] = [results[n] for n in sorted(results)]
+    report["failed"] = report["total"] - report["created"]
+    return report